@@ -211,8 +211,27 @@ class OpenstackCompute(object):
         self.update_compute_dicts(stack)
 
         # Create the networks first
-        for server in stack.servers.values():
-            self._start_compute(server)
+        servers = list(stack.servers.values())
+        computes = list()
+        for server in servers:
+            LOG.debug("Starting new compute resources %s" % server.name)
+            computes.append({'name': server.name,
+                             'image': server.image,
+                             'command': server.command,
+                             'network': self._compute_network(server),
+                             'flavor_name': server.flavor,
+                             'properties': server.properties})
+        # create all containers of the stack in parallel
+        results = self.dc.startComputeBatch(computes)
+        errors = list()
+        for server, result in zip(servers, results):
+            if result['error'] is not None:
+                errors.append("%s: %s" % (server.name, result['error']))
+                continue
+            self._setup_compute(server, result['compute'])
+        if len(errors) > 0:
+            raise Exception("Could not start compute resources: %s" %
+                            "; ".join(errors))
         return True
 
     def delete_stack(self, stack_id):
@@ -452,6 +471,21 @@ class OpenstackCompute(object):
         :type server: :class:`heat.resources.server`
         """
         LOG.debug("Starting new compute resources %s" % server.name)
+        network = self._compute_network(server)
+        c = self.dc.startCompute(server.name, image=server.image, command=server.command,
+                                 network=network, flavor_name=server.flavor,
+                                 properties=server.properties)
+        self._setup_compute(server, c)
+
+    def _compute_network(self, server):
+        """
+        Determines the network interfaces of a server from its ports.
+
+        :param server: Specifies the compute resource.
+        :type server: :class:`heat.resources.server`
+        :return: The network list for :func:`Datacenter.startCompute`.
+        :rtype: ``list``
+        """
         network = list()
         network_dict = dict()
 
@@ -472,9 +506,18 @@ class OpenstackCompute(object):
 
         self.compute_nets[server.name] = network
         LOG.debug("Network dict: {}".format(network))
-        c = self.dc.startCompute(server.name, image=server.image, command=server.command,
-                                 network=network, flavor_name=server.flavor,
-                                 properties=server.properties)
+        return network
+
+    def _setup_compute(self, server, c):
+        """
+        Configures the interfaces of a started compute object and starts
+        its emulator command.
+
+        :param server: Specifies the compute resource.
+        :type server: :class:`heat.resources.server`
+        :param c: The started container.
+        :type c: :class:`emuvim.dcemulator.node.EmulatorCompute`
+        """
         server.emulator_compute = c
 
         for intf in c.intfs.values():
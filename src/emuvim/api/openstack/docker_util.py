@@ -25,7 +25,7 @@
 # partner consortium (www.sonata-nfv.eu).
 from docker import APIClient
 import time
-import re
+from emuvim.dcemulator.netstats import NetDevReader
 
 
 def docker_container_id(container_name):
@@ -137,26 +137,18 @@ def docker_abs_net_io(container_id):
         system time.
     :rtype: ``dict``
     """
+    # the counters of the container's network namespace are read from the
+    # host (/proc/<pid>/net/dev), no command is executed in the container
     c = APIClient()
-    command = c.exec_create(container_id, 'ifconfig')
-    ifconfig = c.exec_start(command['Id'])
+    pid = c.inspect_container(container_id)['State']['Pid']
+    counters = NetDevReader().counters(pid)
     sys_time = int(time.time() * 1000000000)
 
-    in_bytes = 0
-    m = re.findall('RX bytes:(\d+)', str(ifconfig))
-    if m:
-        for number in m:
-            in_bytes += int(number)
-    else:
-        in_bytes = None
-
-    out_bytes = 0
-    m = re.findall('TX bytes:(\d+)', str(ifconfig))
-    if m:
-        for number in m:
-            out_bytes += int(number)
-    else:
-        out_bytes = None
+    in_bytes = None
+    out_bytes = None
+    if counters:
+        in_bytes = sum(intf['rx_bytes'] for intf in counters.values())
+        out_bytes = sum(intf['tx_bytes'] for intf in counters.values())
 
     return {'NET_in': in_bytes, 'NET_out': out_bytes, 'NET_systime': sys_time}
 
@@ -66,6 +66,9 @@ class OpenstackManage(object):
         # balancer
         self.lb_flow_cookies = dict()
         self.chain_flow_cookies = dict()
+        # VLAN tags used by the paths of the load balancers, given back to
+        # the pool when the load balancer is deleted
+        self.lb_vlans = dict()
 
         # for the visualization also store the complete chain data incl. paths
         self.full_chain_data = dict()
@@ -88,6 +91,7 @@ class OpenstackManage(object):
         self.floating_netmask = "192.168.100.0/24"
         self.floating_nodes = dict()
         self.floating_cookies = dict()
+        self.floating_vlans = dict()
         self.floating_intf = None
         self.floating_links = dict()
 
@@ -604,9 +608,9 @@ class OpenstackManage(object):
 
             # choose free vlan if path contains more than 1 switch
             if len(path) > 1:
-                vlan = net.vlans.pop()
-                if vlan == 0:
-                    vlan = net.vlans.pop()
+                vlan = net.vlans.allocate()
+                self.lb_vlans.setdefault(
+                    (src_vnf_name, src_vnf_interface), list()).append(vlan)
             else:
                 vlan = None
 
@@ -725,8 +729,8 @@ class OpenstackManage(object):
                 logging.debug(cmd)
                 cmd = "\"%s\"" % cmd
                 cmd_back = "\"%s\"" % cmd_back
-                net[current_hop].dpctl(main_cmd, cmd)
-                net[current_hop].dpctl(main_cmd, cmd_back)
+                self._add_flow(current_hop, main_cmd, cmd)
+                self._add_flow(current_hop, main_cmd, cmd_back)
 
                 # set next hop for the next iteration step
                 if isinstance(next_node, OVSSwitch):
@@ -754,7 +758,7 @@ class OpenstackManage(object):
 
         # actually add the flow
         logging.debug("Switch: %s, CMD: %s" % (src_sw, cmd))
-        net[src_sw].dpctl(main_cmd, cmd)
+        self._add_flow(src_sw, main_cmd, cmd)
 
         # finally add all flow data to the internal data storage
         self.full_lb_data[(src_vnf_name, src_vnf_interface)] = data
@@ -828,6 +832,7 @@ class OpenstackManage(object):
 
             if isinstance(path, dict):
                 self.delete_flow_by_cookie(cookie)
+                self._release_vlans(self.floating_vlans.pop(cookie, []))
                 raise Exception(
                     u"Can not find a valid path. Are you specifying the right interfaces?.")
 
@@ -837,7 +842,8 @@ class OpenstackManage(object):
             dst_sw_outport_nr = dest_vnf_outport_nrs[index]
             current_hop = src_sw
             switch_inport_nr = src_sw_inport_nr
-            vlan = net.vlans.pop()
+            vlan = net.vlans.allocate()
+            self.floating_vlans.setdefault(cookie, list()).append(vlan)
 
             # iterate all switches on the path
             for i in range(0, len(path)):
@@ -927,8 +933,8 @@ class OpenstackManage(object):
                 logging.debug(cmd)
                 cmd = "\"%s\"" % cmd
                 cmd_back = "\"%s\"" % cmd_back
-                net[current_hop].dpctl(main_cmd, cmd)
-                net[current_hop].dpctl(main_cmd, cmd_back)
+                self._add_flow(current_hop, main_cmd, cmd)
+                self._add_flow(current_hop, main_cmd, cmd_back)
 
                 # set next hop for the next iteration step
                 if isinstance(next_node, OVSSwitch):
@@ -956,7 +962,7 @@ class OpenstackManage(object):
 
         # actually add the flow
         logging.debug("Switch: %s, CMD: %s" % (src_sw, cmd))
-        net[src_sw].dpctl(main_cmd, cmd)
+        self._add_flow(src_sw, main_cmd, cmd)
 
         self.floating_cookies[cookie] = floating_ip
 
@@ -1009,10 +1015,24 @@ class OpenstackManage(object):
         cmd += ',load:0x%s->NXM_OF_ARP_SPA[]' % dst_ip_hex
         # output to incoming port remember the closing "
         cmd += ',IN_PORT"'
-        self.net[switch].dpctl(main_cmd, cmd)
+        self._add_flow(switch, main_cmd, cmd)
         logging.debug(
             "Set up ARP reply at %s port %s." % (switch, port_nr))
 
+    def _add_flow(self, switch, main_cmd, cmd):
+        """
+        Adds a flow entry with ovs-ofctl and records it in the shadow flow table of the network.
+
+        :param switch: Name of the switch
+        :type switch: ``str``
+        :param main_cmd: ovs-ofctl command and options, e.g. 'add-flow -OOpenFlow13'
+        :type main_cmd: ``str``
+        :param cmd: The (quoted) flow entry
+        :type cmd: ``str``
+        """
+        self.net[switch].dpctl(main_cmd, cmd)
+        self.net.flow_table.add_ofctl(switch, cmd)
+
     def delete_flow_by_cookie(self, cookie):
         """
         Removes a flow identified by the cookie
@@ -1025,20 +1045,8 @@ class OpenstackManage(object):
         if not cookie:
             return False
         logging.debug("Deleting flow by cookie %d" % (cookie))
-        flows = list()
-        # we have to call delete-group for each switch
-        for node in self.net.switches:
-            flow = dict()
-            flow["dpid"] = int(node.dpid, 16)
-            flow["cookie"] = cookie
-            flow['cookie_mask'] = int('0xffffffffffffffff', 16)
-
-            flows.append(flow)
-        for flow in flows:
-            logging.debug("Deleting flowentry with cookie %d" % (
-                flow["cookie"]))
-            if self.net.controller == RemoteController:
-                self.net.ryu_REST('stats/flowentry/delete', data=flow)
+        # only the switches that hold flows with this cookie are touched
+        self.net.deleteFlowsByCookie(cookie)
 
         self.cookies.remove(cookie)
         return True
@@ -1085,29 +1093,19 @@ class OpenstackManage(object):
         :param src_vnf_name: Name of the source VNF
         :param src_vnf_interface: Name of the destination VNF
         '''
-        flows = list()
         # we have to call delete-group for each switch
         delete_group = list()
         group_id = self.get_flow_group(vnf_src_name, vnf_src_interface)
         for node in self.net.switches:
-            for cookie in self.lb_flow_cookies[(
-                    vnf_src_name, vnf_src_interface)]:
-                flow = dict()
-                flow["dpid"] = int(node.dpid, 16)
-                flow["cookie"] = cookie
-                flow['cookie_mask'] = int('0xffffffffffffffff', 16)
-
-                flows.append(flow)
             group_del = dict()
             group_del["dpid"] = int(node.dpid, 16)
             group_del["group_id"] = group_id
             delete_group.append(group_del)
 
-        for flow in flows:
+        for cookie in self.lb_flow_cookies[(vnf_src_name, vnf_src_interface)]:
             logging.debug("Deleting flowentry with cookie %d belonging to lb at %s:%s" % (
-                flow["cookie"], vnf_src_name, vnf_src_interface))
-            if self.net.controller == RemoteController:
-                self.net.ryu_REST('stats/flowentry/delete', data=flow)
+                cookie, vnf_src_name, vnf_src_interface))
+            self.net.deleteFlowsByCookie(cookie)
 
         logging.debug("Deleting group with id %s" % group_id)
         for switch_del_group in delete_group:
@@ -1121,6 +1119,8 @@ class OpenstackManage(object):
             del self.flow_groups[target_pair]
         if target_pair in self.full_lb_data:
             del self.full_lb_data[target_pair]
+        # the VLAN tags of the paths can be used again
+        self._release_vlans(self.lb_vlans.pop(target_pair, []))
 
     def delete_floating_lb(self, cookie):
         """
@@ -1135,9 +1135,17 @@ class OpenstackManage(object):
                 "Can not delete floating loadbalancer as the flowcookie is not known")
 
         self.delete_flow_by_cookie(cookie)
+        self._release_vlans(self.floating_vlans.pop(cookie, []))
         floating_ip = self.floating_cookies[cookie]
         self.floating_network.withdraw_ip_address(floating_ip)
 
+    def _release_vlans(self, vlans):
+        """
+        Give the VLAN tags of a deleted load balancer back to the pool.
+        """
+        for vlan in vlans:
+            self.net.vlans.release(vlan)
+
     def set_arp_entry(self, vnf_name, vnf_interface, ip, mac):
         """
         Sets an arp entry on the specified VNF. This is done on the node directly and not by open vswitch!
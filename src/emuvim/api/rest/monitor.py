@@ -44,6 +44,8 @@ class MonitorInterfaceAction(Resource):
     :param vnf_name: name of the VNF to be monitored
     :param vnf_interface: name of the VNF interface to be monitored
     :param metric: tx_bytes, rx_bytes, tx_packets, rx_packets
+    :param interval: polling interval in seconds (default: 1)
+    :param adaptive: poll less often while the counter does not change
     :return: message string indicating if the monitor action is succesful or not
     """
     global net
@@ -58,14 +60,18 @@ class MonitorInterfaceAction(Resource):
         vnf_interface = data.get("vnf_interface", None)
         metric = data.get("metric", 'tx_packets')
         cookie = data.get("cookie")
+        interval = data.get("interval")
+        adaptive = str(data.get("adaptive", False)).lower() == 'true'
 
         try:
             if cookie:
                 c = net.monitor_agent.setup_flow(
-                    vnf_name, vnf_interface, metric, cookie)
+                    vnf_name, vnf_interface, metric, cookie,
+                    interval=interval, adaptive=adaptive)
             else:
                 c = net.monitor_agent.setup_metric(
-                    vnf_name, vnf_interface, metric)
+                    vnf_name, vnf_interface, metric,
+                    interval=interval, adaptive=adaptive)
             # return monitor message response
             return str(c), 200, CORS_HEADER
         except Exception as ex:
@@ -104,6 +110,8 @@ class MonitorFlowAction(Resource):
     :param vnf_interface: name of the VNF interface to be monitored
     :param metric: tx_bytes, rx_bytes, tx_packets, rx_packets
     :param cookie: specific identifier of flows to monitor
+    :param interval: polling interval in seconds (default: 1)
+    :param adaptive: poll less often while the counter does not change
     :return: message string indicating if the monitor action is succesful or not
     """
     global net
@@ -118,10 +126,13 @@ class MonitorFlowAction(Resource):
         vnf_interface = data.get("vnf_interface", None)
         metric = data.get("metric", 'tx_packets')
         cookie = data.get("cookie", 0)
+        interval = data.get("interval")
+        adaptive = str(data.get("adaptive", False)).lower() == 'true'
 
         try:
             c = net.monitor_agent.setup_flow(
-                vnf_name, vnf_interface, metric, cookie)
+                vnf_name, vnf_interface, metric, cookie,
+                interval=interval, adaptive=adaptive)
             # return monitor message response
             return str(c), 200, CORS_HEADER
         except Exception as ex:
@@ -310,6 +321,84 @@ class MonitorSkewAction(Resource):
             return ex.message, 500, CORS_HEADER
 
 
+class MonitorRateAction(Resource):
+    """
+    Get the current rate and the recent rate history of the monitored
+    VNF interfaces and flows
+    :param vnf_name: name of the monitored VNF (all if None)
+    :param vnf_interface: name of the monitored VNF interface (all if None)
+    :param metric: tx_bytes, rx_bytes, tx_packets, rx_packets (all if None)
+    :param cookie: cookie of the monitored flow (all if None)
+    :param seconds: only return the history of the last seconds (complete history if None)
+    :return: list of rates in packets or bytes per second
+    """
+    global net
+
+    def get(self):
+        logging.debug("REST CALL: get monitored rates")
+        # get URL parameters
+        data = request.args
+        if data is None:
+            data = {}
+        seconds = data.get("seconds")
+
+        try:
+            c = net.monitor_agent.get_rates(
+                vnf_name=data.get("vnf_name"),
+                vnf_interface=data.get("vnf_interface"),
+                metric=data.get("metric"),
+                cookie=data.get("cookie"),
+                seconds=float(seconds) if seconds else None)
+            return c, 200, CORS_HEADER
+        except Exception as ex:
+            logging.exception("API error.")
+            return ex.message, 500, CORS_HEADER
+
+
+class MonitorUtilizationAction(Resource):
+    """
+    Monitor the traffic and bandwidth utilization of all links between
+    switches (e.g. between data centers)
+    :param interval: polling interval in seconds (default: 1)
+    :return: list of the monitored links (get) or message string indicating if the monitor action is succesful or not
+    """
+    global net
+
+    def put(self):
+        logging.debug("REST CALL: start link utilization monitoring")
+        # get URL parameters
+        data = request.args
+        if data is None:
+            data = {}
+
+        try:
+            c = net.monitor_agent.setup_link_monitoring(
+                interval=data.get("interval"))
+            # return monitor message response
+            return str(c), 200, CORS_HEADER
+        except Exception as ex:
+            logging.exception("API error.")
+            return ex.message, 500, CORS_HEADER
+
+    def delete(self):
+        logging.debug("REST CALL: stop link utilization monitoring")
+        try:
+            c = net.monitor_agent.stop_link_monitoring()
+            # return monitor message response
+            return str(c), 200, CORS_HEADER
+        except Exception as ex:
+            logging.exception("API error.")
+            return ex.message, 500, CORS_HEADER
+
+    def get(self):
+        logging.debug("REST CALL: get link utilization")
+        try:
+            return net.monitor_agent.get_link_utilization(), 200, CORS_HEADER
+        except Exception as ex:
+            logging.exception("API error.")
+            return ex.message, 500, CORS_HEADER
+
+
 class MonitorTerminal(Resource):
     """
     start a terminal for the selected VNFs
@@ -43,12 +43,15 @@ net = None
 
 class NetworkAction(Resource):
     """
-    Add or remove chains between VNFs. These chain links are implemented as flow entries in the networks' SDN switches.
+    Add, remove or list chains between VNFs. These chain links are implemented as flow entries in the networks' SDN switches.
     :param vnf_src_name: VNF name of the source of the link
     :param vnf_dst_name: VNF name of the destination of the link
     :param vnf_src_interface: VNF interface name of the source of the link
     :param vnf_dst_interface: VNF interface name of the destination of the link
     :param weight: weight of the link (can be useful for routing calculations)
+    :param objective: routing objective: 'min_hops', 'min_delay' or 'max_bw'
+    :param bw: bandwidth in Mbit/s reserved for the chain
+    :param ecmp: selection among equal cost paths and parallel links: 'hash' or 'least_loaded'
     :param match: OpenFlow match format of the flow entry
     :param bidirectional: boolean value if the link needs to be implemented from src to dst and back
     :param cookie: cookie value, identifier of the flow entry to be installed.
@@ -61,6 +64,14 @@ class NetworkAction(Resource):
 
     global net
 
+    def get(self):
+        logging.debug("REST CALL: network chain list")
+        try:
+            return net.listChains(), 200, CORS_HEADER
+        except Exception as ex:
+            logging.exception("API error.")
+            return ex.message, 500, CORS_HEADER
+
     def put(self):
         logging.debug("REST CALL: network chain add")
         command = 'add-flow'
@@ -90,6 +101,9 @@ class NetworkAction(Resource):
             vnf_src_interface = data.get("vnf_src_interface")
             vnf_dst_interface = data.get("vnf_dst_interface")
             weight = data.get("weight")
+            objective = data.get("objective")
+            bw = data.get("bw")
+            ecmp = data.get("ecmp")
             match = data.get("match")
             bidirectional = data.get("bidirectional")
             cookie = data.get("cookie")
@@ -104,6 +118,9 @@ class NetworkAction(Resource):
                 vnf_dst_interface=vnf_dst_interface,
                 cmd=command,
                 weight=weight,
+                objective=objective,
+                bw=bw,
+                ecmp=ecmp,
                 match=match,
                 bidirectional=bidirectional,
                 cookie=cookie,
@@ -134,13 +151,26 @@ class DrawD3jsgraph(Resource):
             node_dict = {"name": node_name, "group": type}
             nodes.append(node_dict)
 
+        # utilization of the monitored inter-switch links, the highest
+        # one of parallel links
+        utilization = {}
+        if net.monitor_agent is not None:
+            for link in net.monitor_agent.get_link_utilization():
+                if link['utilization'] is None:
+                    continue
+                key = (link['src'], link['dst'])
+                utilization[key] = max(
+                    utilization.get(key, 0.0), link['utilization'])
+
         # add links between other DCs
         for node1_name in net.DCNetwork_graph.nodes():
             node1_index = nodes2.index(node1_name)
             for node2_name in net.DCNetwork_graph.neighbors(node1_name):
                 node2_index = nodes2.index(node2_name)
                 edge_dict = {"source": node1_index,
-                             "target": node2_index, "value": 10}
+                             "target": node2_index, "value": 10,
+                             "utilization": utilization.get(
+                                 (node1_name, node2_name))}
                 links.append(edge_dict)
 
         json = {"nodes": nodes, "links": links}
@@ -39,7 +39,8 @@ import network
 from network import NetworkAction, DrawD3jsgraph
 
 import monitor
-from monitor import MonitorInterfaceAction, MonitorFlowAction, MonitorLinkAction, MonitorSkewAction, MonitorTerminal
+from monitor import MonitorInterfaceAction, MonitorFlowAction, MonitorLinkAction, MonitorSkewAction, MonitorTerminal, \
+    MonitorRateAction, MonitorUtilizationAction
 
 import pkg_resources
 from os import path
@@ -110,6 +111,13 @@ class RestApiEndpoint(object):
         # the skewness metric is exported
         self.api.add_resource(MonitorSkewAction,
                               "/restapi/monitor/skewness")
+        # current rate and recent rate history of the monitored interfaces
+        # and flows
+        self.api.add_resource(MonitorRateAction,
+                              "/restapi/monitor/rate")
+        # traffic and bandwidth utilization of the links between switches
+        self.api.add_resource(MonitorUtilizationAction,
+                              "/restapi/monitor/utilization")
         # start a terminal window for the specified vnfs
         self.api.add_resource(MonitorTerminal,
                               "/restapi/monitor/term")
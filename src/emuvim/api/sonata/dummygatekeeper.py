@@ -33,7 +33,7 @@ import threading
 from docker import DockerClient
 from flask import Flask, request
 import flask_restful as fr
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import pkg_resources
 from subprocess import Popen
 from random import randint
@@ -202,13 +202,13 @@ class Service(object):
         if not GK_STANDALONE_MODE:
             # self._calculate_placement(FirstDcPlacement)
             self._calculate_placement(RoundRobinDcPlacementWithSAPs)
-        # 3. start all vnfds that we have in the service (except SAPs)
-        for vnf_id in self.vnfds:
-            vnfd = self.vnfds[vnf_id]
-            vnfi = None
-            if not GK_STANDALONE_MODE:
-                vnfi = self._start_vnfd(vnfd, vnf_id)
-            self.instances[instance_uuid]["vnf_instances"].append(vnfi)
+        # 3. start all vnfds that we have in the service (except SAPs),
+        # the containers of each DC are created in parallel
+        vnfis = [None] * len(self.vnfds)
+        if not GK_STANDALONE_MODE:
+            vnfis = self._start_vnfds(
+                [(self.vnfds[vnf_id], vnf_id) for vnf_id in self.vnfds])
+        self.instances[instance_uuid]["vnf_instances"].extend(vnfis)
 
         # 4. start all SAPs in the service
         for sap in self.saps:
@@ -261,6 +261,10 @@ class Service(object):
         self._trigger_emulator_stop_scripts_in_vnfis(vnf_instances)
         time.sleep(VNF_STOP_WAIT_TIME)
 
+        # remove the E-LANs and give their VLAN tags back
+        for lan_id in self.instances[instance_uuid].get("elans", []):
+            GK.net.removeLAN(lan_id)
+
         for v in vnf_instances:
             self._stop_vnfi(v)
 
@@ -286,6 +290,63 @@ class Service(object):
         :param vnf_id: unique id of this vnf in the nsd
         :return:
         """
+        return self._start_vnfds([(vnfd, vnf_id)], **kwargs)[0]
+
+    def _start_vnfds(self, vnfds, **kwargs):
+        """
+        Start multiple VNFDs of this service, the containers of each data
+        center are started with one startComputeBatch call.
+        :param vnfds: list of (vnfd descriptor dict, unique id of the vnf in the nsd)
+        :return: list of VNF instances in the given order
+        """
+        # target_dc -> list of (compute dict, management interface names)
+        batches = OrderedDict()
+        names = list()
+        for vnfd, vnf_id in vnfds:
+            unit = self._vnfd_compute(vnfd, vnf_id, **kwargs)
+            if unit is None:
+                # no deployment unit
+                names.append(None)
+                continue
+            target_dc, compute, mgmt_intf_names = unit
+            batches.setdefault(target_dc, list()).append(
+                (compute, mgmt_intf_names))
+            names.append(compute["name"])
+
+        vnfis = dict()
+        errors = list()
+        for target_dc, batch in batches.items():
+            results = target_dc.startComputeBatch(
+                [compute for compute, _ in batch])
+            for (compute, mgmt_intf_names), result in zip(batch, results):
+                if result["error"] is not None:
+                    errors.append("%s: %s" % (compute["name"], result["error"]))
+                    continue
+                vnfi = result["compute"]
+                # rename the docker0 interfaces (eth0) to the management port name
+                # defined in the VNFD
+                if USE_DOCKER_MGMT:
+                    for intf_name in mgmt_intf_names:
+                        self._vnf_reconfigure_network(
+                            vnfi, 'eth0', new_name=intf_name)
+                vnfis[compute["name"]] = vnfi
+        if len(errors) > 0:
+            # do not leave the containers of a partly started service behind
+            for vnfi in vnfis.values():
+                try:
+                    self._stop_vnfi(vnfi)
+                except Exception:
+                    LOG.exception("Could not stop %r." % vnfi.name)
+            raise Exception("Could not start VNFs: %s" % "; ".join(errors))
+        return [vnfis.get(name) for name in names]
+
+    def _vnfd_compute(self, vnfd, vnf_id, **kwargs):
+        """
+        Prepare the arguments of the container of a VNFD (first deployment
+        unit).
+        :return: target_dc, startCompute arguments, management interface names
+                 (None if the VNFD has no deployment unit)
+        """
         # the vnf_name refers to the container image to be deployed
         vnf_name = vnfd.get("name")
 
@@ -364,7 +425,8 @@ class Service(object):
 
             volumes.append(docker_log_path + ":/mnt/share/")
 
-            # 5. do the dc.startCompute(name="foobar") call to run the container
+            # 5. collect the arguments of the dc.startCompute(name="foobar")
+            # call to run the container
             # TODO consider flavors, and other annotations
             # TODO: get all vnf id's from the nsd for this vnfd and use those as dockername
             # use the vnf_id in the nsd as docker name
@@ -372,8 +434,8 @@ class Service(object):
             LOG.info("Starting %r as %r in DC %r" %
                      (vnf_name, vnf_id, vnfd.get("dc")))
             LOG.debug("Interfaces for %r: %r" % (vnf_id, intfs))
-            vnfi = target_dc.startCompute(
-                vnf_id,
+            compute = dict(
+                name=vnf_id,
                 network=intfs,
                 image=docker_name,
                 flavor_name="small",
@@ -383,15 +445,7 @@ class Service(object):
                 mem_limit=mem_lim,
                 volumes=volumes,
                 type=kwargs.get('type', 'docker'))
-
-            # rename the docker0 interfaces (eth0) to the management port name
-            # defined in the VNFD
-            if USE_DOCKER_MGMT:
-                for intf_name in mgmt_intf_names:
-                    self._vnf_reconfigure_network(
-                        vnfi, 'eth0', new_name=intf_name)
-
-            return vnfi
+            return target_dc, compute, mgmt_intf_names
 
     def _stop_vnfi(self, vnfi):
         """
@@ -765,7 +819,9 @@ class Service(object):
                         {'name': src_docker_name, 'interface': intf_name})
 
             # install the VLAN tags for this E-LAN
-            GK.net.setLAN(elan_vnf_list)
+            lan_id = GK.net.setLAN(elan_vnf_list)
+            self.instances[instance_uuid].setdefault(
+                "elans", []).append(lan_id)
 
     def _load_docker_files(self):
         """
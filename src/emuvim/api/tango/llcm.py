@@ -46,6 +46,7 @@ from subprocess import Popen
 import ipaddress
 import copy
 import time
+from collections import OrderedDict
 
 
 LOG = logging.getLogger("5gtango.llcm")
@@ -214,13 +215,13 @@ class Service(object):
         self._instance_counter += 1
 
         # 3. start all vnfds that we have in the service
-        for vnf_id in self.vnfds:
-            vnfd = self.vnfds[vnf_id]
-            # attention: returns a list of started deployment units
-            vnfis = self._start_vnfd(
-                vnfd, vnf_id, self.instances[instance_uuid]["ssiid"])
-            # add list of VNFIs to total VNFI list
-            self.instances[instance_uuid]["vnf_instances"].extend(vnfis)
+        # (the containers of each DC are created in parallel)
+        # attention: returns a list of started deployment units
+        vnfis = self._start_vnfds(
+            [(self.vnfds[vnf_id], vnf_id) for vnf_id in self.vnfds],
+            self.instances[instance_uuid]["ssiid"])
+        # add list of VNFIs to total VNFI list
+        self.instances[instance_uuid]["vnf_instances"].extend(vnfis)
 
         # 4. Deploy E-Line, E-Tree and E-LAN links
         # Attention: Only done if ""forwarding_graphs" section in NSD exists,
@@ -260,6 +261,9 @@ class Service(object):
         # completion
         self._trigger_emulator_stop_scripts_in_vnfis(vnf_instances)
         time.sleep(VNF_STOP_WAIT_TIME)
+        # remove the E-LANs and give their VLAN tags back
+        for lan_id in self.instances[instance_uuid].get("elans", []):
+            GK.net.removeLAN(lan_id)
         # stop all vnfs
         for v in vnf_instances:
             self._stop_vnfi(v)
@@ -325,7 +329,60 @@ class Service(object):
         :param vnf_id: unique id of this vnf in the nsd
         :return:
         """
-        vnfis = list()
+        return self._start_vnfds([(vnfd, vnf_id)], ssiid, **kwargs)
+
+    def _start_vnfds(self, vnfds, ssiid, **kwargs):
+        """
+        Start multiple VNFDs of this service. The deployment units are
+        placed one after the other, then the containers of each data
+        center are started with one startComputeBatch call.
+        :param vnfds: list of (vnfd descriptor dict, unique id of the vnf in the nsd)
+        :return: list of started deployment units (VNFIs)
+        """
+        # target_dc -> list of (compute dict, vnfd, vnf_container_name)
+        batches = OrderedDict()
+        units = list()
+        for vnfd, vnf_id in vnfds:
+            units.extend(self._vnfd_computes(vnfd, vnf_id, ssiid, **kwargs))
+        for target_dc, compute, vnfd, vnf_container_name in units:
+            batches.setdefault(target_dc, list()).append(
+                (compute, vnfd, vnf_container_name))
+
+        vnfis = dict()
+        errors = list()
+        for target_dc, batch in batches.items():
+            results = target_dc.startComputeBatch(
+                [compute for compute, _, _ in batch])
+            for (compute, vnfd, vnf_container_name), result in zip(batch, results):
+                if result["error"] is not None:
+                    errors.append("%s: %s" % (compute["name"], result["error"]))
+                    continue
+                vnfi = result["compute"]
+                # add vnfd reference to vnfi
+                vnfi.vnfd = vnfd
+                # add container name
+                vnfi.vnf_container_name = vnf_container_name
+                vnfi.vnf_container_instance_name = compute["name"]
+                vnfi.ssiid = ssiid
+                vnfis[compute["name"]] = vnfi
+        if len(errors) > 0:
+            # do not leave the containers of a partly started service behind
+            for vnfi in vnfis.values():
+                try:
+                    self._stop_vnfi(vnfi)
+                except Exception:
+                    LOG.exception("Could not stop %r." % vnfi.name)
+            raise Exception("Could not start VNFs: %s" % "; ".join(errors))
+        # in the order of the VNFDs and their deployment units
+        return [vnfis[compute["name"]] for _, compute, _, _ in units]
+
+    def _vnfd_computes(self, vnfd, vnf_id, ssiid, **kwargs):
+        """
+        Place the deployment units of a VNFD and prepare the arguments of
+        their containers.
+        :return: list of (target_dc, startCompute arguments, vnfd, vnf_container_name)
+        """
+        computes = list()
         # the vnf_name refers to the container image to be deployed
         vnf_name = vnfd.get("name")
         # combine VDUs and CDUs
@@ -400,13 +457,12 @@ class Service(object):
             conf_envs = self._load_instance_conf_envs(vnf_container_instance_name)
             cenv.update(conf_envs)
 
-            # 6. Start the container
+            # 6. collect the arguments to start the container
             LOG.info("Starting %r as %r in DC %r" %
                      (vnf_name, vnf_container_instance_name, target_dc))
             LOG.debug("Interfaces for %r: %r" % (vnf_id, intfs))
-            # start the container
-            vnfi = target_dc.startCompute(
-                vnf_container_instance_name,
+            compute = dict(
+                name=vnf_container_instance_name,
                 network=intfs,
                 image=docker_image_name,
                 cpu_quota=cpu_quota,
@@ -420,15 +476,8 @@ class Service(object):
                 # only publish if explicitly stated in descriptor
                 publish_all_ports=False,
                 type=kwargs.get('type', 'docker'))
-            # add vnfd reference to vnfi
-            vnfi.vnfd = vnfd
-            # add container name
-            vnfi.vnf_container_name = vnf_container_name
-            vnfi.vnf_container_instance_name = vnf_container_instance_name
-            vnfi.ssiid = ssiid
-            # store vnfi
-            vnfis.append(vnfi)
-        return vnfis
+            computes.append((target_dc, compute, vnfd, vnf_container_name))
+        return computes
 
     def _stop_vnfi(self, vnfi):
         """
@@ -746,7 +795,9 @@ class Service(object):
                         elan_vnf_list.append(
                             {'name': container_name, 'interface': intf_name})
             # install the VLAN tags for this E-LAN
-            GK.net.setLAN(elan_vnf_list)
+            lan_id = GK.net.setLAN(elan_vnf_list)
+            self.instances[instance_uuid].setdefault(
+                "elans", []).append(lan_id)
 
     def _load_docker_files(self):
         """
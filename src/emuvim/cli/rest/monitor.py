@@ -23,7 +23,7 @@
 # the Horizon 2020 and 5G-PPP programmes. The authors would like to
 # acknowledge the contributions of their colleagues of the SONATA
 # partner consortium (www.sonata-nfv.eu).
-from requests import get, put
+from requests import get, put, delete
 import pprint
 import argparse
 from emuvim.cli import prometheus
@@ -48,7 +48,9 @@ class RestApiClient():
         params = self._create_dict(
             vnf_name=self._parse_vnf_name(args.get("vnf_name")),
             vnf_interface=self._parse_vnf_interface(args.get("vnf_name")),
-            metric=args.get("metric"))
+            metric=args.get("metric"),
+            interval=args.get("interval"),
+            adaptive=args.get("adaptive"))
 
         url = "{0}/restapi/monitor/interface".format(args.get("endpoint"))
         response = put(url, params=params)
@@ -69,7 +71,9 @@ class RestApiClient():
             vnf_name=self._parse_vnf_name(args.get("vnf_name")),
             vnf_interface=self._parse_vnf_interface(args.get("vnf_name")),
             metric=args.get("metric"),
-            cookie=args.get("cookie"))
+            cookie=args.get("cookie"),
+            interval=args.get("interval"),
+            adaptive=args.get("adaptive"))
 
         url = "{0}/restapi/monitor/flow".format(args.get("endpoint"))
         response = put(url, params=params)
@@ -86,6 +90,36 @@ class RestApiClient():
         response = put(url, params=params)
         pp.pprint(response.text)
 
+    def rate(self, args):
+        vnf_name = args.get("vnf_name")
+        params = self._create_dict(
+            vnf_name=self._parse_vnf_name(vnf_name) if vnf_name else None,
+            vnf_interface=self._parse_vnf_interface(vnf_name) if vnf_name else None,
+            metric=args.get("metric"),
+            cookie=args.get("cookie"),
+            seconds=args.get("seconds"))
+
+        url = "{0}/restapi/monitor/rate".format(args.get("endpoint"))
+        response = get(url, params=params)
+        pp.pprint(response.json())
+
+    def setup_links(self, args):
+        params = self._create_dict(interval=args.get("interval"))
+
+        url = "{0}/restapi/monitor/utilization".format(args.get("endpoint"))
+        response = put(url, params=params)
+        pp.pprint(response.text)
+
+    def stop_links(self, args):
+        url = "{0}/restapi/monitor/utilization".format(args.get("endpoint"))
+        response = delete(url)
+        pp.pprint(response.text)
+
+    def utilization(self, args):
+        url = "{0}/restapi/monitor/utilization".format(args.get("endpoint"))
+        response = get(url)
+        pp.pprint(response.json())
+
     def prometheus(self, args):
         # This functions makes it more user-friendly to create the correct prometheus query
         # <uuid> is replaced by the correct uuid of the deployed vnf container
@@ -122,8 +156,9 @@ parser = argparse.ArgumentParser(description='son-emu-cli monitor')
 parser.add_argument(
     "command",
     choices=['setup_metric', 'stop_metric',
-             'setup_flow', 'stop_flow', 'prometheus'],
-    help="setup/stop a metric/flow to be monitored or query Prometheus")
+             'setup_flow', 'stop_flow', 'rate',
+             'setup_links', 'stop_links', 'utilization', 'prometheus'],
+    help="setup/stop a metric/flow/the inter-switch links to be monitored, show the monitored rates/link utilization or query Prometheus")
 parser.add_argument(
     "--vnf_name", "-vnf", dest="vnf_name",
     help="vnf name:interface to be monitored")
@@ -133,6 +168,15 @@ parser.add_argument(
 parser.add_argument(
     "--cookie", "-c", dest="cookie",
     help="flow cookie to monitor")
+parser.add_argument(
+    "--interval", "-i", dest="interval",
+    help="polling interval of the metric/flow in seconds (default: 1)")
+parser.add_argument(
+    "--adaptive", "-a", dest="adaptive", action='store_true',
+    help="poll less often while the counter does not change")
+parser.add_argument(
+    "--seconds", "-s", dest="seconds",
+    help="rate history of the last seconds to show (default: all)")
 parser.add_argument(
     "--query", "-q", dest="query",
     help="prometheus query")
@@ -23,7 +23,8 @@
 # the Horizon 2020 and 5G-PPP programmes. The authors would like to
 # acknowledge the contributions of their colleagues of the SONATA
 # partner consortium (www.sonata-nfv.eu).
-from requests import put, delete
+from requests import get, put, delete
+from tabulate import tabulate
 import argparse
 
 
@@ -47,6 +48,9 @@ class RestApiClient():
             vnf_dst_interface=self._parse_vnf_interface(
                 args.get("destination")),
             weight=args.get("weight"),
+            objective=args.get("objective"),
+            bw=args.get("bw"),
+            ecmp=args.get("ecmp"),
             match=args.get("match"),
             bidirectional=args.get("bidirectional"),
             cookie=args.get("cookie"),
@@ -73,6 +77,20 @@ class RestApiClient():
                           params=params)
         print(self._nice_print(response.text))
 
+    def list(self, args):
+        chains = get("{0}/restapi/network".format(args.get("endpoint"))).json()
+        table = []
+        for c in chains:
+            table.append(["{0}:{1}".format(c.get("vnf_src_name"), c.get("vnf_src_interface")),
+                          "{0}:{1}".format(c.get("vnf_dst_name"), c.get("vnf_dst_interface")),
+                          c.get("cookie"),
+                          c.get("vlan"),
+                          " -> ".join(c.get("path") or []),
+                          c.get("delay_us")])
+        headers = ["Source", "Destination", "Cookie", "VLAN", "Path",
+                   "Delay (us)"]
+        print(tabulate(table, headers=headers, tablefmt="grid"))
+
     def _parse_vnf_name(self, vnf_name_str):
         vnf_name = vnf_name_str.split(':')[0]
         return vnf_name
@@ -99,7 +117,7 @@ class RestApiClient():
 parser = argparse.ArgumentParser(description='son-emu-cli network')
 parser.add_argument(
     "command",
-    choices=['add', 'remove'],
+    choices=['add', 'remove', 'list'],
     help="Action to be executed.")
 parser.add_argument(
     "--datacenter", "-d", dest="datacenter",
@@ -113,6 +131,17 @@ parser.add_argument(
 parser.add_argument(
     "--weight", "-w", dest="weight",
     help="weight edge attribute to calculate the path")
+parser.add_argument(
+    "--objective", "-o", dest="objective",
+    choices=['min_hops', 'min_delay', 'max_bw'],
+    help="routing objective to calculate the path")
+parser.add_argument(
+    "--bw", dest="bw",
+    help="bandwidth (Mbit/s) to reserve for the chain on its path")
+parser.add_argument(
+    "--ecmp", dest="ecmp",
+    choices=['hash', 'least_loaded'],
+    help="spread chains over equal cost paths and parallel links")
 parser.add_argument(
     "--priority", "-p", dest="priority", default="1000",
     help="priority of flow rule")
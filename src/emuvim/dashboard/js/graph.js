@@ -67,10 +67,18 @@ d3.json("/restapi/network/d3jsgraph", function(error, json) {
       .links(json.links)
       .start();
 
+  // heatmap of the link utilization (only if links are monitored)
+  var heat = d3.scale.linear()
+      .domain([0, 0.5, 1])
+      .range(["#2ca02c", "#ff7f0e", "#d62728"])
+      .clamp(true);
+
   var link = svg.selectAll(".link")
       .data(json.links)
       .enter().append("line")
-      .attr("class", "link");
+      .attr("class", "link")
+      .style("stroke", function(d) {
+        return d.utilization == null ? null : heat(d.utilization); });
 
   var node = svg.selectAll(".node")
       .data(json.nodes)
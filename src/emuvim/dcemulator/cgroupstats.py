@@ -0,0 +1,205 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Reads the CPU, memory and block I/O accounting of the emulated
+containers from their cgroups (v1 and v2), so that the monitoring agent
+can export these metrics without a cAdvisor container.
+"""
+import os
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+PROC_ROOT = '/proc'
+
+# cgroup v1 reports 'no limit' as a huge page aligned number
+CGROUP_V1_NO_LIMIT = 2 ** 62
+
+# exported metrics, all values are totals since container start except
+# the memory values
+CGROUP_METRICS = ('cpu_seconds', 'memory_bytes', 'memory_limit_bytes',
+                  'blkio_read_bytes', 'blkio_write_bytes')
+
+
+def parse_proc_cgroup(text):
+    """
+    Parse /proc/<pid>/cgroup.
+    :return: dict {controller: cgroup path}, the cgroup v2 (unified)
+             hierarchy has the controller ''
+    """
+    paths = {}
+    for line in text.splitlines():
+        parts = line.strip().split(':', 2)
+        if len(parts) != 3:
+            continue
+        controllers = parts[1].split(',') if parts[1] else ['']
+        for controller in controllers:
+            paths[controller] = parts[2]
+    return paths
+
+
+def parse_flat_keyed(text):
+    """
+    Parse a 'key value' per line cgroup file, e.g. cpu.stat.
+    """
+    values = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            values[parts[0]] = int(parts[1])
+    return values
+
+
+def parse_blkio_v1(text):
+    """
+    Sum the read and write bytes of all devices in
+    blkio.throttle.io_service_bytes ('<major>:<minor> Read <bytes>').
+    :return: (read bytes, write bytes)
+    """
+    read = write = 0
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) != 3:
+            continue
+        if parts[1] == 'Read':
+            read += int(parts[2])
+        elif parts[1] == 'Write':
+            write += int(parts[2])
+    return read, write
+
+
+def parse_io_stat_v2(text):
+    """
+    Sum the read and write bytes of all devices in io.stat
+    ('<major>:<minor> rbytes=<bytes> wbytes=<bytes> ...').
+    :return: (read bytes, write bytes)
+    """
+    read = write = 0
+    for line in text.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key == 'rbytes':
+                read += int(value)
+            elif key == 'wbytes':
+                write += int(value)
+    return read, write
+
+
+class CgroupReader(object):
+    """
+    Reads the resource usage of a process' cgroups. The cgroups are
+    looked up in /proc/<pid>/cgroup, so this works with the cgroupfs and
+    the systemd cgroup driver of Docker.
+    """
+
+    def __init__(self, root=CGROUP_ROOT, proc=PROC_ROOT):
+        self.root = root
+        self.proc = proc
+        # cgroup v2 only (no hybrid setup)
+        self.unified = os.path.exists(
+            os.path.join(root, 'cgroup.controllers'))
+        # mounted cgroup v1 hierarchies
+        try:
+            self.mounts = os.listdir(root)
+        except OSError:
+            self.mounts = []
+
+    def stats(self, pid):
+        """
+        Return the resource usage of the cgroups of a process.
+        :param pid: (host) pid of the main process of a container
+        :return: dict {metric: value} with the metrics of CGROUP_METRICS
+                 that are available on this host (memory_limit_bytes is
+                 None if not limited)
+        """
+        paths = parse_proc_cgroup(
+            self._read(os.path.join(self.proc, str(pid), 'cgroup')))
+        if self.unified:
+            return self._stats_v2(paths.get('', '/'))
+        return self._stats_v1(paths)
+
+    def _stats_v1(self, paths):
+        stats = {}
+        cpu = self._file_v1(paths, 'cpuacct', 'cpuacct.usage')
+        if cpu is not None:
+            stats['cpu_seconds'] = int(cpu) / 1e9
+        memory = self._file_v1(paths, 'memory', 'memory.usage_in_bytes')
+        if memory is not None:
+            stats['memory_bytes'] = int(memory)
+        limit = self._file_v1(paths, 'memory', 'memory.limit_in_bytes')
+        if limit is not None:
+            limit = int(limit)
+            stats['memory_limit_bytes'] = \
+                limit if limit < CGROUP_V1_NO_LIMIT else None
+        blkio = self._file_v1(
+            paths, 'blkio', 'blkio.throttle.io_service_bytes')
+        if blkio is not None:
+            stats['blkio_read_bytes'], stats['blkio_write_bytes'] = \
+                parse_blkio_v1(blkio)
+        return stats
+
+    def _stats_v2(self, path):
+        stats = {}
+        cpu = self._file(path, 'cpu.stat')
+        if cpu is not None:
+            usage = parse_flat_keyed(cpu).get('usage_usec')
+            if usage is not None:
+                stats['cpu_seconds'] = usage / 1e6
+        memory = self._file(path, 'memory.current')
+        if memory is not None:
+            stats['memory_bytes'] = int(memory)
+        limit = self._file(path, 'memory.max')
+        if limit is not None:
+            stats['memory_limit_bytes'] = \
+                None if limit.strip() == 'max' else int(limit)
+        io = self._file(path, 'io.stat')
+        if io is not None:
+            stats['blkio_read_bytes'], stats['blkio_write_bytes'] = \
+                parse_io_stat_v2(io)
+        return stats
+
+    def _file_v1(self, paths, controller, name):
+        path = paths.get(controller)
+        if path is None:
+            return None
+        # the hierarchy can be mounted under its own name or with the
+        # controllers it is shared with (e.g. 'cpu,cpuacct')
+        for mount in [controller] + [m for m in self.mounts
+                                     if controller in m.split(',')]:
+            value = self._file(path, name, mount)
+            if value is not None:
+                return value
+        return None
+
+    def _file(self, path, name, mount=''):
+        file_path = os.path.join(
+            self.root, mount, path.lstrip('/'), name)
+        try:
+            return self._read(file_path)
+        except (IOError, OSError):
+            return None
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
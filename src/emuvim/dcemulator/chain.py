@@ -0,0 +1,158 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import logging
+from collections import OrderedDict
+
+LOG = logging.getLogger("dcemulator.chain")
+LOG.setLevel(logging.DEBUG)
+
+
+class ChainRegistry(object):
+    """
+    Keeps track of the chains installed by DCNetwork.setChain.
+
+    Chains are indexed by (vnf_src_name, vnf_src_interface, vnf_dst_name,
+    vnf_dst_interface). Several chains with different cookie/match can
+    exist for the same VNF interface pair (e.g. one per flow classifier).
+    Each chain is a dict holding (at least):
+    {vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface,
+     cookie, match, path, tag, switches, hops}
+    """
+
+    def __init__(self):
+        # (src, src_intf, dst, dst_intf) -> {(cookie, match): chain}
+        self._chains = OrderedDict()
+
+    def __len__(self):
+        return sum(len(chains) for chains in self._chains.values())
+
+    def __iter__(self):
+        for chains in list(self._chains.values()):
+            for chain in list(chains.values()):
+                yield chain
+
+    @staticmethod
+    def _cookie(cookie):
+        # cookies arrive as int or string (REST API)
+        try:
+            return int(cookie)
+        except (TypeError, ValueError):
+            return cookie
+
+    def add(self, chain):
+        """
+        Register an installed chain.
+        """
+        key = (chain['vnf_src_name'], chain['vnf_src_interface'],
+               chain['vnf_dst_name'], chain['vnf_dst_interface'])
+        variant = (self._cookie(chain.get('cookie')), chain.get('match'))
+        self._chains.setdefault(key, OrderedDict())[variant] = chain
+
+    def get(self, vnf_src_name, vnf_src_interface,
+            vnf_dst_name, vnf_dst_interface, cookie=None, match=None):
+        """
+        Return the chain of a VNF pair with the given cookie and match
+        or None.
+        """
+        chains = self._chains.get(
+            (vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface))
+        if not chains:
+            return None
+        return chains.get((self._cookie(cookie), match))
+
+    def find(self, vnf_src_name, vnf_src_interface,
+             vnf_dst_name, vnf_dst_interface):
+        """
+        Return the first chain of a VNF pair (any cookie/match) or None.
+        """
+        chains = self._chains.get(
+            (vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface))
+        if not chains:
+            return None
+        return next(iter(chains.values()))
+
+    def remove(self, vnf_src_name, vnf_src_interface,
+               vnf_dst_name, vnf_dst_interface, cookie=None):
+        """
+        Unregister the chains of a VNF pair.
+        :param cookie: only remove the chains with this cookie (all if None)
+        :return: list of removed chains
+        """
+        key = (vnf_src_name, vnf_src_interface,
+               vnf_dst_name, vnf_dst_interface)
+        chains = self._chains.get(key)
+        if not chains:
+            return []
+        cookie = self._cookie(cookie)
+        removed = [variant for variant in chains
+                   if cookie is None or variant[0] == cookie]
+        removed = [chains.pop(variant) for variant in removed]
+        if len(chains) == 0:
+            del self._chains[key]
+        return removed
+
+    def remove_vnf(self, vnf_name):
+        """
+        Unregister all chains from or to a VNF (or SAP).
+        :return: list of removed chains
+        """
+        removed = []
+        for key in [key for key in self._chains
+                    if vnf_name in (key[0], key[2])]:
+            removed.extend(self._chains.pop(key).values())
+        return removed
+
+    def discard(self, chain):
+        """
+        Unregister exactly the given chain (if registered).
+        """
+        key = (chain['vnf_src_name'], chain['vnf_src_interface'],
+               chain['vnf_dst_name'], chain['vnf_dst_interface'])
+        chains = self._chains.get(key)
+        variant = (self._cookie(chain.get('cookie')), chain.get('match'))
+        if not chains or chains.get(variant) is not chain:
+            return
+        del chains[variant]
+        if len(chains) == 0:
+            del self._chains[key]
+
+    def list(self):
+        """
+        Return a JSON serializable list of all registered chains.
+        """
+        return [{'vnf_src_name': c['vnf_src_name'],
+                 'vnf_src_interface': c['vnf_src_interface'],
+                 'vnf_dst_name': c['vnf_dst_name'],
+                 'vnf_dst_interface': c['vnf_dst_interface'],
+                 'cookie': c.get('cookie'),
+                 'match': c.get('match'),
+                 'vlan': c.get('tag'),
+                 'path': c.get('path'),
+                 'switches': c.get('switches'),
+                 'delay_us': c.get('delay_us'),
+                 'bw': c.get('bw'),
+                 'timing': c.get('timing')}
+                for c in self]
@@ -0,0 +1,134 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import logging
+from collections import OrderedDict
+from emuvim.dcemulator.flowbatch import VsctlBatch
+
+LOG = logging.getLogger("dcemulator.elan")
+LOG.setLevel(logging.DEBUG)
+
+
+class ElanManager(object):
+    """
+    Sets up and removes the E-LANs of a DCNetwork.
+
+    An E-LAN puts the DC switch ports of its member VNF interfaces into
+    the same access vlan, the switching within the E-LAN is done by the
+    learning switch. All port/tag assignments of an E-LAN are computed
+    first and then applied with one ovs-vsctl transaction per bridge.
+    Each E-LAN is a dict:
+    {id, vlan, members: [{name, interface, switch, port}]}
+    """
+
+    def __init__(self, net):
+        self.net = net
+        # E-LAN id -> E-LAN
+        self._lans = OrderedDict()
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._lans)
+
+    def add(self, vnf_list):
+        """
+        Setup an E-LAN.
+        :param vnf_list: members of the E-LAN [{name:, interface:}, ...]
+        :return: the E-LAN
+        """
+        members = []
+        for vnf in vnf_list:
+            port = self.net._get_connected_switch_port(
+                vnf['name'], vnf.get('interface'))
+            if port is None:
+                LOG.warning("E-LAN member {0}:{1} is not connected to a "
+                            "switch".format(vnf['name'], vnf.get('interface')))
+                continue
+            members.append({'name': vnf['name'],
+                            'interface': port['port_id'],
+                            'switch': port['switch'],
+                            'port': port['switch_port_name']})
+
+        # get a vlan tag for this E-LAN
+        vlan = self.net.vlans.allocate()
+        errors = self._apply(members, 'set', 'tag=%s' % vlan)
+        if errors:
+            self._apply(members, 'clear', 'tag')
+            self.net.vlans.release(vlan)
+            raise Exception("E-LAN setup failed: {0}".format(
+                '; '.join(errors)))
+
+        lan = {'id': self._next_id, 'vlan': vlan, 'members': members}
+        self._lans[lan['id']] = lan
+        self._next_id += 1
+        LOG.info("Added E-LAN {0} with vlan {1} and {2} members".format(
+            lan['id'], vlan, len(members)))
+        return lan
+
+    def remove(self, lan_id):
+        """
+        Remove an E-LAN: untag its switch ports and give its vlan tag
+        back to the pool.
+        :return: the removed E-LAN or None if it does not exist
+        """
+        lan = self._lans.pop(lan_id, None)
+        if lan is None:
+            return None
+        errors = self._apply(lan['members'], 'clear', 'tag')
+        if errors:
+            LOG.warning("Removing E-LAN {0} failed on some bridges: "
+                        "{1}".format(lan_id, '; '.join(errors)))
+        self.net.vlans.release(lan['vlan'])
+        LOG.info("Removed E-LAN {0} (vlan {1})".format(lan_id, lan['vlan']))
+        return lan
+
+    def get(self, lan_id):
+        return self._lans.get(lan_id)
+
+    def list(self):
+        """
+        Return a JSON serializable list of all E-LANs.
+        """
+        return [dict(lan, members=[dict(m) for m in lan['members']])
+                for lan in self._lans.values()]
+
+    def _apply(self, members, op, value):
+        """
+        Run the given port operation on the switch ports of all members,
+        one ovs-vsctl transaction per bridge.
+        :return: list of errors
+        """
+        batches = OrderedDict()
+        for member in members:
+            LOG.debug("E-LAN: {0} port {1} of {2} ({3}:{4})".format(
+                op, member['port'], member['switch'], member['name'],
+                member['interface']))
+            batches.setdefault(member['switch'], VsctlBatch()).add(
+                op, 'port', member['port'], value)
+        errors = []
+        for batch in batches.values():
+            batch.commit()
+            errors.extend(batch.errors)
+        return errors
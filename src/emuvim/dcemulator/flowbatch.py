@@ -0,0 +1,346 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import logging
+import time
+import requests
+from collections import OrderedDict
+from subprocess import Popen, PIPE
+from emuvim.dcemulator.ryurpc import RyuRpcError, RyuRpcReplyError
+
+LOG = logging.getLogger("dcemulator.flowbatch")
+LOG.setLevel(logging.DEBUG)
+
+# son-emu specific Ryu REST call to apply a list of flow entries at once
+# (provided by the son_emu_flow_api.py Ryu app)
+RYU_FLOW_BATCH_PREFIX = 'sonemu/flowentry/batch'
+
+# ovs-ofctl commands that read their flow entries from a file/stdin
+OFCTL_BATCH_CMDS = {'add-flow': 'add-flows', 'del-flows': 'del-flows'}
+
+# max. length of one batched ovs-vsctl command line (well below ARG_MAX)
+VSCTL_MAX_CMD_LEN = 100000
+
+
+class RyuFlowBatch(object):
+    """
+    Collects the flow entries created by one or more setChain calls
+    and sends them to the Ryu controller with a single request (RPC
+    channel if enabled, REST otherwise).
+    Falls back to one ofctl_rest request per flow entry if the son-emu
+    flow API is not loaded in the controller.
+    """
+
+    def __init__(self, net):
+        self.net = net
+        # dpid -> list of (ofctl_rest prefix, flow dict), in install order
+        self.flows = OrderedDict()
+        # chains registered while this batch was open
+        self.chains = []
+        # names of the switches on which flow entries could not be applied
+        self.failed = set()
+        # one dict per request sent by commit: {switches, flows, time}
+        self.timings = []
+
+    def __len__(self):
+        return sum(len(flows) for flows in self.flows.values())
+
+    def switches(self):
+        """
+        Names of the switches with staged flow entries.
+        """
+        return [self._name(dpid) for dpid in self.flows]
+
+    def _name(self, dpid):
+        for sw in self.net.switches:
+            if int(sw.dpid, 16) == dpid:
+                return sw.name
+        return str(dpid)
+
+    def savepoint(self):
+        """
+        Mark the current end of the staged flow entries.
+        """
+        return dict((dpid, len(flows)) for dpid, flows in self.flows.items())
+
+    def rollback(self, savepoint):
+        """
+        Drop the flow entries staged after the given savepoint.
+        """
+        _rollback(self.flows, savepoint)
+
+    def add(self, prefix, flow):
+        """
+        Stage a flow entry.
+        :param prefix: ofctl_rest call, e.g. 'stats/flowentry/add'
+        :param flow: ofctl_rest flow dict (incl. dpid)
+        """
+        self.flows.setdefault(flow['dpid'], []).append((prefix, flow))
+
+    def defer(self, node):
+        """
+        Apply the flow entries of a switch after those of all other switches.
+        """
+        dpid = int(node.dpid, 16)
+        if dpid in self.flows:
+            self.flows[dpid] = self.flows.pop(dpid)
+
+    def commit(self):
+        """
+        Send all staged flow entries to the controller.
+        :return: number of REST requests that were needed
+        """
+        if len(self) == 0:
+            return 0
+        payload = []
+        for dpid, flows in self.flows.items():
+            for prefix, flow in flows:
+                batch_flow = dict(flow)
+                # 'stats/flowentry/add' -> 'add'
+                batch_flow['cmd'] = prefix.rsplit('/', 1)[-1]
+                payload.append(batch_flow)
+        switches = self.switches()
+
+        if self.net.ryu_rpc is not None:
+            t_start = time.time()
+            try:
+                ret = self.net.ryu_rpc.call('flow_mods', flows=payload)
+                self._batch_done(ret, switches, len(payload), t_start)
+                return 1
+            except RyuRpcReplyError as ex:
+                # the controller may have applied a part of the batch,
+                # sending it again over REST could install entries twice
+                self._batch_done({'errors': [str(ex)]}, switches,
+                                 len(payload), t_start)
+                self.failed.update(switches)
+                return 1
+            except RyuRpcError as ex:
+                LOG.warning("Ryu RPC channel not usable, using REST: "
+                            "{0}".format(ex))
+
+        url = '{0}/{1}'.format(self.net.ryu_REST_api, RYU_FLOW_BATCH_PREFIX)
+        LOG.debug('sending RYU flow batch: %s, %d flow entries on %d switches',
+                  url, len(payload), len(self.flows))
+        t_start = time.time()
+        req = self.net.RyuSession.post(url, json={'flows': payload})
+        if req.status_code == requests.codes.ok:
+            self._batch_done(req.json(), switches, len(payload), t_start)
+            return 1
+
+        LOG.info('son-emu flow API not available (status: {0}), '
+                 'falling back to ofctl_rest'.format(req.status_code))
+        n_requests = 0
+        for dpid, flows in self.flows.items():
+            for prefix, flow in flows:
+                t_start = time.time()
+                try:
+                    self.net.ryu_REST(prefix, data=flow)
+                except Exception as ex:
+                    LOG.warning('RYU flow entry failed on {0}: {1}'.format(
+                        dpid, ex))
+                    self.failed.add(self._name(dpid))
+                self.timings.append({'switches': [self._name(dpid)],
+                                     'flows': 1,
+                                     'time': time.time() - t_start})
+                n_requests += 1
+        self.flows.clear()
+        return n_requests
+
+    def _batch_done(self, ret, switches, n_flows, t_start):
+        self.timings.append({'switches': switches, 'flows': n_flows,
+                             'time': time.time() - t_start})
+        for error in ret.get('errors', []):
+            LOG.warning('RYU flow batch error: {0}'.format(error))
+        for dpid in ret.get('failed', []):
+            self.failed.add(self._name(int(dpid)))
+        self.flows.clear()
+
+
+class DpctlFlowBatch(object):
+    """
+    Collects the ovs-ofctl flow entries created by one or more setChain
+    calls and applies them with one ovs-ofctl add-flows/del-flows call
+    per switch (instead of one process per flow entry).
+    Consecutive entries with the same command are grouped, so the order
+    of additions and deletions on a switch is preserved.
+    """
+
+    def __init__(self, bundle=False):
+        # use an atomic OpenFlow 1.4 bundle per ovs-ofctl call
+        # (needs OpenFlow14 to be enabled on the switches)
+        self.bundle = bundle
+        # switch name -> list of (cmd, flow string), in install order
+        self.flows = OrderedDict()
+        # chains registered while this batch was open
+        self.chains = []
+        # names of the switches on which flow entries could not be applied
+        self.failed = set()
+        # one dict per ovs-ofctl call made by commit: {switches, flows, time}
+        self.timings = []
+
+    def __len__(self):
+        return sum(len(flows) for flows in self.flows.values())
+
+    def switches(self):
+        """
+        Names of the switches with staged flow entries.
+        """
+        return list(self.flows.keys())
+
+    def savepoint(self):
+        """
+        Mark the current end of the staged flow entries.
+        """
+        return dict((name, len(flows)) for name, flows in self.flows.items())
+
+    def rollback(self, savepoint):
+        """
+        Drop the flow entries staged after the given savepoint.
+        """
+        _rollback(self.flows, savepoint)
+
+    def add(self, switch_name, cmd, flow):
+        """
+        Stage a flow entry.
+        :param switch_name: name of the OVS bridge
+        :param cmd: 'add-flow' or 'del-flows'
+        :param flow: ovs-ofctl flow string (match and actions)
+        """
+        if cmd not in OFCTL_BATCH_CMDS:
+            raise Exception("Command unknown: %s" % cmd)
+        self.flows.setdefault(switch_name, []).append((cmd, flow))
+
+    def defer(self, node):
+        """
+        Apply the flow entries of a switch after those of all other switches.
+        """
+        if node.name in self.flows:
+            self.flows[node.name] = self.flows.pop(node.name)
+
+    def commit(self):
+        """
+        Apply all staged flow entries.
+        :return: number of ovs-ofctl processes that were needed
+        """
+        n_calls = 0
+        for switch_name, flows in self.flows.items():
+            run_cmd = None
+            run = []
+            for cmd, flow in flows:
+                if cmd != run_cmd and len(run) > 0:
+                    self._ofctl(switch_name, run_cmd, run)
+                    n_calls += 1
+                    run = []
+                run_cmd = cmd
+                run.append(flow)
+            if len(run) > 0:
+                self._ofctl(switch_name, run_cmd, run)
+                n_calls += 1
+        self.flows.clear()
+        return n_calls
+
+    def _ofctl(self, switch_name, cmd, flows):
+        t_start = time.time()
+        if self.bundle:
+            args = ['ovs-ofctl', '-O', 'OpenFlow14', '--bundle']
+        else:
+            args = ['ovs-ofctl', '-O', 'OpenFlow13']
+        args += [OFCTL_BATCH_CMDS[cmd], switch_name, '-']
+        p = Popen(args, stdin=PIPE, stdout=PIPE, stderr=PIPE,
+                  universal_newlines=True)
+        out, err = p.communicate('\n'.join(flows) + '\n')
+        if p.returncode != 0:
+            LOG.warning("ovs-ofctl {0} failed on {1}: {2}".format(
+                OFCTL_BATCH_CMDS[cmd], switch_name, err))
+            self.failed.add(switch_name)
+        self.timings.append({'switches': [switch_name], 'flows': len(flows),
+                             'time': time.time() - t_start})
+        LOG.debug("{0} {1} flow entries in switch: {2}".format(
+            OFCTL_BATCH_CMDS[cmd], len(flows), switch_name))
+
+
+class VsctlBatch(object):
+    """
+    Collects ovs-vsctl commands (bridge, port and vlan configuration)
+    and applies them with as few ovs-vsctl calls as possible. Each call
+    is a single OVSDB transaction: if one of its commands fails, none of
+    them is applied.
+    """
+
+    def __init__(self):
+        # list of argument lists, in the given order
+        self.cmds = []
+        # error messages of the failed ovs-vsctl calls
+        self.errors = []
+
+    def __len__(self):
+        return len(self.cmds)
+
+    def add(self, *args):
+        """
+        Stage a command, e.g. add('set', 'port', 's1-eth1', 'tag=5').
+        """
+        self.cmds.append([str(arg) for arg in args])
+
+    def commit(self):
+        """
+        Apply all staged commands.
+        :return: number of ovs-vsctl processes that were needed
+        """
+        n_calls = 0
+        args = []
+        args_len = 0
+        for cmd in self.cmds:
+            cmd_len = sum(len(arg) + 1 for arg in cmd) + 3
+            if args and args_len + cmd_len > VSCTL_MAX_CMD_LEN:
+                self._vsctl(args)
+                n_calls += 1
+                args = []
+                args_len = 0
+            args += ['--'] + cmd
+            args_len += cmd_len
+        if args:
+            self._vsctl(args)
+            n_calls += 1
+        LOG.debug("Applied {0} ovs-vsctl commands with {1} calls".format(
+            len(self.cmds), n_calls))
+        self.cmds = []
+        return n_calls
+
+    def _vsctl(self, args):
+        p = Popen(['ovs-vsctl'] + args, stdout=PIPE, stderr=PIPE,
+                  universal_newlines=True)
+        out, err = p.communicate()
+        if p.returncode != 0:
+            LOG.warning("ovs-vsctl transaction failed: {0}".format(err))
+            self.errors.append(err.strip())
+
+
+def _rollback(flows, savepoint):
+    for key in list(flows.keys()):
+        if key not in savepoint:
+            del flows[key]
+        else:
+            del flows[key][savepoint[key]:]
@@ -0,0 +1,340 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import logging
+import threading
+from collections import OrderedDict
+
+LOG = logging.getLogger("dcemulator.flowtable")
+LOG.setLevel(logging.DEBUG)
+
+# priority OpenFlow switches use for entries added without priority
+OFP_DEFAULT_PRIORITY = 0x8000
+
+# flow entry fields of ovs-ofctl strings that are not part of the match
+OFCTL_NON_MATCH_FIELDS = ('cookie', 'priority', 'table', 'table_id',
+                          'duration', 'n_packets', 'n_bytes', 'idle_age',
+                          'hard_age', 'idle_timeout', 'hard_timeout',
+                          'importance', 'reset_counts', 'send_flow_rem')
+
+# Ryu and OpenFlow 1.3 names of match fields -> ovs-ofctl names
+MATCH_ALIASES = {'eth_type': 'dl_type', 'eth_src': 'dl_src',
+                 'eth_dst': 'dl_dst', 'vlan_vid': 'dl_vlan',
+                 'ipv4_src': 'nw_src', 'ipv4_dst': 'nw_dst',
+                 'ip_proto': 'nw_proto', 'ip_dscp': 'nw_tos'}
+
+# ovs-ofctl protocol shorthands
+MATCH_SHORTHANDS = {'ip': {'dl_type': 0x0800},
+                    'arp': {'dl_type': 0x0806},
+                    'ipv6': {'dl_type': 0x86dd},
+                    'icmp': {'dl_type': 0x0800, 'nw_proto': 1},
+                    'tcp': {'dl_type': 0x0800, 'nw_proto': 6},
+                    'udp': {'dl_type': 0x0800, 'nw_proto': 17}}
+
+
+def _value(value):
+    value = str(value).strip().strip('"')
+    try:
+        return int(value, 0)
+    except ValueError:
+        return value.lower()
+
+
+def normalize_match(match):
+    """
+    Bring a match given as Ryu/ofctl_rest dict or as ovs-ofctl string
+    into one canonical form.
+    :param match: dict or string like 'in_port=1,dl_vlan=2,ip'
+    :return: dict {ovs-ofctl field name: int or lower case string}
+    """
+    if match is None:
+        return {}
+    if isinstance(match, dict):
+        items = list(match.items())
+    else:
+        items = []
+        for field in match.split(','):
+            field = field.strip()
+            if not field:
+                continue
+            if '=' in field:
+                items.append(tuple(field.split('=', 1)))
+            else:
+                items.append((field, None))
+    ret = {}
+    for key, value in items:
+        key = key.strip()
+        if value is None:
+            ret.update(MATCH_SHORTHANDS.get(key, {key: True}))
+            continue
+        if key in OFCTL_NON_MATCH_FIELDS:
+            continue
+        ret[MATCH_ALIASES.get(key, key)] = _value(value)
+    return ret
+
+
+def parse_ofctl_flow(flow, default_priority=OFP_DEFAULT_PRIORITY):
+    """
+    Split an ovs-ofctl flow string (as given to add-flow or printed by
+    dump-flows) into its parts.
+    :return: dict {cookie, priority, table_id, match, raw_match}
+    """
+    flow = flow.strip().strip('"')
+    for sep in (' actions=', 'actions=', 'action='):
+        if sep in flow:
+            flow = flow.split(sep, 1)[0]
+            break
+    fields = OrderedDict()
+    match = []
+    for field in flow.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        key = field.split('=', 1)[0]
+        if key in OFCTL_NON_MATCH_FIELDS:
+            fields[key] = field.split('=', 1)[1] if '=' in field else ''
+        else:
+            match.append(field)
+    raw_match = ','.join(match)
+    cookie = fields.get('cookie', '0').split('/')[0]
+    table_id = fields.get('table', fields.get('table_id', '0'))
+    return {'cookie': _value(cookie) if cookie else 0,
+            'priority': _value(fields.get('priority', default_priority)),
+            'table_id': _value(table_id) if table_id else 0,
+            'match': normalize_match(raw_match),
+            'raw_match': raw_match}
+
+
+def parse_ofctl_dump(output):
+    """
+    Parse the output of 'ovs-ofctl dump-flows'.
+    :return: list of flow dicts as returned by parse_ofctl_flow
+    """
+    flows = []
+    for line in output.splitlines():
+        if 'actions=' not in line:
+            continue
+        flows.append(parse_ofctl_flow(line))
+    return flows
+
+
+def parse_ryu_stats(stats):
+    """
+    Parse the flow entries of a Ryu ofctl_rest stats/flow reply (of one
+    datapath).
+    :return: list of flow dicts as returned by parse_ofctl_flow
+    """
+    return [{'cookie': int(flow.get('cookie', 0)),
+             'priority': int(flow.get('priority', 0)),
+             'table_id': int(flow.get('table_id', 0)),
+             'match': normalize_match(flow.get('match', {})),
+             'raw_match': flow.get('match', {})}
+            for flow in stats]
+
+
+def flow_key(flow):
+    """
+    Identity of a flow entry in a switch: two entries with the same key
+    cannot coexist.
+    """
+    return (flow['table_id'], flow['priority'], flow['cookie'],
+            frozenset(flow['match'].items()))
+
+
+class ShadowFlowTable(object):
+    """
+    In-memory copy of the flow entries son-emu installed on each switch.
+
+    Entries are recorded when they are sent to the switch, by the
+    DCNetwork flow setters and the helpers of the OpenStack API.
+    Each entry keeps the data needed to install it again:
+    {switch, cookie, priority, table_id, match, flow}, where flow is the
+    ofctl_rest flow dict (Ryu) or the ovs-ofctl flow string (dpctl).
+    """
+
+    def __init__(self):
+        # switch name -> OrderedDict(flow key -> entry), in install order
+        self._flows = OrderedDict()
+        # flow setters are called from the REST API threads
+        self._lock = threading.Lock()
+        # undo log [(switch, flow key, previous entry or None)], only kept
+        # between savepoint() and release()
+        self._journal = None
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(flows) for flows in self._flows.values())
+
+    def add(self, switch, match, cookie=None, priority=None,
+            table_id=None, flow=None):
+        """
+        Record a flow entry that was added to a switch. An entry with the
+        same table, priority, cookie and match is replaced, as the switch
+        would do.
+        :param switch: switch name
+        :param match: match as ofctl_rest dict or ovs-ofctl string
+        :param flow: data to install the entry again
+        :return: the recorded entry
+        """
+        entry = {'switch': switch,
+                 'cookie': int(cookie or 0),
+                 'priority': int(priority if priority is not None
+                                 else OFP_DEFAULT_PRIORITY),
+                 'table_id': int(table_id or 0),
+                 'match': normalize_match(match),
+                 'flow': flow}
+        with self._lock:
+            flows = self._flows.setdefault(switch, OrderedDict())
+            previous = flows.pop(flow_key(entry), None)
+            flows[flow_key(entry)] = entry
+            if self._journal is not None:
+                self._journal.append((switch, flow_key(entry), previous))
+        return entry
+
+    def add_ofctl(self, switch, flow):
+        """
+        Record a flow entry added with 'ovs-ofctl add-flow'.
+        :param flow: ovs-ofctl flow string (match and actions)
+        """
+        flow = flow.strip().strip('"')
+        parsed = parse_ofctl_flow(flow)
+        return self.add(switch, parsed['raw_match'],
+                        cookie=parsed['cookie'],
+                        priority=parsed['priority'],
+                        table_id=parsed['table_id'], flow=flow)
+
+    def delete(self, switch, match=None, cookie=None, table_id=None):
+        """
+        Forget the flow entries of a switch a (non-strict) flow delete
+        removes: all entries whose match contains the given match fields.
+        :param cookie: only entries with this cookie (any cookie if None)
+        :param table_id: only entries of this table (all tables if None)
+        :return: list of removed entries
+        """
+        match = set(normalize_match(match).items())
+        with self._lock:
+            flows = self._flows.get(switch)
+            if not flows:
+                return []
+            removed = [key for key, entry in flows.items()
+                       if (cookie is None or entry['cookie'] == int(cookie))
+                       and (table_id is None or
+                            entry['table_id'] == int(table_id))
+                       and match.issubset(key[3])]
+            if self._journal is not None:
+                self._journal.extend(
+                    (switch, key, flows[key]) for key in removed)
+            removed = [flows.pop(key) for key in removed]
+            if len(flows) == 0:
+                del self._flows[switch]
+        return removed
+
+    def flows(self, switch=None, cookie=None):
+        """
+        Return the recorded entries, optionally of one switch or cookie.
+        """
+        with self._lock:
+            if switch is None:
+                switches = list(self._flows.keys())
+            else:
+                switches = [switch]
+            return [dict(entry)
+                    for name in switches
+                    for entry in self._flows.get(name, {}).values()
+                    if cookie is None or entry['cookie'] == int(cookie)]
+
+    def switches(self, cookie=None):
+        """
+        Return the names of the switches holding recorded entries
+        (with the given cookie).
+        """
+        with self._lock:
+            return [name for name, flows in self._flows.items()
+                    if cookie is None or
+                    any(entry['cookie'] == int(cookie)
+                        for entry in flows.values())]
+
+    def diff(self, switch, live_flows, prune=True):
+        """
+        Compare the recorded entries of a switch with its live flow table.
+        :param live_flows: flow dicts as returned by parse_ofctl_dump or
+                           parse_ryu_stats
+        :param prune: report live entries with a non-zero cookie that are
+                      not recorded as stale. Entries with cookie 0 are
+                      never reported, they belong to the controller.
+        :return: (missing, stale): recorded entries not found in the switch
+                 and live entries to be removed from it
+        """
+        live = OrderedDict((flow_key(flow), flow) for flow in live_flows)
+        with self._lock:
+            recorded = self._flows.get(switch, OrderedDict())
+            missing = [dict(entry) for key, entry in recorded.items()
+                       if key not in live]
+            stale = [flow for key, flow in live.items()
+                     if prune and flow['cookie'] != 0 and
+                     key not in recorded]
+        return missing, stale
+
+    def savepoint(self):
+        """
+        Start recording changes (if not done yet) and mark the current
+        state to go back to with rollback().
+        """
+        with self._lock:
+            if self._journal is None:
+                self._journal = []
+            return len(self._journal)
+
+    def rollback(self, savepoint):
+        """
+        Undo all changes made after the given savepoint.
+        """
+        with self._lock:
+            while self._journal and len(self._journal) > savepoint:
+                switch, key, previous = self._journal.pop()
+                flows = self._flows.setdefault(switch, OrderedDict())
+                if previous is None:
+                    flows.pop(key, None)
+                else:
+                    flows[key] = previous
+                if len(flows) == 0:
+                    del self._flows[switch]
+
+    def release(self):
+        """
+        Stop recording changes, they cannot be rolled back anymore.
+        """
+        with self._lock:
+            self._journal = None
+
+    def clear(self, switch=None):
+        """
+        Forget all entries (of a switch).
+        """
+        with self._lock:
+            if switch is None:
+                self._flows.clear()
+            else:
+                self._flows.pop(switch, None)
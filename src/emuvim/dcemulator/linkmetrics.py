@@ -0,0 +1,186 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Typed metrics of the links in the DCNetwork graph. The TCLink parameters
+given to addLink are converted to numbers with fixed units, so that they
+can be used as edge weights for the path computation of chains.
+"""
+import heapq
+import re
+
+# units of time values as used by tc (no unit: microseconds)
+TIME_UNITS = {'us': 1.0, 'usec': 1.0, 'ms': 1000.0, 'msec': 1000.0,
+              's': 1000000.0, 'sec': 1000000.0}
+
+# routing objectives of setChain
+MIN_HOPS = 'min_hops'
+MIN_DELAY = 'min_delay'
+MAX_BW = 'max_bw'
+ROUTING_OBJECTIVES = (MIN_HOPS, MIN_DELAY, MAX_BW)
+
+# selection among equal cost paths and parallel links (ecmp parameter)
+ECMP_HASH = 'hash'
+ECMP_LEAST_LOADED = 'least_loaded'
+ECMP_MODES = (ECMP_HASH, ECMP_LEAST_LOADED)
+
+# typed edge attribute of each TCLink parameter
+LINK_PARAM_METRICS = {'delay': 'delay_us', 'jitter': 'jitter_us',
+                      'bw': 'bw_mbps', 'loss': 'loss_ratio'}
+
+# edge attributes used for the weight names of older API versions
+LEGACY_WEIGHTS = {'delay': 'delay_us', 'jitter': 'jitter_us',
+                  'loss': 'loss_ratio'}
+
+
+def parse_time_us(value):
+    """
+    Convert a TCLink delay or jitter value, e.g. '10ms', to microseconds.
+    :return: float or None if value is None
+    """
+    if value is None:
+        return None
+    match = re.match(r'\s*([0-9]*\.?[0-9]+)\s*([a-z]*)\s*$', str(value))
+    if match is None or (match.group(2) and
+                          match.group(2) not in TIME_UNITS):
+        raise ValueError("Invalid time value: %r" % value)
+    return float(match.group(1)) * TIME_UNITS.get(match.group(2), 1.0)
+
+
+def link_metrics(params):
+    """
+    Return the typed metrics of a link created with the given TCLink
+    parameters.
+    delay_us, jitter_us: microseconds
+    bw_mbps: capacity in Mbit/s, None = not limited
+    loss_ratio: 0..1
+    """
+    bw = params.get('bw')
+    loss = params.get('loss')
+    return {'delay_us': parse_time_us(params.get('delay')) or 0.0,
+            'jitter_us': parse_time_us(params.get('jitter')) or 0.0,
+            'bw_mbps': float(bw) if bw is not None else None,
+            # TCLink expects the loss in percent
+            'loss_ratio': float(loss) / 100 if loss is not None else 0.0,
+            # bandwidth reserved by chains (bw parameter of setChain)
+            'bw_reserved_mbps': 0.0}
+
+
+def residual_bw(edge):
+    """
+    Remaining capacity of a graph edge in Mbit/s.
+    """
+    if edge.get('bw_mbps') is None:
+        return float('inf')
+    return edge['bw_mbps'] - edge.get('bw_reserved_mbps', 0.0)
+
+
+def link_utilization(rate_bytes, bw_mbps):
+    """
+    Utilization of a link by a measured traffic rate.
+    :param rate_bytes: traffic rate in bytes/s
+    :param bw_mbps: capacity of the link in Mbit/s
+    :return: ratio (1.0 = link capacity) or None if the link is not limited
+    """
+    if rate_bytes is None or not bw_mbps:
+        return None
+    return rate_bytes * 8 / (bw_mbps * 1000000.0)
+
+
+def edge_load(edge):
+    """
+    Load of a graph edge caused by chains: (reserved Mbit/s, number of chains)
+    """
+    return (edge.get('bw_reserved_mbps', 0.0), edge.get('n_chains', 0))
+
+
+def max_residual_bw(graph, src, dst):
+    """
+    Largest residual bandwidth of the (parallel) links from src to dst.
+    """
+    return max(residual_bw(edge) for edge in graph[src][dst].values())
+
+
+def widest_path(graph, src, dst, transit=None):
+    """
+    Return the path with the largest residual bandwidth between two nodes
+    of a (Multi)DiGraph. Among the widest paths the one with the fewest
+    hops is chosen.
+    :param transit: nodes that may be used as intermediate hops, e.g. the
+                    switches (default: all nodes)
+    :raises Exception: if there is no path
+    """
+    def forwards(node):
+        return node == src or transit is None or node in transit
+
+    # max. bottleneck bandwidth to reach each node (Dijkstra variant)
+    width = {src: float('inf')}
+    heap = [(-width[src], src)]
+    done = set()
+    while heap:
+        w, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        if not forwards(node):
+            continue
+        for neighbor in graph.neighbors(node):
+            bw = min(-w, max_residual_bw(graph, node, neighbor))
+            if bw > width.get(neighbor, float('-inf')):
+                width[neighbor] = bw
+                heapq.heappush(heap, (-bw, neighbor))
+    if dst not in width:
+        raise Exception("No path between %s and %s" % (src, dst))
+    # fewest hops over the edges that offer this bandwidth
+    bottleneck = width[dst]
+    previous = {src: None}
+    queue = [src]
+    for node in queue:
+        if node == dst:
+            break
+        if not forwards(node):
+            continue
+        for neighbor in graph.neighbors(node):
+            if neighbor not in previous and \
+                    max_residual_bw(graph, node, neighbor) >= bottleneck:
+                previous[neighbor] = node
+                queue.append(neighbor)
+    path = [dst]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    return list(reversed(path))
+
+
+def path_delay_us(graph, path):
+    """
+    Sum of the link delays along a path (list of node names).
+    The fastest link is assumed between nodes with parallel links.
+    """
+    delay = 0.0
+    for i in range(0, len(path) - 1):
+        edges = graph.get_edge_data(path[i], path[i + 1])
+        if edges:
+            delay += min(e.get('delay_us', 0.0) for e in edges.values())
+    return delay
@@ -24,17 +24,25 @@
 # acknowledge the contributions of their colleagues of the SONATA
 # partner consortium (www.sonata-nfv.eu).
 import logging
-from mininet.node import OVSSwitch
+from mininet.node import OVSSwitch, RemoteController
 import ast
 import time
 from prometheus_client import Gauge, CollectorRegistry, \
-    pushadd_to_gateway, delete_from_gateway
+    push_to_gateway, generate_latest, CONTENT_TYPE_LATEST
 import threading
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
 from subprocess import Popen
 import os
 import docker
 import json
-from copy import deepcopy
+from emuvim.dcemulator.ryustats import group_by_dpid, cookie_filter, \
+    index_port_stats, index_flow_stats, flow_counter
+from emuvim.dcemulator.ratehistory import RateHistory, RATE_HISTORY_SIZE
+from emuvim.dcemulator.cgroupstats import CgroupReader
+from emuvim.dcemulator.timerwheel import TimerWheel, backoff_interval
+from emuvim.dcemulator.linkmetrics import link_utilization
+from emuvim.dcemulator.netstats import NetDevReader
 
 logging.basicConfig()
 
@@ -43,19 +51,89 @@ class to read openflow stats from the Ryu controller of the DCNetwork
 """
 
 PUSHGATEWAY_PORT = 9091
+# port of the /metrics endpoint scraped by Prometheus
+PROMETHEUS_EXPORTER_PORT = 9092
 # we cannot use port 8080 because ryu-ofrest api  is already using that one
 CADVISOR_PORT = 8081
 
-COOKIE_MASK = 0xffffffff
+# default polling interval of a monitored metric in seconds
+DEFAULT_POLL_INTERVAL = 1.0
+# adaptive polling backs off up to this interval while a counter is idle
+ADAPTIVE_MAX_INTERVAL = 10.0
+
+
+def _port_uptime(port_stat):
+    # uptime of a port in the Ryu port stats (None: port not found)
+    if port_stat is None:
+        return None
+    return port_stat['duration_sec'] + port_stat['duration_nsec'] * 10 ** (-9)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serves the registry of the server in the Prometheus text format.
+    """
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        output = generate_latest(self.server.registry)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE_LATEST)
+        self.send_header('Content-Length', str(len(output)))
+        self.end_headers()
+        self.wfile.write(output)
+
+    def log_message(self, format, *args):
+        # one request per scrape interval, do not flood the log
+        return
+
+
+class PrometheusExporter(ThreadingMixIn, HTTPServer):
+    """
+    In-process HTTP endpoint from which Prometheus scrapes the son-emu
+    metrics (http://<host>:<port>/metrics).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, registry, port=PROMETHEUS_EXPORTER_PORT, addr=''):
+        self.registry = registry
+        HTTPServer.__init__(self, (addr, port), MetricsHandler)
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        logging.info('Prometheus exporter listening on {0}:{1}'.format(
+            addr, port))
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
 
 
 class DCNetworkMonitor():
-    def __init__(self, net):
+    def __init__(self, net, exporter_port=PROMETHEUS_EXPORTER_PORT,
+                 pushgateway=False, rate_history=RATE_HISTORY_SIZE,
+                 cadvisor=False, port_counters=None,
+                 compute_interval=DEFAULT_POLL_INTERVAL):
+        """
+        :param net: monitored DCNetwork
+        :param exporter_port: port of the /metrics endpoint scraped by Prometheus (None: no endpoint)
+        :param pushgateway: also push the metrics to a Prometheus pushgateway container (started by the monitor)
+        :param rate_history: number of rate samples kept per monitored metric
+        :param cadvisor: also start a cAdvisor container (the CPU, memory and block I/O usage of the VNFs is always exported from their cgroups)
+        :param compute_interval: polling interval of the CPU, memory and block I/O usage of the VNFs in seconds
+        :param port_counters: source of the port and link counters: 'ryu' (port stats of the controller) or 'netdev' (interface counters of the host, no controller needed), default: 'ryu' if the network uses the Ryu controller
+        """
         self.net = net
         self.dockercli = docker.from_env()
 
-        # pushgateway address
-        self.pushgateway = 'localhost:{0}'.format(PUSHGATEWAY_PORT)
+        # pushgateway address (None: metrics are only scraped)
+        self.pushgateway = None
+        if pushgateway:
+            self.pushgateway = 'localhost:{0}'.format(PUSHGATEWAY_PORT)
 
         # supported Prometheus metrics
         self.registry = CollectorRegistry()
@@ -71,6 +149,38 @@ class DCNetworkMonitor():
         self.prom_metrics = {'tx_packets': self.prom_tx_packet_count, 'rx_packets': self.prom_rx_packet_count,
                              'tx_bytes': self.prom_tx_byte_count, 'rx_bytes': self.prom_rx_byte_count}
 
+        # resource usage of the VNF containers (read from their cgroups)
+        self.prom_compute_metrics = {
+            'cpu_seconds': Gauge('sonemu_cpu_usage_seconds', 'Total CPU time consumed',
+                                 ['vnf_name'], registry=self.registry),
+            'memory_bytes': Gauge('sonemu_memory_usage_bytes', 'Memory usage',
+                                  ['vnf_name'], registry=self.registry),
+            'memory_limit_bytes': Gauge('sonemu_memory_limit_bytes', 'Memory limit',
+                                        ['vnf_name'], registry=self.registry),
+            'blkio_read_bytes': Gauge('sonemu_blkio_read_bytes', 'Total number of bytes read from block devices',
+                                      ['vnf_name'], registry=self.registry),
+            'blkio_write_bytes': Gauge('sonemu_blkio_write_bytes', 'Total number of bytes written to block devices',
+                                       ['vnf_name'], registry=self.registry)}
+        self.cgroups = CgroupReader()
+
+        # port counters from the controller or from the host interfaces
+        if port_counters is None:
+            port_counters = 'ryu' if net.controller == RemoteController \
+                else 'netdev'
+        if port_counters not in ('ryu', 'netdev'):
+            raise Exception("Port counter source unknown: %s" % port_counters)
+        self.port_counters = port_counters
+        self.netdev = NetDevReader()
+        # flow counters are only available from Ryu, a missing controller
+        # is logged once
+        self.flow_stats_warned = False
+
+        # traffic on the links between switches (both directions)
+        self.prom_link_tx_bytes = Gauge('sonemu_link_tx_count_bytes', 'Total number of bytes sent over the link',
+                                        ['src', 'dst', 'src_port'], registry=self.registry)
+        self.prom_link_utilization = Gauge('sonemu_link_utilization', 'Utilization of the link bandwidth (1 = full)',
+                                           ['src', 'dst', 'src_port'], registry=self.registry)
+
         # list of installed metrics to monitor
         # each entry can contain this data
         '''
@@ -78,37 +188,76 @@ class DCNetworkMonitor():
         switch_dpid = 0
         vnf_name = None
         vnf_interface = None
-        previous_measurement = 0
-        previous_monitor_time = 0
         metric_key = None
         mon_port = None
+        mon_intf = None (switch side interface, netdev port counters)
+        interval = polling interval in seconds
+        adaptive = back off while the counter does not change
+        poll_interval = current polling interval
         }
         '''
+        # the metric lists are immutable snapshots (tuples), which are
+        # replaced on every change (copy-on-write): the locks only protect
+        # the swap and the export of the polled values, never the stats
+        # requests
         self.monitor_lock = threading.Lock()
         self.monitor_flow_lock = threading.Lock()
-        self.network_metrics = []
-        self.flow_metrics = []
+        self.network_metrics = ()
+        self.flow_metrics = ()
         self.skewmon_metrics = {}
 
+        # recent rates of the monitored metrics
+        # {(vnf_name, vnf_interface, metric_key, flow_id): RateHistory}
+        self.rate_history = rate_history
+        self.rates = {}
+        self.rate_lock = threading.Lock()
+
+        # link monitoring (setup_link_monitoring): polling schedule entry,
+        # list of link dicts of the last poll (replaced on every poll) and
+        # rates per switch port {(switch name, port nr): RateHistory}
+        self.link_monitor = None
+        self.link_stats = []
+        self.link_rates = {}
+
+        # polling schedule of the network, flow, link and compute metrics,
+        # each metric is (re)scheduled after its own interval
+        self.poll_wheel = TimerWheel()
+
+        # resource usage of the VNFs: polling schedule entry and the names
+        # of the VNFs exported by the last poll
+        self.compute_monitor = {}
+        self._set_interval(self.compute_monitor, compute_interval, False)
+        self.compute_exported = set()
+        self.poll_wheel.schedule(('compute', self.compute_monitor), 0)
+
+        # Prometheus scrapes the metrics from son-emu directly
+        # (bound before the monitoring thread is started, so that a port
+        # in use fails without leaving a running thread behind)
+        self.exporter = None
+        if exporter_port is not None:
+            self.exporter = PrometheusExporter(self.registry, exporter_port)
+
         # start monitoring thread
         self.start_monitoring = True
-        self.monitor_thread = threading.Thread(target=self.get_network_metrics)
+        self.monitor_thread = threading.Thread(target=self.poll_metrics)
+        self.monitor_thread.daemon = True
         self.monitor_thread.start()
 
-        self.monitor_flow_thread = threading.Thread(
-            target=self.get_flow_metrics)
-        self.monitor_flow_thread.start()
-
         # helper tools
-        # cAdvisor, Prometheus pushgateway are started as external container,
-        # to gather monitoring metric in son-emu
-        self.pushgateway_process = self.start_PushGateway()
-        self.cadvisor_process = self.start_cAdvisor()
+        # the (optional) cAdvisor and Prometheus pushgateway are started as
+        # external container, to gather monitoring metric in son-emu
+        self.pushgateway_process = None
+        if self.pushgateway is not None:
+            self.pushgateway_process = self.start_PushGateway()
+        self.cadvisor_process = None
+        if cadvisor:
+            self.cadvisor_process = self.start_cAdvisor()
 
     # first set some parameters, before measurement can start
 
     def setup_flow(self, vnf_name, vnf_interface=None,
-                   metric='tx_packets', cookie=0):
+                   metric='tx_packets', cookie=0, interval=None,
+                   adaptive=False):
 
         flow_metric = {}
 
@@ -150,16 +299,14 @@ class DCNetworkMonitor():
                     "vnf: {0} is not connected to switch".format(vnf_name))
                 return
 
-            flow_metric['previous_measurement'] = 0
-            flow_metric['previous_monitor_time'] = 0
-
             flow_metric['switch_dpid'] = int(str(next_node.dpid), 16)
             flow_metric['metric_key'] = metric
             flow_metric['cookie'] = cookie
+            self._set_interval(flow_metric, interval, adaptive)
 
-            self.monitor_flow_lock.acquire()
-            self.flow_metrics.append(flow_metric)
-            self.monitor_flow_lock.release()
+            self._add_metric(
+                self.monitor_flow_lock, 'flow_metrics', flow_metric)
+            self.poll_wheel.schedule(('flow', flow_metric), 0)
 
             logging.info('Started monitoring flow:{3} {2} on {0}:{1}'.format(
                 vnf_name, vnf_interface, metric, cookie))
@@ -179,35 +326,24 @@ class DCNetworkMonitor():
             link_dict = self.net.DCNetwork_graph[vnf_name][connected_sw]
             vnf_interface = link_dict[0]['src_port_id']
 
-        for flow_dict in self.flow_metrics:
-            if flow_dict['vnf_name'] == vnf_name and flow_dict['vnf_interface'] == vnf_interface \
-                    and flow_dict['metric_key'] == metric and flow_dict['cookie'] == cookie:
-
-                self.monitor_flow_lock.acquire()
-
-                self.flow_metrics.remove(flow_dict)
-
-                # set metric to NaN
-                self.prom_metrics[flow_dict['metric_key']]. \
-                    labels(vnf_name=vnf_name, vnf_interface=vnf_interface, flow_id=cookie). \
-                    set(float('nan'))
-
-                delete_from_gateway(
-                    self.pushgateway, job='sonemu-SDNcontroller')
+        def selected(flow_dict):
+            return flow_dict['vnf_name'] == vnf_name and flow_dict['vnf_interface'] == vnf_interface \
+                and flow_dict['metric_key'] == metric and flow_dict['cookie'] == cookie
 
-                self.monitor_flow_lock.release()
-
-                logging.info('Stopped monitoring flow {3}: {2} on {0}:{1}'.format(
-                    vnf_name, vnf_interface, metric, cookie))
-                return 'Stopped monitoring flow {3}: {2} on {0}:{1}'.format(
-                    vnf_name, vnf_interface, metric, cookie)
+        if len(self._remove_metrics(
+                self.monitor_flow_lock, 'flow_metrics', selected)) > 0:
+            logging.info('Stopped monitoring flow {3}: {2} on {0}:{1}'.format(
+                vnf_name, vnf_interface, metric, cookie))
+            return 'Stopped monitoring flow {3}: {2} on {0}:{1}'.format(
+                vnf_name, vnf_interface, metric, cookie)
 
         return 'Error stopping monitoring flow: {0} on {1}:{2}'.format(
             metric, vnf_name, vnf_interface)
 
     # first set some parameters, before measurement can start
 
-    def setup_metric(self, vnf_name, vnf_interface=None, metric='tx_packets'):
+    def setup_metric(self, vnf_name, vnf_interface=None, metric='tx_packets',
+                     interval=None, adaptive=False):
 
         network_metric = {}
 
@@ -227,6 +363,7 @@ class DCNetworkMonitor():
                 if link_dict[link]['src_port_id'] == vnf_interface:
                     # found the right link and connected switch
                     network_metric['mon_port'] = link_dict[link]['dst_port_nr']
+                    network_metric['mon_intf'] = link_dict[link]['dst_port_name']
                     break
 
         if 'mon_port' not in network_metric:
@@ -257,15 +394,13 @@ class DCNetworkMonitor():
                     "vnf: {0} is not connected to switch".format(vnf_name))
                 return
 
-            network_metric['previous_measurement'] = 0
-            network_metric['previous_monitor_time'] = 0
-
             network_metric['switch_dpid'] = int(str(next_node.dpid), 16)
             network_metric['metric_key'] = metric
+            self._set_interval(network_metric, interval, adaptive)
 
-            self.monitor_lock.acquire()
-            self.network_metrics.append(network_metric)
-            self.monitor_lock.release()
+            self._add_metric(
+                self.monitor_lock, 'network_metrics', network_metric)
+            self.poll_wheel.schedule(('port', network_metric), 0)
 
             logging.info('Started monitoring: {2} on {0}:{1}'.format(
                 vnf_name, vnf_interface, metric))
@@ -285,200 +420,478 @@ class DCNetworkMonitor():
             link_dict = self.net.DCNetwork_graph[vnf_name][connected_sw]
             vnf_interface = link_dict[0]['src_port_id']
 
-        for metric_dict in deepcopy(self.network_metrics):
-            if metric_dict['vnf_name'] == vnf_name and metric_dict['vnf_interface'] == vnf_interface \
-                    and metric_dict['metric_key'] == metric:
-
-                self.monitor_lock.acquire()
-
-                self.network_metrics.remove(metric_dict)
-
-                # set values to NaN, prometheus api currently does not support removal of metrics
-                # self.prom_metrics[metric_dict['metric_key']].labels(vnf_name, vnf_interface).set(float('nan'))
-                self.prom_metrics[metric_dict['metric_key']]. \
-                    labels(vnf_name=vnf_name, vnf_interface=vnf_interface, flow_id=None). \
-                    set(float('nan'))
-
-                # this removes the complete metric, all labels...
-                # 1 single monitor job for all metrics of the SDN controller
-                # we can only  remove from the pushgateway grouping keys(labels) which we have defined for the add_to_pushgateway
-                # we can not specify labels from the metrics to be removed
-                # if we need to remove the metrics seperatelty, we need to give
-                # them a separate grouping key, and probably a diffferent
-                # registry also
-                delete_from_gateway(
-                    self.pushgateway, job='sonemu-SDNcontroller')
-
-                self.monitor_lock.release()
-
-                logging.info('Stopped monitoring: {2} on {0}:{1}'.format(
-                    vnf_name, vnf_interface, metric))
-                return 'Stopped monitoring: {2} on {0}:{1}'.format(
-                    vnf_name, vnf_interface, metric)
-
-            # delete everything from this vnf
-            elif metric_dict['vnf_name'] == vnf_name and vnf_interface is None and metric is None:
-                self.monitor_lock.acquire()
-                self.network_metrics.remove(metric_dict)
+        # delete everything from this vnf
+        if vnf_interface is None and metric is None:
+            removed = self._remove_metrics(
+                self.monitor_lock, 'network_metrics',
+                lambda metric_dict: metric_dict['vnf_name'] == vnf_name)
+            for metric_dict in removed:
                 logging.info('remove metric from monitor: vnf_name:{0} vnf_interface:{1} mon_port:{2}'.format(
                     metric_dict['vnf_name'], metric_dict['vnf_interface'], metric_dict['mon_port']))
-
-                delete_from_gateway(
-                    self.pushgateway, job='sonemu-SDNcontroller')
-                self.monitor_lock.release()
-                continue
-
-        if vnf_interface is None and metric is None:
             logging.info('Stopped monitoring vnf: {0}'.format(vnf_name))
             return 'Stopped monitoring: {0}'.format(vnf_name)
-        else:
-            return 'Error stopping monitoring metric: {0} on {1}:{2}'.format(
-                metric, vnf_name, vnf_interface)
 
-    def get_flow_metrics(self):
-        """
-        Get all metrics defined in the list and export it to Prometheus.
-        """
-        while self.start_monitoring:
-
-            self.monitor_flow_lock.acquire()
-
-            for flow_dict in self.flow_metrics:
-                data = {}
+        def selected(metric_dict):
+            return metric_dict['vnf_name'] == vnf_name and metric_dict['vnf_interface'] == vnf_interface \
+                and metric_dict['metric_key'] == metric
 
-                data['cookie'] = flow_dict['cookie']
-                data['cookie_mask'] = COOKIE_MASK
-
-                if 'tx' in flow_dict['metric_key']:
-                    data['match'] = {'in_port': flow_dict['mon_port']}
-                elif 'rx' in flow_dict['metric_key']:
-                    data['out_port'] = flow_dict['mon_port']
-
-                # query Ryu
-                ret = self.net.ryu_REST(
-                    'stats/flow', dpid=flow_dict['switch_dpid'], data=data)
-                if isinstance(ret, dict):
-                    flow_stat_dict = ret
-                elif isinstance(ret, basestring):
-                    flow_stat_dict = ast.literal_eval(ret.rstrip())
-                else:
-                    flow_stat_dict = None
+        # only the series of this interface is dropped, the series of the
+        # other monitored interfaces are not affected
+        if len(self._remove_metrics(
+                self.monitor_lock, 'network_metrics', selected)) > 0:
+            logging.info('Stopped monitoring: {2} on {0}:{1}'.format(
+                vnf_name, vnf_interface, metric))
+            return 'Stopped monitoring: {2} on {0}:{1}'.format(
+                vnf_name, vnf_interface, metric)
 
-                logging.debug('received flow stat:{0} '.format(flow_stat_dict))
+        return 'Error stopping monitoring metric: {0} on {1}:{2}'.format(
+            metric, vnf_name, vnf_interface)
 
-                self.set_flow_metric(flow_dict, flow_stat_dict)
+    def poll_metrics(self):
+        """
+        Poll the monitored port, flow, link and compute metrics, each at
+        its own interval, and export them to Prometheus. The metrics that are due
+        at the same tick of the wheel are polled together (one stats
+        request per switch).
+        """
+        while self.start_monitoring:
 
+            due = [entry for entry in self.poll_wheel.expired()
+                   if not entry[1].get('stopped')]
+            if len(due) > 0:
+                poll_time = time.time()
+                self._collect('port', self.get_network_metrics,
+                              [m for kind, m in due if kind == 'port'])
+                self._collect('flow', self.get_flow_metrics,
+                              [m for kind, m in due if kind == 'flow'])
+                if any(kind == 'links' for kind, m in due):
+                    self._collect('link', self.get_link_metrics)
+                if any(kind == 'compute' for kind, m in due):
+                    self._collect('compute', self.get_compute_metrics)
+                self._collect('push', self._push)
+
+                # schedule the next poll (stopped metrics are dropped),
+                # aligned to a multiple of the interval, so that metrics
+                # with the same interval stay in the same tick and share
+                # the stats requests
+                for kind, metric_dict in due:
+                    if not metric_dict.get('stopped'):
+                        interval = metric_dict['poll_interval']
+                        self.poll_wheel.schedule(
+                            (kind, metric_dict),
+                            interval - poll_time % interval, poll_time)
+
+            time.sleep(self.poll_wheel.tick)
+
+    def _collect(self, name, collector, *args):
+        # an unexpected error of one collector must not end the (only)
+        # polling thread
+        try:
+            collector(*args)
+        except Exception:
+            logging.exception('polling the {0} metrics failed'.format(name))
+
+    def _set_interval(self, metric_dict, interval, adaptive):
+        if interval is None or interval == '':
+            interval = DEFAULT_POLL_INTERVAL
+        # the wheel cannot poll faster than its tick
+        metric_dict['interval'] = max(float(interval), self.poll_wheel.tick)
+        metric_dict['adaptive'] = bool(adaptive)
+        metric_dict['poll_interval'] = metric_dict['interval']
+
+    def _adapt_interval(self, metric_dict, measurement):
+        # adaptive polling: back off while the counter does not change
+        if metric_dict['adaptive']:
+            metric_dict['poll_interval'] = backoff_interval(
+                metric_dict['poll_interval'], metric_dict['interval'],
+                measurement != metric_dict.get('last_measurement'),
+                ADAPTIVE_MAX_INTERVAL)
+        metric_dict['last_measurement'] = measurement
+
+    def get_flow_metrics(self, flow_metrics):
+        """
+        Get the given flow metrics and export them to Prometheus.
+        One flow stats request is sent per switch, filtered by the cookies
+        of the flows monitored on it.
+        """
+        if len(flow_metrics) == 0:
+            return
+        if self.net.controller != RemoteController:
+            if not self.flow_stats_warned:
+                logging.warning('flow metrics cannot be polled without the '
+                                'Ryu controller, skipping them')
+                self.flow_stats_warned = True
+            return
+
+        for dpid, flow_list in group_by_dpid(flow_metrics).items():
+            data = {}
+
+            data['cookie'], data['cookie_mask'] = cookie_filter(
+                [flow_dict['cookie'] for flow_dict in flow_list])
+
+            # query Ryu
             try:
-                if len(self.flow_metrics) > 0:
-                    pushadd_to_gateway(
-                        self.pushgateway, job='sonemu-SDNcontroller', registry=self.registry)
-            except Exception as e:
-                logging.warning(
-                    "Pushgateway not reachable: {0} {1}".format(Exception, e))
+                ret = self.net.ryu_REST('stats/flow', dpid=dpid, data=data)
+                flow_stat_dict = self._stats_reply(ret)
+            except Exception:
+                logging.exception('flow stats request to {0} failed'.format(dpid))
+                continue
 
-            self.monitor_flow_lock.release()
-            time.sleep(1)
+            logging.debug('received flow stat:{0} '.format(flow_stat_dict))
 
-    def get_network_metrics(self):
-        while self.start_monitoring:
+            if flow_stat_dict is None:
+                continue
+            flow_index = index_flow_stats(flow_stat_dict.get(str(dpid)))
+            with self.monitor_flow_lock:
+                for flow_dict in flow_list:
+                    # do not export flows stopped during the request
+                    if not flow_dict.get('stopped'):
+                        self.set_flow_metric(flow_dict, flow_index)
+
+    def get_network_metrics(self, network_metrics):
+        """
+        Get the given port metrics and export them to Prometheus.
+        """
+        if self.port_counters == 'netdev':
+            self.get_netdev_metrics(network_metrics)
+            return
 
-            self.monitor_lock.acquire()
+        # group metrics by dpid: one port stats request per switch
+        for dpid, metric_list in group_by_dpid(network_metrics).items():
 
-            # group metrics by dpid to optimize the rest api calls
-            dpid_list = [metric_dict['switch_dpid']
-                         for metric_dict in self.network_metrics]
-            dpid_set = set(dpid_list)
+            # query Ryu
+            try:
+                ret = self.net.ryu_REST('stats/port', dpid=dpid)
+                port_stat_dict = self._stats_reply(ret)
+            except Exception:
+                logging.exception('port stats request to {0} failed'.format(dpid))
+                continue
+            if port_stat_dict is None:
+                continue
 
-            for dpid in dpid_set:
+            port_index = index_port_stats(port_stat_dict.get(str(dpid)))
+            with self.monitor_lock:
+                for metric_dict in metric_list:
+                    # do not export metrics stopped during the request
+                    if not metric_dict.get('stopped'):
+                        port_stat = port_index.get(
+                            int(metric_dict['mon_port']))
+                        self.set_network_metric(
+                            metric_dict, port_stat, _port_uptime(port_stat))
+
+    def get_netdev_metrics(self, network_metrics):
+        """
+        Get the given port metrics from the counters of the switch side
+        interfaces (one read for all interfaces, no controller needed) and
+        export them to Prometheus.
+        """
+        if len(network_metrics) == 0:
+            return
+        try:
+            counters = self.netdev.counters()
+        except (IOError, OSError):
+            logging.exception('reading the interface counters failed')
+            return
+        monitor_time = time.time()
+        with self.monitor_lock:
+            for metric_dict in network_metrics:
+                if not metric_dict.get('stopped'):
+                    self.set_network_metric(
+                        metric_dict, counters.get(metric_dict['mon_intf']),
+                        monitor_time)
+
+    def setup_link_monitoring(self, interval=None):
+        """
+        Monitor the traffic and bandwidth utilization of all links between
+        switches in the DCNetwork graph (both directions), e.g. the links
+        between the data centers.
+        :param interval: polling interval in seconds (default: 1)
+        """
+        with self.monitor_lock:
+            if self.link_monitor is not None:
+                return 'Link monitoring already started'
+            self.link_monitor = {}
+            self._set_interval(self.link_monitor, interval, False)
+            self.poll_wheel.schedule(('links', self.link_monitor), 0)
+        logging.info('Started link monitoring')
+        return 'Started link monitoring'
+
+    def stop_link_monitoring(self):
+        with self.monitor_lock:
+            if self.link_monitor is None:
+                return 'Link monitoring not started'
+            self.link_monitor['stopped'] = True
+            self.link_monitor = None
+            for link in self.link_stats:
+                self._remove_link_series(link)
+            self.link_stats = []
+            self.link_rates = {}
+        self._push()
+        logging.info('Stopped link monitoring')
+        return 'Stopped link monitoring'
+
+    def get_link_utilization(self):
+        """
+        :return: list of dicts {src, dst, src_port, dst_port, bw_mbps, tx_bytes, rate_mbps, utilization} with the values of the last poll of each inter-switch link (rate and utilization are None until the second poll, utilization is None if the link bandwidth is not limited)
+        """
+        return self.link_stats
 
-                # query Ryu
+    def get_link_metrics(self):
+        """
+        Poll the port counters of all inter-switch links (one port stats
+        request per switch or one read of the interface counters) and
+        compute their utilization.
+        """
+        # rate histories of the running link monitoring, the new dict is
+        # swapped in together with the polled values
+        with self.monitor_lock:
+            monitor = self.link_monitor
+            link_rates = self.link_rates
+        rates = {}
+
+        graph = self.net.DCNetwork_graph
+        switches = {}
+        for name in graph.nodes():
+            try:
+                node = self.net.getNodeByName(name)
+            except KeyError:
+                continue
+            if isinstance(node, OVSSwitch):
+                switches[name] = node
+        # the tx counter of the source port measures one direction
+        links = {}
+        for src, dst, edge in graph.edges(data=True):
+            if src in switches and dst in switches:
+                dpid = int(str(switches[src].dpid), 16)
+                links.setdefault(dpid, []).append((src, dst, edge))
+                # keep the history of all links in the topology (also if
+                # a stats request fails), drop the one of removed links
+                key = (src, edge['src_port_nr'])
+                if key in link_rates:
+                    rates[key] = link_rates[key]
+
+        polled = []
+        for src, dst, edge, port_stat, monitor_time in \
+                self._link_port_stats(links):
+            if port_stat is None:
+                continue
+            tx_bytes = int(port_stat['tx_bytes'])
+            key = (src, edge['src_port_nr'])
+            if key not in rates:
+                rates[key] = RateHistory(self.rate_history)
+            rate = rates[key].update(tx_bytes, monitor_time)
+            polled.append({
+                'src': src, 'dst': dst,
+                'src_port': edge['src_port_name'],
+                'dst_port': edge['dst_port_name'],
+                'bw_mbps': edge.get('bw_mbps'),
+                'tx_bytes': tx_bytes,
+                'rate_mbps': rate * 8 / 1000000.0 if rate is not None else None,
+                'utilization': link_utilization(rate, edge.get('bw_mbps'))})
+
+        with self.monitor_lock:
+            # stopped (and maybe restarted) during the requests
+            if monitor is None or self.link_monitor is not monitor:
+                return
+            current = set((link['src'], link['dst'], link['src_port'])
+                          for link in polled)
+            for link in self.link_stats:
+                if (link['src'], link['dst'], link['src_port']) not in current:
+                    # link removed from the topology
+                    self._remove_link_series(link)
+            for link in polled:
+                labels = dict(src=link['src'], dst=link['dst'],
+                              src_port=link['src_port'])
+                self.prom_link_tx_bytes.labels(**labels).set(link['tx_bytes'])
+                if link['utilization'] is not None:
+                    self.prom_link_utilization.labels(**labels).set(
+                        link['utilization'])
+            self.link_stats = polled
+            self.link_rates = rates
+
+    def _link_port_stats(self, links):
+        # yield (src, dst, edge, port stats of the source port, time of
+        # the measurement) for the links grouped by source dpid
+        if self.port_counters == 'netdev':
+            try:
+                counters = self.netdev.counters()
+            except (IOError, OSError):
+                logging.exception('reading the interface counters failed')
+                return
+            monitor_time = time.time()
+            for edges in links.values():
+                for src, dst, edge in edges:
+                    yield src, dst, edge, \
+                        counters.get(edge['src_port_name']), monitor_time
+            return
+
+        for dpid, edges in links.items():
+            try:
                 ret = self.net.ryu_REST('stats/port', dpid=dpid)
-                if isinstance(ret, dict):
-                    port_stat_dict = ret
-                elif isinstance(ret, basestring):
-                    port_stat_dict = ast.literal_eval(ret.rstrip())
-                else:
-                    port_stat_dict = None
-
-                metric_list = [metric_dict for metric_dict in self.network_metrics
-                               if int(metric_dict['switch_dpid']) == int(dpid)]
+                port_stat_dict = self._stats_reply(ret)
+            except Exception:
+                logging.exception('port stats request to {0} failed'.format(dpid))
+                continue
+            if port_stat_dict is None:
+                continue
+            port_index = index_port_stats(port_stat_dict.get(str(dpid)))
+            for src, dst, edge in edges:
+                port_stat = port_index.get(int(edge['src_port_nr']))
+                yield src, dst, edge, port_stat, _port_uptime(port_stat)
 
-                for metric_dict in metric_list:
-                    self.set_network_metric(metric_dict, port_stat_dict)
+    def _remove_link_series(self, link):
+        for gauge in (self.prom_link_tx_bytes, self.prom_link_utilization):
+            try:
+                gauge.remove(link['src'], link['dst'], link['src_port'])
+            except KeyError:
+                pass
 
+    def get_compute_metrics(self):
+        """
+        Export the CPU, memory and block I/O usage of all VNF containers,
+        read from their cgroups.
+        """
+        vnf_names = set()
+        # snapshot, containers are added and removed by other threads
+        containers = list(self.net.getAllContainers())
+        for container in containers:
+            pid = getattr(container, 'pid', None)
+            if pid is None:
+                continue
             try:
-                if len(self.network_metrics) > 0:
-                    pushadd_to_gateway(
-                        self.pushgateway, job='sonemu-SDNcontroller', registry=self.registry)
-            except Exception as e:
-                logging.warning(
-                    "Pushgateway not reachable: {0} {1}".format(Exception, e))
-
-            self.monitor_lock.release()
-            time.sleep(1)
-
-    # add metric to the list to export to Prometheus, parse the Ryu port-stats
-    # reply
-    def set_network_metric(self, metric_dict, port_stat_dict):
+                stats = self.cgroups.stats(pid)
+            except (IOError, OSError, ValueError) as ex:
+                # container stopped meanwhile
+                logging.debug('cgroup stats of {0} not available: {1}'.format(
+                    container.name, ex))
+                continue
+            for metric_key, value in stats.items():
+                if value is None:
+                    continue
+                self.prom_compute_metrics[metric_key].\
+                    labels(vnf_name=container.name).set(value)
+            vnf_names.add(container.name)
+
+        # drop the series of removed containers
+        for vnf_name in self.compute_exported - vnf_names:
+            for gauge in self.prom_compute_metrics.values():
+                try:
+                    gauge.remove(vnf_name)
+                except KeyError:
+                    pass
+        self.compute_exported = vnf_names
+
+    def _stats_reply(self, ret):
+        # Ryu replies are parsed json or (older versions) a python literal
+        if isinstance(ret, dict):
+            return ret
+        elif isinstance(ret, basestring):
+            return ast.literal_eval(ret.rstrip())
+        return None
+
+    def _add_metric(self, lock, name, metric_dict):
+        # copy-on-write, the polling threads keep their snapshot
+        with lock:
+            setattr(self, name, getattr(self, name) + (metric_dict,))
+
+    def _remove_metrics(self, lock, name, selected):
+        """
+        Unregister the monitored metrics for which selected(metric_dict) is
+        true and drop their series.
+        :param lock: lock of the metric list
+        :param name: 'network_metrics' or 'flow_metrics'
+        :return: list of removed metric dicts
+        """
+        with lock:
+            metrics = getattr(self, name)
+            removed = [m for m in metrics if selected(m)]
+            if len(removed) == 0:
+                return removed
+            setattr(self, name, tuple(m for m in metrics if not selected(m)))
+            for metric_dict in removed:
+                # a polling thread may still hold the metric in its snapshot
+                metric_dict['stopped'] = True
+                self._remove_series(
+                    metric_dict['metric_key'], metric_dict['vnf_name'],
+                    metric_dict['vnf_interface'], metric_dict.get('cookie'))
+        self._push()
+        return removed
+
+    def _remove_series(self, metric_key, vnf_name, vnf_interface,
+                       flow_id=None):
+        """
+        Remove the series of one monitored interface/flow from the registry.
+        """
+        try:
+            # label values in the order of the Gauge definition
+            self.prom_metrics[metric_key].remove(
+                vnf_name, vnf_interface, flow_id)
+        except KeyError:
+            # no value was exported yet
+            pass
+        with self.rate_lock:
+            self.rates.pop((vnf_name, vnf_interface, metric_key,
+                            None if flow_id is None else str(flow_id)), None)
+
+    def _push(self):
+        # the pushgateway is optional, Prometheus normally scrapes the
+        # exporter endpoint
+        if self.pushgateway is None:
+            return
+        try:
+            # replace the complete group, this also drops removed series
+            push_to_gateway(
+                self.pushgateway, job='sonemu-SDNcontroller', registry=self.registry)
+        except Exception as e:
+            logging.warning(
+                "Pushgateway not reachable: {0} {1}".format(Exception, e))
+
+    # add metric to the list to export to Prometheus, use the counters of
+    # the switch port (Ryu port-stats or interface counters) and the time
+    # of the measurement
+    def set_network_metric(self, metric_dict, port_stat, monitor_time):
         # vnf tx is the datacenter switch rx and vice-versa
         metric_key = self.switch_tx_rx(metric_dict['metric_key'])
         switch_dpid = metric_dict['switch_dpid']
         vnf_name = metric_dict['vnf_name']
         vnf_interface = metric_dict['vnf_interface']
-        previous_monitor_time = metric_dict['previous_monitor_time']
         mon_port = metric_dict['mon_port']
-        for port_stat in port_stat_dict[str(switch_dpid)]:
-            # ovs output also gives back 'LOCAL' port
-            if port_stat['port_no'] == 'LOCAL':
-                continue
-            if int(port_stat['port_no']) == int(mon_port):
-                port_uptime = port_stat['duration_sec'] + \
-                    port_stat['duration_nsec'] * 10 ** (-9)
-                this_measurement = int(port_stat[metric_key])
-
-                # set prometheus metric
-                self.prom_metrics[metric_dict['metric_key']].\
-                    labels(vnf_name=vnf_name, vnf_interface=vnf_interface, flow_id=None).\
-                    set(this_measurement)
-
-                # also the rate is calculated here, but not used for now
-                # (rate can be easily queried from prometheus also)
-                if previous_monitor_time <= 0 or previous_monitor_time >= port_uptime:
-                    metric_dict['previous_measurement'] = int(
-                        port_stat[metric_key])
-                    metric_dict['previous_monitor_time'] = port_uptime
-                    # do first measurement
-                    # time.sleep(1)
-                    # self.monitor_lock.release()
-                    # rate cannot be calculated yet (need a first measurement)
-                metric_dict['previous_measurement'] = this_measurement
-                metric_dict['previous_monitor_time'] = port_uptime
-                return
+        if port_stat is not None:
+            this_measurement = int(port_stat[metric_key])
+
+            # set prometheus metric
+            self.prom_metrics[metric_dict['metric_key']].\
+                labels(vnf_name=vnf_name, vnf_interface=vnf_interface, flow_id=None).\
+                set(this_measurement)
+
+            # also the rate is calculated here (based on the port uptime)
+            self._rate_history(
+                metric_dict['metric_key'], vnf_name, vnf_interface).\
+                update(this_measurement, monitor_time)
+            self._adapt_interval(metric_dict, this_measurement)
+            return
 
         logging.exception('metric {0} not found on {1}:{2}'.format(
             metric_key, vnf_name, vnf_interface))
         logging.exception(
-            'monport:{0}, dpid:{1}'.format(mon_port, switch_dpid))
+            'monport:{0}, dpid:{1}, intf:{2}'.format(
+                mon_port, switch_dpid, metric_dict.get('mon_intf')))
         logging.exception(
             'monitored network_metrics:{0}'.format(self.network_metrics))
-        logging.exception('port dict:{0}'.format(port_stat_dict))
         return 'metric {0} not found on {1}:{2}'.format(
             metric_key, vnf_name, vnf_interface)
 
-    def set_flow_metric(self, metric_dict, flow_stat_dict):
+    def set_flow_metric(self, metric_dict, flow_index):
         # vnf tx is the datacenter switch rx and vice-versa
         metric_key = metric_dict['metric_key']
-        switch_dpid = metric_dict['switch_dpid']
         vnf_name = metric_dict['vnf_name']
         vnf_interface = metric_dict['vnf_interface']
         cookie = metric_dict['cookie']
 
-        counter = 0
-        for flow_stat in flow_stat_dict[str(switch_dpid)]:
-            if 'bytes' in metric_key:
-                counter += flow_stat['byte_count']
-            elif 'packet' in metric_key:
-                counter += flow_stat['packet_count']
+        # the flow stats of the switch (indexed by cookie) also contain
+        # the flows of other monitored flows/ports
+        counter = flow_counter(
+            flow_index, cookie, metric_key, metric_dict['mon_port'])
 
         # flow_uptime disabled for now (can give error)
         # flow_stat = flow_stat_dict[str(switch_dpid)][0]
@@ -488,6 +901,45 @@ class DCNetworkMonitor():
             labels(vnf_name=vnf_name, vnf_interface=vnf_interface, flow_id=cookie). \
             set(counter)
 
+        self._rate_history(metric_key, vnf_name, vnf_interface, cookie).\
+            update(counter, time.time())
+        self._adapt_interval(metric_dict, counter)
+
+    def _rate_history(self, metric_key, vnf_name, vnf_interface,
+                      flow_id=None):
+        key = (vnf_name, vnf_interface, metric_key,
+               None if flow_id is None else str(flow_id))
+        with self.rate_lock:
+            if key not in self.rates:
+                self.rates[key] = RateHistory(self.rate_history)
+            return self.rates[key]
+
+    def get_rates(self, vnf_name=None, vnf_interface=None, metric=None,
+                  cookie=None, seconds=None):
+        """
+        Return the current rate and the recent rate history of the
+        monitored metrics (all if no filter is given).
+        :param cookie: only return the rates of the monitored flows with this cookie
+        :param seconds: only return the history of the last seconds (complete history if None)
+        :return: list of dicts {vnf_name, vnf_interface, metric, cookie, rate, history}, rates in packets or bytes per second
+        """
+        with self.rate_lock:
+            rates = sorted(self.rates.items())
+        ret = []
+        for (name, interface, metric_key, flow_id), history in rates:
+            if (vnf_name is not None and name != vnf_name) or \
+                    (vnf_interface is not None and interface != vnf_interface) or \
+                    (metric is not None and metric_key != metric) or \
+                    (cookie is not None and flow_id != str(cookie)):
+                continue
+            ret.append({'vnf_name': name,
+                        'vnf_interface': interface,
+                        'metric': metric_key,
+                        'cookie': flow_id,
+                        'rate': history.current(),
+                        'history': history.history(seconds)})
+        return ret
+
     def start_Prometheus(self, port=9090):
         # prometheus.yml configuration file is located in the same directory as
         # this file
@@ -542,7 +994,9 @@ class DCNetworkMonitor():
         # stop the monitoring thread
         self.start_monitoring = False
         self.monitor_thread.join()
-        self.monitor_flow_thread.join()
+
+        if self.exporter is not None:
+            self.exporter.stop()
 
         # these containers are used for monitoring but are started now outside
         # of son-emu
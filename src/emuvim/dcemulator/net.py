@@ -29,15 +29,36 @@ import re
 import requests
 import os
 import json
+import socket
+import sys
+import threading
+import zlib
 import networkx as nx
+from collections import OrderedDict
+from distutils.spawn import find_executable
 from subprocess import Popen
 # from gevent import monkey
 from mininet.net import Containernet
 from mininet.node import OVSSwitch, OVSKernelSwitch, Docker, RemoteController
 from mininet.cli import CLI
 from mininet.link import TCLink
+from mininet.util import ipAdd, macColonHex
 from mininet.clean import cleanup
-from emuvim.dcemulator.monitoring import DCNetworkMonitor
+from emuvim.dcemulator.monitoring import DCNetworkMonitor, \
+    PROMETHEUS_EXPORTER_PORT
+from emuvim.dcemulator.flowbatch import RyuFlowBatch, DpctlFlowBatch, \
+    VsctlBatch
+from emuvim.dcemulator.vlan import VlanAllocator
+from emuvim.dcemulator.chain import ChainRegistry
+from emuvim.dcemulator.elan import ElanManager
+from emuvim.dcemulator.flowtable import ShadowFlowTable, parse_ofctl_dump, \
+    parse_ryu_stats
+from emuvim.dcemulator.linkmetrics import link_metrics, widest_path, \
+    path_delay_us, residual_bw, edge_load, ROUTING_OBJECTIVES, MIN_HOPS, \
+    MIN_DELAY, MAX_BW, LEGACY_WEIGHTS, ECMP_MODES, ECMP_HASH, \
+    ECMP_LEAST_LOADED, LINK_PARAM_METRICS
+from emuvim.dcemulator.ryurpc import RyuRpcClient, RyuRpcError, \
+    RyuRpcReplyError
 from emuvim.dcemulator.node import Datacenter, EmulatorCompute
 from emuvim.dcemulator.resourcemodel import ResourceModelRegistrar
 
@@ -48,6 +69,21 @@ from emuvim.dcemulator.resourcemodel import ResourceModelRegistrar
 LOG = logging.getLogger("dcemulator.net")
 LOG.setLevel(logging.DEBUG)
 
+# Ryu controller started by son-emu
+RYU_OF_PORT = 6653
+RYU_PID_FILE = '/tmp/son-emu-ryu.pid'
+# max. time to wait for a starting Ryu controller to become ready (seconds)
+RYU_STARTUP_TIMEOUT = 30
+
+# setChain arguments stored with a chain to set it up again on another path
+CHAIN_ARGS = ('cookie', 'match', 'priority', 'objective', 'weight', 'ecmp',
+              'bw', 'skip_vlan_tag', 'mod_dl_dst', 'table_id')
+
+# ofctl_rest calls that can be sent over the Ryu RPC channel
+RYU_RPC_PREFIXES = ('stats/flowentry/add', 'stats/flowentry/delete',
+                    'stats/flowentry/delete_strict', 'stats/flow',
+                    'stats/port')
+
 # default CPU period used for cpu percentage-based cfs values (microseconds)
 CPU_PERIOD = 1000000
 
@@ -72,25 +108,64 @@ class DCNetwork(Containernet):
                  # functionality
                  dc_emulation_max_cpu=1.0,  # fraction of overall CPU time for emulation
                  dc_emulation_max_mem=512,  # emulation max mem in MB
+                 ofctl_bundle=False,
+                 vlan_reuse=False,
+                 ryu_rpc=False,
+                 reuse_ryu=False,
+                 ovs_batch=False,
+                 monitor_port=PROMETHEUS_EXPORTER_PORT,
+                 monitor_pushgateway=False,
+                 monitor_cadvisor=False,
+                 monitor_links=False,
+                 monitor_port_counters=None,
                  **kwargs):
         """
         Create an extended version of a Containernet network
         :param dc_emulation_max_cpu: max. CPU time used by containers in data centers
+        :param ofctl_bundle: apply batched ovs-ofctl flow entries as atomic OpenFlow 1.4 bundles (no Ryu only)
+        :param vlan_reuse: allow chains on switch-disjoint paths to use the same vlan tag
+        :param ryu_rpc: send flow entries and stats requests to Ryu over the local RPC socket instead of REST
+        :param reuse_ryu: attach to a running Ryu controller started by son-emu (with the same apps) instead of restarting it, and keep it running on stop
+        :param ovs_batch: configure the OVS bridges and ports added before start() with a few ovs-vsctl calls instead of one per bridge/port
+        :param monitor_port: port of the Prometheus /metrics endpoint of the monitoring agent
+        :param monitor_pushgateway: also push the monitored metrics to a Prometheus pushgateway container
+        :param monitor_cadvisor: also start a cAdvisor container (the VNF resource usage is exported by the monitoring agent)
+        :param monitor_links: monitor the utilization of all links between switches from the start
+        :param monitor_port_counters: 'ryu' (port stats of the controller) or 'netdev' (interface counters of the host, also works without Ryu), default: 'ryu' if the Ryu controller is used
         :param kwargs: path through for Mininet parameters
         :return:
         """
         # members
         self.dcs = {}
+        # containers of all data centers, {name: EmulatorCompute}
+        self.dc_containers = OrderedDict()
         self.ryu_process = None
         # list of deployed nsds.E_Lines and E_LANs (uploaded from the dummy
         # gatekeeper)
         self.deployed_nsds = []
         self.deployed_elines = []
         self.deployed_elans = []
-        self.installed_chains = []
+        # chains installed with setChain
+        self.chain_registry = ChainRegistry()
+        self.ofctl_bundle = ofctl_bundle
+        self.reuse_ryu = reuse_ryu
+        self.ovs_batch = ovs_batch
+        self.started = False
+        # ovs-vsctl commands to be applied when the network is started
+        self._start_vsctl = VsctlBatch()
+
+        # link to Ryu REST_API
+        ryu_ip = 'localhost'
+        ryu_port = '8080'
+        self.ryu_REST_api = 'http://{0}:{1}'.format(ryu_ip, ryu_port)
+        self.RyuSession = requests.Session()
+        # local RPC channel to the son-emu Ryu app (falls back to REST)
+        self.ryu_rpc = RyuRpcClient() if ryu_rpc else None
 
         # always cleanup environment before we start the emulator
-        self.killRyu()
+        # (a reusable Ryu controller is checked in startRyu)
+        if not reuse_ryu:
+            self.killRyu()
         cleanup()
 
         # call original Docker.__init__ and setup default controller
@@ -115,19 +190,44 @@ class DCNetwork(Containernet):
 
         # graph of the complete DC network
         self.DCNetwork_graph = nx.MultiDiGraph()
+        # protects the graph, the node lists, the container index and the
+        # IP/MAC assignment against concurrent addDocker calls and readers
+        # in other threads (monitor)
+        self._graph_lock = threading.Lock()
+
+        # cache of computed shortest paths between switches
+        # key: (src_sw, dst_sw, weight), only valid for the topology version
+        # it was computed for, every graph mutation bumps the version
+        self.topology_version = 0
+        self._path_cache = {}
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
+
+        # index of the switch ports each node interface is connected to
+        # {node_name: OrderedDict(intf id or name: port dict)}
+        # the first entry of each node is its default interface
+        self._intf_index = {}
 
         # initialize pool of vlan tags to setup the SDN paths
-        self.vlans = range(1, 4095)[::-1]
+        self.vlans = VlanAllocator(reuse_disjoint_paths=vlan_reuse)
+        # E-LANs set up with setLAN
+        self.elans = ElanManager(self)
 
-        # link to Ryu REST_API
-        ryu_ip = 'localhost'
-        ryu_port = '8080'
-        self.ryu_REST_api = 'http://{0}:{1}'.format(ryu_ip, ryu_port)
-        self.RyuSession = requests.Session()
+        # open flow batch (flow entries are staged here instead of being
+        # sent to Ryu or ovs-ofctl one by one)
+        self._flow_batch = None
+
+        # flow entries installed by son-emu on each switch
+        self.flow_table = ShadowFlowTable()
 
         # monitoring agent
         if monitor:
-            self.monitor_agent = DCNetworkMonitor(self)
+            self.monitor_agent = DCNetworkMonitor(
+                self, exporter_port=monitor_port,
+                pushgateway=monitor_pushgateway, cadvisor=monitor_cadvisor,
+                port_counters=monitor_port_counters)
+            if monitor_links:
+                self.monitor_agent.setup_link_monitoring()
         else:
             self.monitor_agent = None
 
@@ -147,6 +247,7 @@ class DCNetwork(Containernet):
         dc.net = self  # set reference to network
         self.dcs[label] = dc
         dc.create()  # finally create the data center in our Mininet instance
+        self._bump_topology_version()
         LOG.info("added data center: %s" % label)
         return dc
 
@@ -219,6 +320,8 @@ class DCNetwork(Containernet):
             else:
                 attr_number = None
             attr_dict[attr] = attr_number
+        # typed metrics (delay_us, bw_mbps, ...) used for routing
+        attr_dict.update(link_metrics(params))
 
         attr_dict2 = {'src_port_id': node1_port_id, 'src_port_nr': node1.ports[link.intf1],
                       'src_port_name': node1_port_name,
@@ -235,48 +338,168 @@ class DCNetwork(Containernet):
         attr_dict2.update(attr_dict)
         self.DCNetwork_graph.add_edge(
             node2.name, node1.name, attr_dict=attr_dict2)
+        self._bump_topology_version()
+
+        # update the interface index in both directions
+        self._index_intf(node1.name, node1_port_id, node1_port_name,
+                         node2.name, node2.ports[link.intf2], node2_port_name)
+        self._index_intf(node2.name, node2_port_id, node2_port_name,
+                         node1.name, node1.ports[link.intf1], node1_port_name)
 
         LOG.debug("addLink: n1={0} intf1={1} -- n2={2} intf2={3}".format(
             str(node1), node1_port_name, str(node2), node2_port_name))
 
         return link
 
-    def removeLink(self, link=None, node1=None, node2=None):
+    def removeLink(self, link=None, node1=None, node2=None, reroute=True):
         """
         Remove the link from the Containernet and the networkx graph
+        :param reroute: move the chains that used this link to other paths
+        :return: list of rerouted chains (see rerouteChains)
         """
         if link is not None:
             node1 = link.intf1.node
             node2 = link.intf2.node
         assert node1 is not None
         assert node2 is not None
+        if link is None:
+            # the link Containernet is going to remove
+            link = self._find_link(node1, node2)
         Containernet.removeLink(self, link=link, node1=node1, node2=node2)
-        # TODO we might decrease the loglevel to debug:
-        try:
-            self.DCNetwork_graph.remove_edge(node2.name, node1.name)
-        except BaseException:
-            LOG.warning("%s, %s not found in DCNetwork_graph." %
-                        ((node2.name, node1.name)))
-        try:
-            self.DCNetwork_graph.remove_edge(node1.name, node2.name)
-        except BaseException:
-            LOG.warning("%s, %s not found in DCNetwork_graph." %
-                        ((node1.name, node2.name)))
+        removed_edges = []
+        for n1, n2 in [(node2, node1), (node1, node2)]:
+            key = self._find_edge_key(n1, n2, link)
+            # TODO we might decrease the loglevel to debug:
+            try:
+                self.DCNetwork_graph.remove_edge(n1.name, n2.name, key=key)
+                removed_edges.append((n1.name, n2.name, key))
+            except BaseException:
+                LOG.warning("%s, %s not found in DCNetwork_graph." %
+                            ((n1.name, n2.name)))
+        self._bump_topology_version()
+        # only the interfaces of the removed link, the node can have other
+        # (parallel) links to the same switch
+        self._unindex_intf(node1.name, link.intf1.name)
+        self._unindex_intf(node2.name, link.intf2.name)
+        if not reroute:
+            return []
+        return self.rerouteChains(removed_edges)
+
+    def _find_link(self, node1, node2):
+        """
+        Returns the first link between two nodes or None.
+        """
+        for link in self.links:
+            if (link.intf1.node, link.intf2.node) in [(node1, node2), (node2, node1)]:
+                return link
+        return None
+
+    def _find_edge_key(self, node1, node2, link):
+        """
+        Returns the key of the graph edge node1 -> node2 that belongs to
+        the given link, None if it is unknown.
+        """
+        if link is None:
+            return None
+        intf_names = [link.intf1.name, link.intf2.name]
+        for key, edge in self.DCNetwork_graph.get_edge_data(
+                node1.name, node2.name, default={}).items():
+            if edge.get('src_port_name') in intf_names and \
+                    edge.get('dst_port_name') in intf_names:
+                return key
+        return None
+
+    def setLinkParams(self, node1, node2, reroute=True, **params):
+        """
+        Change the TCLink parameters (delay, bw, loss, jitter) of the
+        links between two switches at runtime.
+        :param reroute: check if the chains that use the links are still
+                        on their best path and move them if not
+        :return: list of rerouted chains (see rerouteChains)
+        """
+        if isinstance(node1, basestring):
+            node1 = self.getNodeByName(node1)
+        if isinstance(node2, basestring):
+            node2 = self.getNodeByName(node2)
+        changed_edges = []
+        for link in self.links:
+            if (link.intf1.node, link.intf2.node) not in [(node1, node2), (node2, node1)]:
+                continue
+            for intf in [link.intf1, link.intf2]:
+                # TCIntf.config resets all parameters that are not given
+                intf_params = dict(getattr(intf, 'params', {}))
+                intf_params.update(params)
+                intf.config(**intf_params)
+                intf.params = intf_params
+            metrics = link_metrics(params)
+            for n1, n2 in [(node1, node2), (node2, node1)]:
+                key = self._find_edge_key(n1, n2, link)
+                if key is None:
+                    continue
+                edge = self.DCNetwork_graph[n1.name][n2.name][key]
+                for param, attr in LINK_PARAM_METRICS.items():
+                    if param in params:
+                        edge[attr] = metrics[attr]
+                        match = re.search(
+                            '([0-9]*\.?[0-9]+)', str(params[param]))
+                        edge[param] = match.group(1) if match else None
+                changed_edges.append((n1.name, n2.name, key))
+        self._bump_topology_version()
+        if not reroute:
+            return []
+        return self.rerouteChains(changed_edges, keep_unchanged=True)
 
     def addDocker(self, label, **params):
         """
         Wrapper for addDocker method to use custom container class.
+        Can be called from multiple threads (see Datacenter.startComputeBatch):
+        the IP/MAC assignment and the node registration of Mininet's addHost
+        are done under the graph lock, only the (slow) container creation
+        runs in parallel.
+        """
+        with self._graph_lock:
+            self.DCNetwork_graph.add_node(
+                label, type=params.get('type', 'docker'))
+            self._bump_topology_version()
+            defaults = self._nextHostDefaults()
+        defaults.update(params)
+        d = EmulatorCompute(label, **defaults)
+        with self._graph_lock:
+            self.hosts.append(d)
+            self.nameToNode[label] = d
+        return d
+
+    def _nextHostDefaults(self):
+        """
+        Default IP, MAC and CPU core of the next host (same as Mininet's
+        addHost), the caller must hold the graph lock.
         """
-        self.DCNetwork_graph.add_node(label, type=params.get('type', 'docker'))
-        return Containernet.addDocker(
-            self, label, cls=EmulatorCompute, **params)
+        defaults = {'ip': ipAdd(self.nextIP,
+                                ipBaseNum=self.ipBaseNum,
+                                prefixLen=self.prefixLen) +
+                    '/%s' % self.prefixLen}
+        if self.autoSetMacs:
+            defaults['mac'] = macColonHex(self.nextIP)
+        if self.autoPinCpus:
+            defaults['cores'] = self.nextCore
+            self.nextCore = (self.nextCore + 1) % self.numCores
+        self.nextIP += 1
+        return defaults
 
     def removeDocker(self, label, **params):
         """
         Wrapper for removeDocker method to update graph.
+        Runs under the graph lock, Containernet also removes the node from
+        the host list and the name index that addDocker appends to.
+        The chains of the container are removed with it.
         """
-        self.DCNetwork_graph.remove_node(label)
-        return Containernet.removeDocker(self, label, **params)
+        self._removeNodeChains(label)
+        with self._graph_lock:
+            self.DCNetwork_graph.remove_node(label)
+            self._bump_topology_version()
+            self._intf_index.pop(label, None)
+            self.dc_containers.pop(label, None)
+            return Containernet.removeDocker(self, label, **params)
 
     def addExtSAP(self, sap_name, sap_ip, **params):
         """
@@ -284,14 +507,20 @@ class DCNetwork(Containernet):
         """
         # make sure that 'type' is set
         params['type'] = params.get('type', 'sap_ext')
-        self.DCNetwork_graph.add_node(sap_name, type=params['type'])
+        with self._graph_lock:
+            self.DCNetwork_graph.add_node(sap_name, type=params['type'])
+            self._bump_topology_version()
         return Containernet.addExtSAP(self, sap_name, sap_ip, **params)
 
     def removeExtSAP(self, sap_name, **params):
         """
         Wrapper for removeExtSAP method to remove SAP  also from graph.
         """
-        self.DCNetwork_graph.remove_node(sap_name)
+        self._removeNodeChains(sap_name)
+        with self._graph_lock:
+            self.DCNetwork_graph.remove_node(sap_name)
+            self._bump_topology_version()
+            self._intf_index.pop(sap_name, None)
         return Containernet.removeExtSAP(self, sap_name)
 
     def addSwitch(self, name, add_to_graph=True, **params):
@@ -301,8 +530,10 @@ class DCNetwork(Containernet):
 
         # add this switch to the global topology overview
         if add_to_graph:
-            self.DCNetwork_graph.add_node(
-                name, type=params.get('type', 'switch'))
+            with self._graph_lock:
+                self.DCNetwork_graph.add_node(
+                    name, type=params.get('type', 'switch'))
+                self._bump_topology_version()
 
         # set the learning switch behavior
         if 'failMode' in params:
@@ -310,25 +541,76 @@ class DCNetwork(Containernet):
         else:
             failMode = self.failMode
 
+        protocols = 'OpenFlow10,OpenFlow12,OpenFlow13'
+        if self.ofctl_bundle:
+            # ovs-ofctl --bundle needs OpenFlow 1.4
+            protocols += ',OpenFlow14'
+
+        if self.ovs_batch and not self.started and issubclass(
+                params.get('cls') or self.switch, OVSSwitch):
+            # queue the bridge setup, done by OVSSwitch.batchStartup
+            params.setdefault('batch', True)
+
         s = Containernet.addSwitch(
-            self, name, protocols='OpenFlow10,OpenFlow12,OpenFlow13', failMode=failMode, **params)
+            self, name, protocols=protocols, failMode=failMode, **params)
 
         return s
 
+    def _removeNodeChains(self, name):
+        """
+        Remove the chains from or to a container or SAP that is removed:
+        their flow entries, vlan tags and bandwidth reservations.
+        """
+        chains = self.chain_registry.remove_vnf(name)
+        if len(chains) == 0:
+            return
+        LOG.info("Removing {0} chains of {1}".format(len(chains), name))
+        own_batch = self._begin_flow_batch()
+        try:
+            self._chainDelFlow(chains)
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+
     def getAllContainers(self):
         """
         Returns a list with all containers within all data centers.
+        The list is a snapshot, it can be used by other threads (e.g. the
+        monitor) while containers are added or removed.
         """
-        all_containers = []
-        for dc in self.dcs.itervalues():
-            all_containers += dc.listCompute()
-        return all_containers
+        with self._graph_lock:
+            return list(self.dc_containers.itervalues())
+
+    def getContainer(self, name):
+        """
+        Returns the container with the given name running in any
+        data center or None.
+        """
+        return self.dc_containers.get(name)
 
     def start(self):
         # start
         for dc in self.dcs.itervalues():
             dc.start()
         Containernet.start(self)
+        self.started = True
+        if len(self._start_vsctl) > 0:
+            self._start_vsctl.commit()
+
+    def setPortVlan(self, node, port_name, tag):
+        """
+        Make a switch port an access port of the given vlan.
+        Before the network is started, the tags of all ports are collected
+        and set with a single ovs-vsctl call by start().
+        :param node: switch (node or name)
+        :param port_name: name of the switch port (interface)
+        """
+        if isinstance(node, basestring):
+            node = self.getNodeByName(node)
+        if self.started:
+            self._set_vlan_tag(node, port_name, tag)
+        else:
+            self._start_vsctl.add('set', 'port', port_name, 'tag=%s' % tag)
 
     def stop(self):
 
@@ -340,7 +622,10 @@ class DCNetwork(Containernet):
         Containernet.stop(self)
 
         # stop Ryu controller
-        self.killRyu()
+        if self.ryu_rpc is not None:
+            self.ryu_rpc.close()
+        if not self.reuse_ryu:
+            self.killRyu()
 
     def CLI(self):
         CLI(self)
@@ -348,42 +633,27 @@ class DCNetwork(Containernet):
     def setLAN(self, vnf_list):
         """
         setup an E-LAN network by assigning the same VLAN tag to each DC interface of the VNFs in the E-LAN
+        (one ovs-vsctl transaction per switch)
 
         :param vnf_list: names of the VNFs in this E-LAN  [{name:,interface:},...]
-        :return:
+        :return: id of the E-LAN (see removeLAN)
         """
-        src_sw = None
-        src_sw_inport_name = None
+        return self.elans.add(vnf_list)['id']
 
-        # get a vlan tag for this E-LAN
-        vlan = self.vlans.pop()
+    def removeLAN(self, lan_id):
+        """
+        remove an E-LAN network: untag the DC interfaces of its VNFs and give its VLAN tag back
 
-        for vnf in vnf_list:
-            vnf_src_name = vnf['name']
-            vnf_src_interface = vnf['interface']
+        :param lan_id: id returned by setLAN
+        :return: True if the E-LAN existed
+        """
+        return self.elans.remove(lan_id) is not None
 
-            # check if port is specified (vnf:port)
-            if vnf_src_interface is None:
-                # take first interface by default
-                connected_sw = self.DCNetwork_graph.neighbors(vnf_src_name)[0]
-                link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-                vnf_src_interface = link_dict[0]['src_port_id']
-
-            for connected_sw in self.DCNetwork_graph.neighbors(vnf_src_name):
-                link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-                for link in link_dict:
-                    if (link_dict[link]['src_port_id'] == vnf_src_interface or
-                            link_dict[link]['src_port_name'] == vnf_src_interface):  # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                        # found the right link and connected switch
-                        src_sw = connected_sw
-                        src_sw_inport_name = link_dict[link]['dst_port_name']
-                        break
-
-            # set the tag on the dc switch interface
-            LOG.debug('set E-LAN: vnf name: {0} interface: {1} tag: {2}'.format(
-                vnf_src_name, vnf_src_interface, vlan))
-            switch_node = self.getNodeByName(src_sw)
-            self._set_vlan_tag(switch_node, src_sw_inport_name, vlan)
+    def listLANs(self):
+        """
+        Return a list with all E-LANs installed by setLAN.
+        """
+        return self.elans.list()
 
     def getNodeByName(self, name):
         """
@@ -397,6 +667,215 @@ class DCNetwork(Containernet):
             LOG.debug("Node not found: {}".format(ex))
         return None
 
+    def _bump_topology_version(self):
+        """
+        Called after each mutation of DCNetwork_graph.
+        Invalidates all cached paths.
+        """
+        self.topology_version += 1
+        self._path_cache.clear()
+
+    def _get_shortest_path(self, src_sw, dst_sw, weight=None):
+        """
+        Returns the first found shortest path between two switches.
+        Results are cached per topology version.
+        Raises the networkx exception if no path exists.
+        """
+        weight = LEGACY_WEIGHTS.get(weight, weight)
+        key = (src_sw, dst_sw, weight)
+        path = self._path_cache.get(key)
+        if path is not None:
+            self.path_cache_hits += 1
+            return list(path)
+        self.path_cache_misses += 1
+        # if all shortest paths are wanted, use: all_shortest_paths
+        path = nx.shortest_path(
+            self.DCNetwork_graph, src_sw, dst_sw, weight=weight)
+        self._path_cache[key] = tuple(path)
+        return list(path)
+
+    def _get_all_shortest_paths(self, src_sw, dst_sw, weight=None):
+        """
+        Returns all shortest paths between two switches.
+        Results are cached per topology version.
+        """
+        weight = LEGACY_WEIGHTS.get(weight, weight)
+        key = (src_sw, dst_sw, weight, 'all')
+        paths = self._path_cache.get(key)
+        if paths is not None:
+            self.path_cache_hits += 1
+            return [list(path) for path in paths]
+        self.path_cache_misses += 1
+        paths = [tuple(path) for path in nx.all_shortest_paths(
+            self.DCNetwork_graph, src_sw, dst_sw, weight=weight)]
+        self._path_cache[key] = paths
+        return [list(path) for path in paths]
+
+    @staticmethod
+    def _objective_weight(objective, weight):
+        if objective == MIN_DELAY:
+            return 'delay_us'
+        if objective == MIN_HOPS:
+            return None
+        return LEGACY_WEIGHTS.get(weight, weight)
+
+    def _get_path(self, src_sw, dst_sw, objective=None, weight=None,
+                  ecmp=None, chain_hash=0):
+        """
+        Returns the path between two switches that is best for the given
+        routing objective.
+        :param objective: MIN_HOPS, MIN_DELAY or MAX_BW (residual bandwidth),
+                          default: shortest path according to weight
+        :param weight: edge attribute used as weight if no objective is given
+        :param ecmp: choose among all equally good paths by ECMP_HASH or
+                     ECMP_LEAST_LOADED, default: the first found path
+        :param chain_hash: hash of the chain, used for ECMP_HASH
+        """
+        if objective == MAX_BW:
+            # depends on the reserved bandwidth, not cached
+            # only switches forward traffic (e.g. not a VNF attached to
+            # two switches)
+            switches = set(sw.name for sw in self.switches
+                           if isinstance(sw, OVSSwitch))
+            return widest_path(self.DCNetwork_graph, src_sw, dst_sw,
+                               transit=switches)
+        weight = self._objective_weight(objective, weight)
+        if ecmp is None:
+            return self._get_shortest_path(src_sw, dst_sw, weight=weight)
+        paths = self._get_all_shortest_paths(src_sw, dst_sw, weight=weight)
+        if ecmp == ECMP_HASH:
+            return paths[chain_hash % len(paths)]
+        return min(paths, key=self._path_load)
+
+    def _path_load(self, path):
+        """
+        Load of the most loaded link along a path (least loaded one of
+        parallel links).
+        """
+        return max([min(edge_load(e) for e in
+                        self.DCNetwork_graph[path[i]][path[i + 1]].values())
+                    for i in range(0, len(path) - 1)] or [(0.0, 0)])
+
+    def _select_edge(self, src_sw, dst_sw, objective=None, weight=None,
+                     ecmp=None, chain_hash=0):
+        """
+        Returns the key of the graph edge used between two neighboring
+        switches. Among parallel links the best ones for the routing
+        objective are selected by the ecmp mode (default: first link).
+        """
+        edges = self.DCNetwork_graph[src_sw][dst_sw]
+        keys = sorted(edges)
+        if objective == MAX_BW:
+            best = max(residual_bw(edges[k]) for k in keys)
+            keys = [k for k in keys if residual_bw(edges[k]) == best]
+        else:
+            weight = self._objective_weight(objective, weight)
+            if weight is not None:
+                best = min(edges[k].get(weight, 1) for k in keys)
+                keys = [k for k in keys if edges[k].get(weight, 1) == best]
+        if ecmp == ECMP_HASH:
+            return keys[chain_hash % len(keys)]
+        if ecmp == ECMP_LEAST_LOADED:
+            return min(keys, key=lambda k: edge_load(edges[k]))
+        return keys[0]
+
+    @staticmethod
+    def _chain_hash(vnf_src_name, vnf_src_interface,
+                    vnf_dst_name, vnf_dst_interface, cookie=None):
+        """
+        Stable hash of a chain, the same for both directions.
+        """
+        ends = sorted([(vnf_src_name, str(vnf_src_interface)),
+                       (vnf_dst_name, str(vnf_dst_interface))])
+        return zlib.crc32(repr((ends, str(cookie))).encode('utf-8')) & 0xffffffff
+
+    def getPathDelay(self, path):
+        """
+        Returns the total delay in microseconds of the links along a path
+        (list of node names).
+        """
+        return path_delay_us(self.DCNetwork_graph, path)
+
+    def _chain_delay(self, vnf_src_name, vnf_dst_name, path, edges):
+        """
+        Returns the total delay in microseconds of the links used by a
+        chain (graph edges [src, dst, key]) and the links to its VNFs.
+        """
+        return self.getPathDelay([vnf_src_name, path[0]]) + \
+            self.getPathDelay([path[-1], vnf_dst_name]) + \
+            sum(self.DCNetwork_graph[src][dst][key].get('delay_us', 0.0)
+                for src, dst, key in edges)
+
+    def _reserve_edges(self, edges, bw, n_chains):
+        """
+        Add bw (Mbit/s) to the reserved bandwidth and n_chains to the number
+        of chains of the given graph edges ([src, dst, key]).
+        Use negative values to free them again.
+        """
+        for src, dst, key in edges:
+            edge = self.DCNetwork_graph.get_edge_data(src, dst, key)
+            if edge is None:
+                # link was removed
+                continue
+            edge['bw_reserved_mbps'] = edge.get('bw_reserved_mbps', 0.0) + bw
+            edge['n_chains'] = edge.get('n_chains', 0) + n_chains
+            if edge.get('bw_mbps') is not None and \
+                    edge['bw_reserved_mbps'] > edge['bw_mbps']:
+                LOG.warning("Link {0} -> {1} is overbooked: {2} of {3} Mbit/s".format(
+                    src, dst, edge['bw_reserved_mbps'], edge['bw_mbps']))
+
+    def _index_intf(self, node_name, port_id, port_name,
+                    switch_name, switch_port_nr, switch_port_name):
+        """
+        Add a node interface and its connected switch port to the index.
+        The interface can later be found by its id or by its name.
+        """
+        port = {'port_id': port_id, 'port_name': port_name,
+                'switch': switch_name, 'switch_port_nr': switch_port_nr,
+                'switch_port_name': switch_port_name}
+        intfs = self._intf_index.setdefault(node_name, OrderedDict())
+        intfs[port_name] = port
+        intfs[port_id] = port
+
+    def _unindex_intf(self, node_name, port_name):
+        """
+        Remove a node interface (indexed by its id and its name).
+        """
+        intfs = self._intf_index.get(node_name)
+        if intfs is None:
+            return
+        for key in [k for k, port in intfs.items()
+                    if port['port_name'] == port_name]:
+            del intfs[key]
+        if len(intfs) == 0:
+            del self._intf_index[node_name]
+
+    def _get_connected_switch_port(self, node_name, intf=None):
+        """
+        Lookup the switch port to which a node interface is connected.
+        :param node_name: name of the VNF, SAP or switch
+        :param intf: interface id or name (first interface if None)
+        :return: port dict with keys port_id, port_name, switch,
+                 switch_port_nr and switch_port_name or None if not found
+        """
+        intfs = self._intf_index.get(node_name)
+        if not intfs:
+            return None
+        if intf is None:
+            return next(iter(intfs.values()))
+        return intfs.get(intf)
+
+    def getPathCacheStats(self):
+        """
+        Return hit/miss counters of the shortest path cache.
+        """
+        return {
+            "topology_version": self.topology_version,
+            "size": len(self._path_cache),
+            "hits": self.path_cache_hits,
+            "misses": self.path_cache_misses
+        }
+
     def _addMonitorFlow(self, vnf_src_name, vnf_dst_name, vnf_src_interface=None, vnf_dst_interface=None,
                         tag=None, **kwargs):
         """
@@ -421,60 +900,53 @@ class DCNetwork(Containernet):
         LOG.debug("call AddMonitorFlow vnf_src_name=%r, vnf_src_interface=%r, vnf_dst_name=%r, vnf_dst_interface=%r",
                   vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface)
 
-        # check if port is specified (vnf:port)
-        if vnf_src_interface is None:
-            # take first interface by default
-            connected_sw = self.DCNetwork_graph.neighbors(vnf_src_name)[0]
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            vnf_src_interface = link_dict[0]['src_port_id']
-
-        for connected_sw in self.DCNetwork_graph.neighbors(vnf_src_name):
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            for link in link_dict:
-                if (link_dict[link]['src_port_id'] == vnf_src_interface or
-                        link_dict[link]['src_port_name'] == vnf_src_interface):  # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                    # found the right link and connected switch
-                    src_sw = connected_sw
-                    src_sw_inport_nr = link_dict[link]['dst_port_nr']
-                    src_sw_inport_name = link_dict[link]['dst_port_name']
-                    break
-
-        if vnf_dst_interface is None:
-            # take first interface by default
-            connected_sw = self.DCNetwork_graph.neighbors(vnf_dst_name)[0]
-            link_dict = self.DCNetwork_graph[connected_sw][vnf_dst_name]
-            vnf_dst_interface = link_dict[0]['dst_port_id']
+        # check if port is specified (vnf:port), take first by default
+        # we might also get interface names, e.g, from a son-emu-cli call
+        src_port = self._get_connected_switch_port(
+            vnf_src_name, vnf_src_interface)
+        if src_port is not None:
+            if vnf_src_interface is None:
+                vnf_src_interface = src_port['port_id']
+            src_sw = src_port['switch']
+            src_sw_inport_nr = src_port['switch_port_nr']
+            src_sw_inport_name = src_port['switch_port_name']
 
         vnf_dst_name = vnf_dst_name.split(':')[0]
-        for connected_sw in self.DCNetwork_graph.neighbors(vnf_dst_name):
-            link_dict = self.DCNetwork_graph[connected_sw][vnf_dst_name]
-            for link in link_dict:
-                if link_dict[link]['dst_port_id'] == vnf_dst_interface or \
-                        link_dict[link]['dst_port_name'] == vnf_dst_interface:  # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                    # found the right link and connected switch
-                    dst_sw = connected_sw
-                    dst_sw_outport_nr = link_dict[link]['src_port_nr']
-                    dst_sw_outport_name = link_dict[link]['src_port_name']
-                    break
+        dst_port = self._get_connected_switch_port(
+            vnf_dst_name, vnf_dst_interface)
+        if dst_port is not None:
+            if vnf_dst_interface is None:
+                vnf_dst_interface = dst_port['port_id']
+            dst_sw = dst_port['switch']
+            dst_sw_outport_nr = dst_port['switch_port_nr']
+            dst_sw_outport_name = dst_port['switch_port_name']
 
         if not tag >= 0:
             LOG.exception('tag not valid: {0}'.format(tag))
 
-        # get shortest path
-        try:
-            # returns the first found shortest path
-            # if all shortest paths are wanted, use: all_shortest_paths
-            path = nx.shortest_path(
-                self.DCNetwork_graph, src_sw, dst_sw, weight=kwargs.get('weight'))
-        except BaseException:
-            LOG.exception("No path could be found between {0} and {1} using src_sw={2} and dst_sw={3}".format(
-                vnf_src_name, vnf_dst_name, src_sw, dst_sw))
-            LOG.debug("Graph nodes: %r" % self.DCNetwork_graph.nodes())
-            LOG.debug("Graph edges: %r" % self.DCNetwork_graph.edges())
-            for e, v in self.DCNetwork_graph.edges():
-                LOG.debug("%r" % self.DCNetwork_graph[e][v])
-            return "No path could be found between {0} and {1}".format(
-                vnf_src_name, vnf_dst_name)
+        # links between the switches used by the chain {(src, dst): key}
+        chain_edges = {}
+        chain = kwargs.pop('chain', None)
+        if chain is not None:
+            # follow the chain (it might not use the first shortest path)
+            path = chain['path']
+            chain_edges = dict(((src, dst), key)
+                               for src, dst, key in chain['edges'])
+        else:
+            # get shortest path
+            try:
+                # returns the first found shortest path
+                path = self._get_shortest_path(
+                    src_sw, dst_sw, weight=kwargs.get('weight'))
+            except BaseException:
+                LOG.exception("No path could be found between {0} and {1} using src_sw={2} and dst_sw={3}".format(
+                    vnf_src_name, vnf_dst_name, src_sw, dst_sw))
+                LOG.debug("Graph nodes: %r" % self.DCNetwork_graph.nodes())
+                LOG.debug("Graph edges: %r" % self.DCNetwork_graph.edges())
+                for e, v in self.DCNetwork_graph.edges():
+                    LOG.debug("%r" % self.DCNetwork_graph[e][v])
+                return "No path could be found between {0} and {1}".format(
+                    vnf_src_name, vnf_dst_name)
 
         LOG.debug("Creating path between {0} and {1}: {2}".format(
             vnf_src_name, vnf_dst_name, path))
@@ -504,7 +976,7 @@ class DCNetwork(Containernet):
                 return "Next node: {0} is not a switch".format(next_hop)
             else:
                 # take first link between switches by default
-                index_edge_out = 0
+                index_edge_out = chain_edges.get((current_hop, next_hop), 0)
                 switch_outport_nr = self.DCNetwork_graph[current_hop][next_hop][index_edge_out]['src_port_nr']
 
             # set of entry via ovs-ofctl
@@ -544,7 +1016,7 @@ class DCNetwork(Containernet):
 
             # take first link between switches by default
             if isinstance(next_node, OVSSwitch):
-                switch_inport_nr = self.DCNetwork_graph[current_hop][next_hop][0]['dst_port_nr']
+                switch_inport_nr = self.DCNetwork_graph[current_hop][next_hop][index_edge_out]['dst_port_nr']
                 current_hop = next_hop
 
         return "path {2} between {0} and {1}".format(
@@ -569,27 +1041,104 @@ class DCNetwork(Containernet):
         :param tag: vlan tag to be used for this chain (pre-defined or new one if none is specified)
         :param skip_vlan_tag: boolean to indicate if a vlan tag should be appointed to this flow or not
         :param path: custom path between the two VNFs (list of switches)
-        :return: output log string
+        :param objective: routing objective if no path is given: 'min_hops', 'min_delay' or 'max_bw' (max. residual bandwidth)
+        :param bw: bandwidth in Mbit/s reserved for this chain on the links along its path
+        :param ecmp: spread chains over equal cost paths and parallel links: 'hash' (per chain) or 'least_loaded'
+        :return: output log string (incl. the total delay of the path in microseconds)
         """
 
+        t_start = time.time()
+        own_batch = self._begin_flow_batch()
+        batch = self._flow_batch
+        n_chains = len(batch.chains)
+        try:
+            ret = self._setChain(vnf_src_name, vnf_dst_name,
+                                 vnf_src_interface, vnf_dst_interface,
+                                 **kwargs)
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+        for chain in batch.chains[n_chains:]:
+            if chain.get('failed'):
+                ret = "Chain setup failed between {0} and {1}: {2}".format(
+                    vnf_src_name, vnf_dst_name, chain['failed'])
+        LOG.debug("Chain {0}:{1} -> {2}:{3} installed in {4:.3f}s".format(
+            vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface,
+            time.time() - t_start))
+        return ret
+
+    def setChains(self, chain_list, **kwargs):
+        """
+        Install a list of chains. All flow entries are collected first and
+        then sent to the SDN controller with as few requests as possible.
+
+        :param chain_list: list of dicts with the arguments of setChain,
+                           e.g. [{vnf_src_name:, vnf_dst_name:,
+                           vnf_src_interface:, vnf_dst_interface:,
+                           bidirectional:, ...}, ...]
+        :param kwargs: default arguments of setChain for all chains
+        :return: list of dicts with the setChain output ('result'), the
+                 install latency in seconds ('install_time') and the
+                 duration of the setup steps ('timing', one dict per
+                 direction) of each chain
+        """
+        results = []
+        own_batch = self._begin_flow_batch()
+        batch = self._flow_batch
+        try:
+            for chain in chain_list:
+                chain_args = dict(kwargs)
+                chain_args.update(chain)
+                vnf_src_name = chain_args.pop('vnf_src_name')
+                vnf_dst_name = chain_args.pop('vnf_dst_name')
+                t_start = time.time()
+                n_chains = len(batch.chains)
+                ret = self._setChain(vnf_src_name, vnf_dst_name, **chain_args)
+                results.append({'vnf_src_name': vnf_src_name,
+                                'vnf_src_interface': chain_args.get(
+                                    'vnf_src_interface'),
+                                'vnf_dst_name': vnf_dst_name,
+                                'vnf_dst_interface': chain_args.get(
+                                    'vnf_dst_interface'),
+                                'result': ret,
+                                'chains': batch.chains[n_chains:],
+                                'start_time': t_start})
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+        # the chains are only installed when the batch is committed
+        t_end = time.time()
+        for r in results:
+            r['install_time'] = t_end - r.pop('start_time')
+            chains = r.pop('chains')
+            r['timing'] = [chain['timing'] for chain in chains]
+            for chain in chains:
+                if chain.get('failed'):
+                    r['result'] = "Chain setup failed between {0} and {1}: " \
+                        "{2}".format(r['vnf_src_name'], r['vnf_dst_name'],
+                                     chain['failed'])
+        LOG.info("Installed {0} chains in {1:.3f}s".format(
+            len(results),
+            max([r['install_time'] for r in results] or [0])))
+        return results
+
+    def _setChain(self, vnf_src_name, vnf_dst_name,
+                  vnf_src_interface=None, vnf_dst_interface=None, **kwargs):
         # special procedure for monitoring flows
         if kwargs.get('monitor'):
 
             # check if chain already exists
-            found_chains = [chain_dict for chain_dict in self.installed_chains if
-                            (chain_dict['vnf_src_name'] == vnf_src_name and
-                             chain_dict['vnf_src_interface'] == vnf_src_interface and
-                             chain_dict['vnf_dst_name'] == vnf_dst_name and
-                             chain_dict['vnf_dst_interface'] == vnf_dst_interface)]
+            found_chain = self.chain_registry.find(*self._chain_key(
+                vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface))
 
-            if len(found_chains) > 0:
+            if found_chain is not None:
                 # this chain exists, so need an extra monitoring flow
                 # assume only 1 chain per vnf/interface pair
                 LOG.debug('*** installing monitoring chain on top of pre-defined chain from {0}:{1} -> {2}:{3}'.
                           format(vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface))
-                tag = found_chains[0]['tag']
+                tag = found_chain['tag']
                 ret = self._addMonitorFlow(vnf_src_name, vnf_dst_name, vnf_src_interface, vnf_dst_interface,
-                                           tag=tag, table_id=0, **kwargs)
+                                           tag=tag, table_id=0, chain=found_chain, **kwargs)
                 return ret
             else:
                 # no chain existing (or E-LAN) -> install normal chain
@@ -613,6 +1162,30 @@ class DCNetwork(Containernet):
 
         return ret
 
+    def _chain_key(self, vnf_src_name, vnf_src_interface,
+                   vnf_dst_name, vnf_dst_interface):
+        """
+        Return the chain registry key of a VNF pair. Interface names are
+        replaced by their ids, missing interfaces by the default interface.
+        """
+        vnf_dst_name = vnf_dst_name.split(':')[0]
+        src_port = self._get_connected_switch_port(
+            vnf_src_name, vnf_src_interface)
+        if src_port is not None:
+            vnf_src_interface = src_port['port_id']
+        dst_port = self._get_connected_switch_port(
+            vnf_dst_name, vnf_dst_interface)
+        if dst_port is not None:
+            vnf_dst_interface = dst_port['port_id']
+        return (vnf_src_name, vnf_src_interface,
+                vnf_dst_name, vnf_dst_interface)
+
+    def listChains(self):
+        """
+        Return a list with all chains installed by setChain.
+        """
+        return self.chain_registry.list()
+
     def _chainAddFlow(self, vnf_src_name, vnf_dst_name,
                       vnf_src_interface=None, vnf_dst_interface=None, **kwargs):
 
@@ -625,51 +1198,67 @@ class DCNetwork(Containernet):
 
         LOG.debug("call chainAddFlow vnf_src_name=%r, vnf_src_interface=%r, vnf_dst_name=%r, vnf_dst_interface=%r",
                   vnf_src_name, vnf_src_interface, vnf_dst_name, vnf_dst_interface)
-
-        # check if port is specified (vnf:port)
-        if vnf_src_interface is None:
-            # take first interface by default
-            connected_sw = self.DCNetwork_graph.neighbors(vnf_src_name)[0]
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            vnf_src_interface = link_dict[0]['src_port_id']
-
-        for connected_sw in self.DCNetwork_graph.neighbors(vnf_src_name):
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            for link in link_dict:
-                if (link_dict[link]['src_port_id'] == vnf_src_interface or
-                        link_dict[link]['src_port_name'] == vnf_src_interface):  # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                    # found the right link and connected switch
-                    src_sw = connected_sw
-                    src_sw_inport_nr = link_dict[link]['dst_port_nr']
-                    src_sw_inport_name = link_dict[link]['dst_port_name']
-                    break
-
-        if vnf_dst_interface is None:
-            # take first interface by default
-            connected_sw = self.DCNetwork_graph.neighbors(vnf_dst_name)[0]
-            link_dict = self.DCNetwork_graph[connected_sw][vnf_dst_name]
-            vnf_dst_interface = link_dict[0]['dst_port_id']
+        # duration of the setup steps in seconds
+        timing = OrderedDict()
+        t_step = time.time()
+
+        # check if port is specified (vnf:port), take first by default
+        # we might also get interface names, e.g, from a son-emu-cli call
+        src_port = self._get_connected_switch_port(
+            vnf_src_name, vnf_src_interface)
+        if src_port is not None:
+            vnf_src_interface = src_port['port_id']
+            src_sw = src_port['switch']
+            src_sw_inport_nr = src_port['switch_port_nr']
+            src_sw_inport_name = src_port['switch_port_name']
 
         vnf_dst_name = vnf_dst_name.split(':')[0]
-        for connected_sw in self.DCNetwork_graph.neighbors(vnf_dst_name):
-            link_dict = self.DCNetwork_graph[connected_sw][vnf_dst_name]
-            for link in link_dict:
-                if link_dict[link]['dst_port_id'] == vnf_dst_interface or \
-                        link_dict[link]['dst_port_name'] == vnf_dst_interface:  # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                    # found the right link and connected switch
-                    dst_sw = connected_sw
-                    dst_sw_outport_nr = link_dict[link]['src_port_nr']
-                    dst_sw_outport_name = link_dict[link]['src_port_name']
-                    break
+        dst_port = self._get_connected_switch_port(
+            vnf_dst_name, vnf_dst_interface)
+        if dst_port is not None:
+            vnf_dst_interface = dst_port['port_id']
+            dst_sw = dst_port['switch']
+            dst_sw_outport_nr = dst_port['switch_port_nr']
+            dst_sw_outport_name = dst_port['switch_port_name']
+        timing['port_lookup'] = time.time() - t_step
 
+        cmd = kwargs.get('cmd')
+        chain_key = (vnf_src_name, vnf_src_interface,
+                     vnf_dst_name, vnf_dst_interface)
+        if not kwargs.get('monitor'):
+            if cmd == 'add-flow' and self.chain_registry.get(
+                    *chain_key, cookie=kwargs.get('cookie'),
+                    match=kwargs.get('match')) is not None:
+                LOG.warning("Chain ({}:{}) -> ({}:{}) already exists".format(
+                    *chain_key))
+                return "Chain already exists between {0} and {1}".format(
+                    vnf_src_name, vnf_dst_name)
+            elif cmd == 'del-flows':
+                chains = self.chain_registry.remove(
+                    *chain_key, cookie=kwargs.get('cookie'))
+                if len(chains) > 0:
+                    # only touch the switches the chains were installed on
+                    return self._chainDelFlow(chains, **kwargs)
+                # unknown chain: remove flow entries along the current path
+
+        objective = kwargs.get('objective')
+        if objective is not None and objective not in ROUTING_OBJECTIVES:
+            return "Routing objective unknown: {0}".format(objective)
+        ecmp = kwargs.get('ecmp')
+        if ecmp is not None and ecmp not in ECMP_MODES:
+            return "ECMP mode unknown: {0}".format(ecmp)
+        chain_hash = self._chain_hash(*chain_key, cookie=kwargs.get('cookie'))
+
+        t_step = time.time()
         path = kwargs.get('path')
         if path is None:
             # get shortest path
             try:
                 # returns the first found shortest path
-                # if all shortest paths are wanted, use: all_shortest_paths
-                path = nx.shortest_path(
-                    self.DCNetwork_graph, src_sw, dst_sw, weight=kwargs.get('weight'))
+                path = self._get_path(
+                    src_sw, dst_sw, objective=objective,
+                    weight=kwargs.get('weight'), ecmp=ecmp,
+                    chain_hash=chain_hash)
             except BaseException:
                 LOG.exception("No path could be found between {0} and {1} using src_sw={2} and dst_sw={3}".format(
                     vnf_src_name, vnf_dst_name, src_sw, dst_sw))
@@ -682,82 +1271,131 @@ class DCNetwork(Containernet):
 
         LOG.debug("Creating path between {0} and {1}: {2}".format(
             vnf_src_name, vnf_dst_name, path))
-
-        current_hop = src_sw
-        switch_inport_nr = src_sw_inport_nr
+        timing['path'] = time.time() - t_step
+        t_step = time.time()
 
         # choose free vlan
-        cmd = kwargs.get('cmd')
         vlan = None
+        vlan_from_pool = False
         if cmd == 'add-flow':
             if kwargs.get('tag'):
                 # use pre-defined tag
                 vlan = kwargs.get('tag')
             else:
-                vlan = self.vlans.pop()
-
-        # store the used vlan tag to identify this chain
-        if not kwargs.get('monitor'):
-            chain_dict = {}
-            chain_dict['vnf_src_name'] = vnf_src_name
-            chain_dict['vnf_dst_name'] = vnf_dst_name
-            chain_dict['vnf_src_interface'] = vnf_src_interface
-            chain_dict['vnf_dst_interface'] = vnf_dst_interface
-            chain_dict['tag'] = vlan
-            self.installed_chains.append(chain_dict)
+                vlan = self.vlans.allocate(path=path)
+                vlan_from_pool = True
 
-        # iterate through the path to install the flow-entries
-        for i in range(0, len(path)):
-            current_node = self.getNodeByName(current_hop)
+        # switch ports of the installed flow entries
+        hops = []
+        # graph edges between the switches [src, dst, key]
+        edges = []
 
-            if i < len(path) - 1:
-                next_hop = path[i + 1]
-            else:
-                # last switch reached
-                next_hop = vnf_dst_name
-
-            next_node = self.getNodeByName(next_hop)
+        # the flow entries of the chain are staged as one transaction,
+        # they are dropped again if one of the hops fails
+        savepoint = self._flow_savepoint()
+        current_hop = src_sw
+        switch_inport_nr = src_sw_inport_nr
+        error = None
+        try:
+            # iterate through the path to install the flow-entries
+            for i in range(0, len(path)):
+                current_node = self.getNodeByName(current_hop)
 
-            if next_hop == vnf_dst_name:
-                switch_outport_nr = dst_sw_outport_nr
-                LOG.debug("end node reached: {0}".format(vnf_dst_name))
-            elif not isinstance(next_node, OVSSwitch):
-                LOG.info("Next node: {0} is not a switch".format(next_hop))
-                return "Next node: {0} is not a switch".format(next_hop)
-            else:
-                # take first link between switches by default
-                index_edge_out = 0
-                switch_outport_nr = self.DCNetwork_graph[current_hop][next_hop][index_edge_out]['src_port_nr']
+                if i < len(path) - 1:
+                    next_hop = path[i + 1]
+                else:
+                    # last switch reached
+                    next_hop = vnf_dst_name
 
-            # set OpenFlow entry
-            if isinstance(current_node, OVSSwitch):
-                kwargs['vlan'] = vlan
-                kwargs['path'] = path
-                kwargs['current_hop'] = current_hop
-                kwargs['switch_inport_name'] = src_sw_inport_name
-                kwargs['switch_outport_name'] = dst_sw_outport_name
-                kwargs['pathindex'] = i
+                next_node = self.getNodeByName(next_hop)
 
-                if self.controller == RemoteController:
-                    # set flow entry via ryu rest api
-                    self._set_flow_entry_ryu_rest(
-                        current_node, switch_inport_nr, switch_outport_nr, **kwargs)
+                if next_hop == vnf_dst_name:
+                    switch_outport_nr = dst_sw_outport_nr
+                    LOG.debug("end node reached: {0}".format(vnf_dst_name))
+                elif not isinstance(next_node, OVSSwitch):
+                    LOG.info("Next node: {0} is not a switch".format(next_hop))
+                    error = "Next node: {0} is not a switch".format(next_hop)
+                    break
                 else:
-                    # set flow entry via ovs-ofctl
-                    self._set_flow_entry_dpctl(
+                    # select one of the (parallel) links between the switches
+                    edge_key = self._select_edge(
+                        current_hop, next_hop, objective=objective,
+                        weight=kwargs.get('weight'), ecmp=ecmp,
+                        chain_hash=chain_hash)
+                    edges.append([current_hop, next_hop, edge_key])
+                    switch_outport_nr = self.DCNetwork_graph[current_hop][next_hop][edge_key]['src_port_nr']
+
+                # set OpenFlow entry
+                if isinstance(current_node, OVSSwitch):
+                    kwargs['vlan'] = vlan
+                    kwargs['path'] = path
+                    kwargs['current_hop'] = current_hop
+                    kwargs['switch_inport_name'] = src_sw_inport_name
+                    kwargs['switch_outport_name'] = dst_sw_outport_name
+                    kwargs['pathindex'] = i
+
+                    self._set_flow_entry(
                         current_node, switch_inport_nr, switch_outport_nr, **kwargs)
-
-            # take first link between switches by default
-            if isinstance(next_node, OVSSwitch):
-                switch_inport_nr = self.DCNetwork_graph[current_hop][next_hop][0]['dst_port_nr']
-                current_hop = next_hop
+                    hops.append({'switch': current_hop,
+                                 'inport': switch_inport_nr,
+                                 'outport': switch_outport_nr,
+                                 'pathindex': i})
+
+                if isinstance(next_node, OVSSwitch):
+                    switch_inport_nr = self.DCNetwork_graph[current_hop][next_hop][edge_key]['dst_port_nr']
+                    current_hop = next_hop
+        except Exception as ex:
+            LOG.exception("Chain setup failed between {0} and {1}".format(
+                vnf_src_name, vnf_dst_name))
+            error = "Chain setup failed between {0} and {1}: {2}".format(
+                vnf_src_name, vnf_dst_name, ex)
+        if error is not None:
+            self._flow_rollback(savepoint)
+            if vlan_from_pool:
+                self.vlans.release(vlan, path=path)
+            return error
+        timing['staging'] = time.time() - t_step
+
+        delay = self._chain_delay(vnf_src_name, vnf_dst_name, path, edges)
+
+        # store the used vlan tag and switches to identify this chain
+        if not kwargs.get('monitor') and cmd == 'add-flow':
+            bw = float(kwargs['bw']) if kwargs.get('bw') else None
+            self._reserve_edges(edges, bw or 0.0, 1)
+            chain_args = dict((k, kwargs[k]) for k in CHAIN_ARGS
+                              if kwargs.get(k) is not None)
+            if not vlan_from_pool:
+                chain_args['tag'] = vlan
+            chain = {
+                'vnf_src_name': vnf_src_name,
+                'vnf_src_interface': vnf_src_interface,
+                'vnf_dst_name': vnf_dst_name,
+                'vnf_dst_interface': vnf_dst_interface,
+                'cookie': kwargs.get('cookie'),
+                'match': kwargs.get('match'),
+                'priority': kwargs.get('priority'),
+                'tag': vlan,
+                'tag_from_pool': vlan_from_pool,
+                'path': path,
+                'switches': [hop['switch'] for hop in hops],
+                'hops': hops,
+                'edges': edges,
+                'delay_us': delay,
+                'bw': bw,
+                'args': chain_args,
+                'timing': timing}
+            self.chain_registry.add(chain)
+            if self._flow_batch is not None:
+                # committed (or removed again) with the batch
+                self._flow_batch.chains.append(chain)
 
         flow_options = {
             'priority': kwargs.get('priority', DEFAULT_PRIORITY),
             'cookie': kwargs.get('cookie', DEFAULT_COOKIE),
             'vlan': kwargs['vlan'],
             'path': kwargs['path'],
-            'match_input': kwargs.get('match')
+            'match_input': kwargs.get('match'),
+            'path_delay_us': delay
         }
         flow_options_str = json.dumps(flow_options, indent=1)
         LOG.info("Installed flow rule: ({}:{}) -> ({}:{}) with options: {}"
@@ -765,6 +1403,188 @@ class DCNetwork(Containernet):
         return "success: {2} between {0} and {1} with options: {3}".format(
             vnf_src_name, vnf_dst_name, cmd, flow_options_str)
 
+    def _chainDelFlow(self, chains, **kwargs):
+        """
+        Remove the flow entries of registered chains from the switches
+        they were installed on and give their vlan tags back to the pool.
+        """
+        ret = []
+        for chain in chains:
+            del_args = dict(kwargs)
+            del_args.update({'cmd': 'del-flows',
+                             'cookie': chain['cookie'],
+                             'match': chain['match'],
+                             'path': chain['path'],
+                             'vlan': None})
+            for hop in chain['hops']:
+                del_args['pathindex'] = hop['pathindex']
+                del_args['current_hop'] = hop['switch']
+                self._set_flow_entry(self.getNodeByName(hop['switch']),
+                                     hop['inport'], hop['outport'], **del_args)
+            if chain['tag_from_pool']:
+                self.vlans.release(chain['tag'], path=chain['path'])
+            self._reserve_edges(chain['edges'], -(chain['bw'] or 0.0), -1)
+
+            flow_options = {
+                'priority': chain.get('priority') or DEFAULT_PRIORITY,
+                'cookie': chain['cookie'],
+                'vlan': chain['tag'],
+                'path': chain['path'],
+                'match_input': chain['match']
+            }
+            LOG.info("Removed flow rule: ({}:{}) -> ({}:{}) with options: {}"
+                     .format(chain['vnf_src_name'], chain['vnf_src_interface'],
+                             chain['vnf_dst_name'], chain['vnf_dst_interface'],
+                             flow_options))
+            ret.append("success: del-flows between {0} and {1} with options: {2}".format(
+                chain['vnf_src_name'], chain['vnf_dst_name'],
+                json.dumps(flow_options, indent=1)))
+        return '\n'.join(ret)
+
+    def rerouteChains(self, edges, keep_unchanged=False):
+        """
+        Move the chains that use one of the given graph edges to a new path.
+        The flow entries of the new path are installed before the first
+        switch of a chain is switched over to it, the old flow entries are
+        removed afterwards.
+
+        :param edges: list of graph edges (src, dst, key), e.g. of a removed link
+        :param keep_unchanged: leave chains alone whose best path is still the same
+        :return: list of dicts with the old and new path, the result and the
+                 recovery time in seconds ('recovery_time') of each affected chain,
+                 'removed' is set for chains that were removed because no new
+                 path could be set up (new path: None)
+        """
+        edges = set(tuple(e) for e in edges)
+        affected = [chain for chain in self.chain_registry
+                    if edges & set(tuple(e) for e in chain['edges'])]
+        results = []
+        for chain in affected:
+            result = self._rerouteChain(chain, keep_unchanged)
+            LOG.info("Rerouted chain ({}:{}) -> ({}:{}) in {:.3f}s: {}".format(
+                chain['vnf_src_name'], chain['vnf_src_interface'],
+                chain['vnf_dst_name'], chain['vnf_dst_interface'],
+                result['recovery_time'], result['result']))
+            results.append(result)
+        return results
+
+    def _rerouteChain(self, chain, keep_unchanged=False):
+        t_start = time.time()
+        key = (chain['vnf_src_name'], chain['vnf_src_interface'],
+               chain['vnf_dst_name'], chain['vnf_dst_interface'])
+        args = dict(chain['args'])
+        result = {'vnf_src_name': chain['vnf_src_name'],
+                  'vnf_src_interface': chain['vnf_src_interface'],
+                  'vnf_dst_name': chain['vnf_dst_name'],
+                  'vnf_dst_interface': chain['vnf_dst_interface'],
+                  'cookie': chain['cookie'],
+                  'old_path': chain['path'],
+                  'new_path': chain['path'],
+                  'removed': False}
+
+        if keep_unchanged:
+            try:
+                path = self._get_path(
+                    chain['path'][0], chain['path'][-1],
+                    objective=args.get('objective'),
+                    weight=args.get('weight'), ecmp=args.get('ecmp'),
+                    chain_hash=self._chain_hash(*key, cookie=args.get('cookie')))
+            except BaseException:
+                path = None
+            if path == chain['path']:
+                chain['delay_us'] = self._chain_delay(
+                    chain['vnf_src_name'], chain['vnf_dst_name'],
+                    chain['path'], chain['edges'])
+                result['result'] = "unchanged"
+                result['recovery_time'] = time.time() - t_start
+                return result
+
+        # setup the chain on a new path, the first switch is updated last
+        self.chain_registry.discard(chain)
+        self._reserve_edges(chain['edges'], -(chain['bw'] or 0.0), -1)
+        new_chain = None
+        own_batch = self._begin_flow_batch()
+        try:
+            ret = self._chainAddFlow(
+                chain['vnf_src_name'], chain['vnf_dst_name'],
+                chain['vnf_src_interface'], chain['vnf_dst_interface'],
+                cmd='add-flow', **args)
+            new_chain = self.chain_registry.get(
+                *key, cookie=chain['cookie'], match=chain['match'])
+            if new_chain is not None and len(new_chain['hops']) > 0:
+                self._flow_batch.defer(
+                    self.getNodeByName(new_chain['hops'][0]['switch']))
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+        result['recovery_time'] = time.time() - t_start
+
+        # remove the old flow entries that were not replaced by new ones
+        def hop_match(hop, tag):
+            return (hop['switch'], hop['inport'],
+                    None if hop['pathindex'] == 0 else tag)
+        if new_chain is None:
+            if all(self.DCNetwork_graph.has_edge(src, dst, key)
+                   for src, dst, key in chain['edges']):
+                # no new path set up, the old one still works: keep the
+                # chain as it is
+                self.chain_registry.add(chain)
+                self._reserve_edges(chain['edges'], chain['bw'] or 0.0, 1)
+                result['result'] = ret
+                return result
+            # the old path is broken and there is no other one: remove the
+            # chain (its reservation is already given back)
+            LOG.warning("Removing chain ({}:{}) -> ({}:{}), no path left".format(*key))
+            result['result'] = "Chain removed between {0} and {1}: " \
+                "{2}".format(chain['vnf_src_name'], chain['vnf_dst_name'],
+                             ret)
+            result['new_path'] = None
+            result['removed'] = True
+            new_matches = set()
+        elif new_chain.get('failed'):
+            # the new path could not be installed and was removed again,
+            # its first switch entry replaced the old one: remove the chain
+            result['result'] = "Chain setup failed between {0} and {1}: " \
+                "{2}".format(chain['vnf_src_name'], chain['vnf_dst_name'],
+                             new_chain['failed'])
+            result['new_path'] = None
+            result['removed'] = True
+            new_matches = set()
+        else:
+            result['new_path'] = new_chain['path']
+            result['result'] = "success: rerouted between {0} and {1}".format(
+                chain['vnf_src_name'], chain['vnf_dst_name'])
+            new_matches = set(hop_match(hop, new_chain['tag'])
+                              for hop in new_chain['hops'])
+        own_batch = self._begin_flow_batch()
+        try:
+            for hop in chain['hops']:
+                if hop_match(hop, chain['tag']) in new_matches:
+                    continue
+                self._set_flow_entry(
+                    self.getNodeByName(hop['switch']),
+                    hop['inport'], hop['outport'], cmd='del-flows',
+                    cookie=chain['cookie'], match=chain['match'],
+                    path=chain['path'], pathindex=hop['pathindex'],
+                    current_hop=hop['switch'], vlan=chain['tag'])
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+        if chain['tag_from_pool']:
+            self.vlans.release(chain['tag'], path=chain['path'])
+        return result
+
+    def _set_flow_entry(self, node, switch_inport_nr, switch_outport_nr,
+                        **kwargs):
+        if self.controller == RemoteController:
+            # set flow entry via ryu rest api
+            self._set_flow_entry_ryu_rest(
+                node, switch_inport_nr, switch_outport_nr, **kwargs)
+        else:
+            # set flow entry via ovs-ofctl
+            self._set_flow_entry_dpctl(
+                node, switch_inport_nr, switch_outport_nr, **kwargs)
+
     def _set_flow_entry_ryu_rest(
             self, node, switch_inport_nr, switch_outport_nr, **kwargs):
         match = 'in_port=%s' % switch_inport_nr
@@ -857,6 +1677,9 @@ class DCNetwork(Containernet):
 
         elif cmd == 'del-flows':
             prefix = 'stats/flowentry/delete'
+            if vlan is not None and index != 0 and len(path) > 1:
+                # only delete the entries of this vlan tag
+                match += ',dl_vlan=%s' % vlan
 
             if cookie:
                 # TODO: add cookie_mask as argument
@@ -869,7 +1692,112 @@ class DCNetwork(Containernet):
             flow['actions'].append(action)
 
         flow['match'] = self._parse_match(match)
-        self.ryu_REST(prefix, data=flow)
+        if cmd == 'add-flow':
+            self.flow_table.add(node.name, flow['match'], cookie=cookie,
+                                priority=flow.get('priority', 0),
+                                table_id=table_id, flow=flow)
+        elif not self.flow_table.delete(node.name, flow['match'],
+                                        cookie=cookie or None,
+                                        table_id=table_id):
+            LOG.debug("No flow entries to delete in switch: {0} match: {1}"
+                      .format(node.name, match))
+            return
+        if self._flow_batch is not None:
+            # sent to Ryu when the chain setup is done
+            self._flow_batch.add(prefix, flow)
+        else:
+            self.ryu_REST(prefix, data=flow)
+
+    def _begin_flow_batch(self):
+        """
+        Start collecting flow entries instead of sending them directly
+        to Ryu (RemoteController) or ovs-ofctl (all other controllers).
+        :return: True if a new batch was opened by this call
+        """
+        if self._flow_batch is not None:
+            return False
+        if self.controller == RemoteController:
+            self._flow_batch = RyuFlowBatch(self)
+        else:
+            self._flow_batch = DpctlFlowBatch(bundle=self.ofctl_bundle)
+        return True
+
+    def _commit_flow_batch(self):
+        """
+        Apply all collected flow entries and close the batch.
+        Chains of the batch with flow entries on a switch the entries
+        could not be applied to are removed again.
+        :return: the committed batch
+        """
+        batch = self._flow_batch
+        self._flow_batch = None
+        self.flow_table.release()
+        n_flows = len(batch)
+        switches = batch.switches()
+        try:
+            n_requests = batch.commit()
+        except Exception:
+            LOG.exception("Flow batch could not be committed")
+            batch.failed.update(switches)
+            n_requests = 0
+        LOG.debug("Committed {0} flow entries with {1} requests".format(
+            n_flows, n_requests))
+
+        # time spent on each switch (a request can cover several switches)
+        commit_times = {}
+        for t in batch.timings:
+            for switch in t['switches']:
+                commit_times[switch] = commit_times.get(
+                    switch, 0.0) + t['time']
+        for chain in batch.chains:
+            chain['timing']['commit'] = dict(
+                (switch, commit_times[switch]) for switch in chain['switches']
+                if switch in commit_times)
+        failed = [chain for chain in batch.chains
+                  if batch.failed & set(chain['switches'])]
+        if failed:
+            self._abortChains(failed, batch.failed)
+        return batch
+
+    def _abortChains(self, chains, failed_switches):
+        """
+        Remove chains whose flow entries could not be installed on all
+        switches and give their vlan tags back.
+        """
+        for chain in chains:
+            chain['failed'] = "flow entries could not be installed on: " + \
+                ', '.join(sorted(failed_switches & set(chain['switches'])))
+            LOG.warning("Removing chain ({}:{}) -> ({}:{}), {}".format(
+                chain['vnf_src_name'], chain['vnf_src_interface'],
+                chain['vnf_dst_name'], chain['vnf_dst_interface'],
+                chain['failed']))
+            self.chain_registry.discard(chain)
+        own_batch = self._begin_flow_batch()
+        try:
+            self._chainDelFlow(chains)
+        finally:
+            if own_batch:
+                self._commit_flow_batch()
+
+    def _flow_savepoint(self):
+        """
+        Mark the staged flow entries and the shadow flow table to go back
+        to with _flow_rollback. Without open batch the flow entries are
+        applied directly and there is nothing to go back to.
+        """
+        if self._flow_batch is None:
+            return None
+        return self._flow_batch.savepoint(), self.flow_table.savepoint()
+
+    def _flow_rollback(self, savepoint):
+        """
+        Drop the flow entries staged after the savepoint.
+        """
+        if savepoint is None or self._flow_batch is None:
+            return
+        batch_savepoint, table_savepoint = savepoint
+        self._flow_batch.rollback(batch_savepoint)
+        self.flow_table.rollback(table_savepoint)
 
     def _set_vlan_tag(self, node, switch_port, tag):
         node.vsctl('set', 'port {0} tag={1}'.format(switch_port, tag))
@@ -888,6 +1816,9 @@ class DCNetwork(Containernet):
         index = kwargs.get('pathindex')
         vlan = kwargs.get('vlan')
 
+        # ovs-ofctl options (batched flow entries always use OpenFlow13)
+        of_options = ''
+
         s = ','
         if cookie:
             cookie = 'cookie=%s' % cookie
@@ -900,7 +1831,7 @@ class DCNetwork(Containernet):
                 if index == 0:  # first node
                     action = ('action=mod_vlan_vid:%s' % vlan) + \
                         (',output=%s' % switch_outport_nr)
-                    match = '-O OpenFlow13 ' + match
+                    of_options = '-O OpenFlow13 '
                 elif index == len(path) - 1:  # last node
                     match += ',dl_vlan=%s' % vlan
                     action = 'action=strip_vlan,output=%s' % switch_outport_nr
@@ -908,14 +1839,134 @@ class DCNetwork(Containernet):
                     match += ',dl_vlan=%s' % vlan
             ofcmd = s.join([match, action])
         elif cmd == 'del-flows':
+            if vlan is not None and index != 0 and len(path) > 1:
+                # only delete the entries of this vlan tag
+                match += ',dl_vlan=%s' % vlan
             ofcmd = match
         else:
             ofcmd = ''
 
-        node.dpctl(cmd, ofcmd)
+        if cmd == 'add-flow':
+            self.flow_table.add_ofctl(node.name, ofcmd)
+        elif cmd == 'del-flows' and not self.flow_table.delete(
+                node.name, match, cookie=kwargs.get('cookie') or None):
+            LOG.debug("No flow entries to delete in switch: {0} match: {1}"
+                      .format(node.name, match))
+            return
+        if self._flow_batch is not None and ofcmd:
+            # applied with a single ovs-ofctl call when the chain setup is done
+            self._flow_batch.add(node.name, cmd, ofcmd)
+        else:
+            node.dpctl(cmd, of_options + ofcmd)
         LOG.info("{3} in switch: {0} in_port: {1} out_port: {2}".format(node.name, switch_inport_nr,
                                                                         switch_outport_nr, cmd))
 
+    def getFlows(self, switch=None, cookie=None):
+        """
+        Return the flow entries son-emu installed, without asking the
+        switches or the controller.
+        :param switch: only entries of this switch (name)
+        :param cookie: only entries with this cookie
+        :return: list of dicts {switch, cookie, priority, table_id, match, flow}
+        """
+        return self.flow_table.flows(switch=switch, cookie=cookie)
+
+    def deleteFlowsByCookie(self, cookie):
+        """
+        Remove the flow entries with the given cookie from the switches
+        that hold such entries.
+        :return: names of the switches that were touched
+        """
+        switches = self.flow_table.switches(cookie=cookie)
+        for switch in switches:
+            node = self.getNodeByName(switch)
+            tables = set(entry['table_id'] for entry in
+                         self.flow_table.flows(switch=switch, cookie=cookie))
+            if self.controller == RemoteController:
+                # ofctl_rest only deletes in the given table (default: 0)
+                for table_id in sorted(tables):
+                    self.ryu_REST('stats/flowentry/delete',
+                                  data={'dpid': int(node.dpid, 16),
+                                        'cookie': int(cookie),
+                                        'cookie_mask': 0xffffffffffffffff,
+                                        'table_id': table_id})
+            else:
+                node.dpctl('del-flows', '-O OpenFlow13 cookie=%s/-1' % cookie)
+            self.flow_table.delete(switch, cookie=cookie)
+            LOG.debug("Deleted flow entries with cookie {0} in switch: {1}"
+                      .format(cookie, switch))
+        return switches
+
+    def reconcileFlows(self, switches=None, prune=True):
+        """
+        Compare the flow tables of the switches with the flow entries
+        son-emu installed and fix the differences: missing entries are
+        installed again, stale ones (unknown entries with a non-zero
+        cookie, e.g. left over by a crash) are removed one by one.
+        Entries with cookie 0 belong to the controller and are kept.
+        :param switches: names of the switches to check (default: all)
+        :param prune: remove stale entries
+        :return: dict {switch: {'missing': n, 'stale': n}}
+        """
+        if switches is None:
+            switches = [sw.name for sw in self.switches]
+        ret = OrderedDict()
+        for switch in switches:
+            node = self.getNodeByName(switch)
+            missing, stale = self.flow_table.diff(
+                switch, self._dump_flows(node), prune=prune)
+            for flow in stale:
+                self._delete_flow_strict(node, flow)
+            for entry in missing:
+                self._install_flow(node, entry)
+            if missing or stale:
+                LOG.info("Reconciled switch: {0} missing: {1} stale: {2}"
+                         .format(switch, len(missing), len(stale)))
+            ret[switch] = {'missing': len(missing), 'stale': len(stale)}
+        return ret
+
+    def _dump_flows(self, node):
+        """
+        Read the live flow table of a switch.
+        """
+        if self.controller == RemoteController:
+            dpid = int(node.dpid, 16)
+            stats = self.ryu_REST('stats/flow', dpid=dpid)
+            if not isinstance(stats, dict):
+                raise Exception(
+                    "Cannot read the flow table of {0}: {1}".format(
+                        node.name, stats))
+            return parse_ryu_stats(stats.get(str(dpid), []))
+        return parse_ofctl_dump(node.dpctl('dump-flows', '-O OpenFlow13'))
+
+    def _install_flow(self, node, entry):
+        """
+        Send a recorded flow entry to its switch again.
+        """
+        if isinstance(entry['flow'], dict):
+            self.ryu_REST('stats/flowentry/add', data=entry['flow'])
+        else:
+            node.dpctl('add-flow', '-O OpenFlow13 "%s"' % entry['flow'])
+
+    def _delete_flow_strict(self, node, flow):
+        """
+        Remove exactly one live flow entry (as read by _dump_flows).
+        """
+        if self.controller == RemoteController:
+            self.ryu_REST('stats/flowentry/delete_strict',
+                          data={'dpid': int(node.dpid, 16),
+                                'cookie': flow['cookie'],
+                                'cookie_mask': 0xffffffffffffffff,
+                                'table_id': flow['table_id'],
+                                'priority': flow['priority'],
+                                'match': flow['raw_match']})
+        else:
+            node.dpctl('del-flows', '--strict -O OpenFlow13 "%s"' % ','.join(
+                ['table=%s' % flow['table_id'],
+                 'priority=%s' % flow['priority'],
+                 'cookie=%s/-1' % flow['cookie']] +
+                ([flow['raw_match']] if flow['raw_match'] else [])))
+
     # start Ryu Openflow controller as Remote Controller for the DCNetwork
     def startRyu(self, learning_switch=True):
         # start Ryu controller with rest-API
@@ -927,21 +1978,104 @@ class DCNetwork(Containernet):
         dir_path = os.path.dirname(os.path.realpath(__file__))
         ryu_learning_app = dir_path + '/son_emu_simple_switch_13.py'
         ryu_rest_app = 'ryu.app.ofctl_rest'
+        # son-emu extensions of the rest api (e.g. batched flow entries)
+        ryu_flow_api_app = dir_path + '/son_emu_flow_api.py'
         # change the default Openflow controller port to 6653 (official IANA-assigned port number), as used by Mininet
         # Ryu still uses 6633 as default
         ryu_option = '--ofp-tcp-listen-port'
-        ryu_of_port = '6653'
-        ryu_cmd = 'ryu-manager'
-        FNULL = open("/tmp/ryu.log", 'w')
+        ryu_of_port = str(RYU_OF_PORT)
+        ryu_cmd = ['ryu-manager']
+        if self.reuse_ryu:
+            # run the script through the interpreter, so that the process
+            # is not named ryu-manager and survives Mininet's cleanup
+            ryu_cmd = [sys.executable,
+                       find_executable('ryu-manager') or 'ryu-manager']
         if learning_switch:
             # learning and rest api
-            args = [ryu_cmd, ryu_learning_app, ryu_rest_app, ryu_option, ryu_of_port]
+            args = ryu_cmd + [ryu_learning_app, ryu_rest_app, ryu_flow_api_app,
+                              ryu_option, ryu_of_port]
         else:
             # no learning switch, but with rest api
-            args = [ryu_cmd, ryu_rest_app, ryu_option, ryu_of_port]
+            args = ryu_cmd + [ryu_rest_app, ryu_flow_api_app,
+                              ryu_option, ryu_of_port]
+
+        if self.reuse_ryu:
+            if self._attachRyu(args):
+                return
+            # not running or started with other apps
+            self.killRyu()
+
+        FNULL = open("/tmp/ryu.log", 'w')
         self.ryu_process = Popen(args, stdout=FNULL, stderr=FNULL)
         LOG.debug('starting ryu-controller with %s' % args)
-        time.sleep(1)
+        with open(RYU_PID_FILE, 'w') as f:
+            json.dump({'pid': self.ryu_process.pid, 'args': args}, f)
+        start = time.time()
+        if self._waitForRyu(RYU_STARTUP_TIMEOUT):
+            LOG.debug('ryu-controller ready after %.3fs' %
+                      (time.time() - start))
+        else:
+            LOG.warning('ryu-controller not ready after %ds, see /tmp/ryu.log'
+                        % RYU_STARTUP_TIMEOUT)
+
+    def _attachRyu(self, args):
+        """
+        Attach to a Ryu controller that was started by son-emu with the
+        given arguments and is still running. Its per switch state is
+        reset when the switches of this network connect.
+        :return: True if a usable controller was found
+        """
+        try:
+            with open(RYU_PID_FILE) as f:
+                ryu = json.load(f)
+            # signal 0: check that the process exists
+            os.kill(ryu['pid'], 0)
+        except (IOError, OSError, ValueError, KeyError):
+            return False
+        if ryu.get('args') != args:
+            return False
+        if not self._waitForRyu(timeout=1):
+            return False
+        LOG.info('attached to running ryu-controller (pid %d)' % ryu['pid'])
+        return True
+
+    def _waitForRyu(self, timeout):
+        """
+        Poll the Ryu controller until its OpenFlow port is listening and
+        its REST API (and RPC channel, if used) answer.
+        :param timeout: max. time to wait in seconds
+        :return: True if the controller is ready
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.ryu_process is not None and \
+                    self.ryu_process.poll() is not None:
+                LOG.error('ryu-controller terminated with code %d' %
+                          self.ryu_process.returncode)
+                return False
+            if self._ryuReady():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _ryuReady(self):
+        try:
+            s = socket.create_connection(('localhost', RYU_OF_PORT), 0.5)
+            s.close()
+            req = self.RyuSession.get(
+                self.ryu_REST_api + '/stats/switches', timeout=0.5)
+            if req.status_code != requests.codes.ok:
+                return False
+            if self.ryu_rpc is not None:
+                s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                s.settimeout(0.5)
+                try:
+                    s.connect(self.ryu_rpc.path)
+                finally:
+                    s.close()
+        except (socket.error, requests.exceptions.RequestException):
+            return False
+        return True
 
     def killRyu(self):
         """
@@ -956,10 +2090,23 @@ class DCNetwork(Containernet):
         except BaseException as ex:
             LOG.warning("Error during Ryu stop: {}".format(ex))
         # ensure its death ;-)
-        Popen(['pkill', '-f', 'ryu-manager'])
+        Popen(['pkill', '-f', 'ryu-manager']).wait()
+        if os.path.exists(RYU_PID_FILE):
+            os.remove(RYU_PID_FILE)
 
     def ryu_REST(self, prefix, dpid=None, data=None):
 
+        if self.ryu_rpc is not None and prefix in RYU_RPC_PREFIXES:
+            try:
+                return self._ryu_rpc_call(prefix, dpid, data)
+            except RyuRpcReplyError as ex:
+                # received by the controller, do not send it again
+                LOG.warning("Ryu RPC {0} failed: {1}".format(prefix, ex))
+                return ''
+            except RyuRpcError as ex:
+                LOG.warning(
+                    "Ryu RPC channel not usable, using REST: {0}".format(ex))
+
         if dpid:
             url = self.ryu_REST_api + '/' + str(prefix) + '/' + str(dpid)
         else:
@@ -990,6 +2137,24 @@ class DCNetwork(Containernet):
         ret = req.text.rstrip()
         return ret
 
+    def _ryu_rpc_call(self, prefix, dpid=None, data=None):
+        """
+        Send an ofctl_rest call over the local RPC channel.
+        Returns the same data as the corresponding REST call.
+        """
+        LOG.debug('sending RYU RPC: %s, payload: %s', prefix, data)
+        if prefix == 'stats/port':
+            return self.ryu_rpc.call('port_stats', dpid=dpid)
+        if prefix == 'stats/flow':
+            return self.ryu_rpc.call('flow_stats', dpid=dpid, flow=data)
+        # 'stats/flowentry/add' -> 'add'
+        flow = dict(data)
+        flow['cmd'] = prefix.rsplit('/', 1)[-1]
+        ret = self.ryu_rpc.call('flow_mods', flows=[flow])
+        for error in ret.get('errors', []):
+            LOG.warning('RYU RPC error: {0}'.format(error))
+        return ''
+
     # need to respect that some match fields must be integers
     # http://ryu.readthedocs.io/en/latest/app/ofctl_rest.html#description-of-match-and-actions
 
@@ -1009,19 +2174,8 @@ class DCNetwork(Containernet):
 
     def find_connected_dc_interface(
             self, vnf_src_name, vnf_src_interface=None):
-
-        if vnf_src_interface is None:
-            # take first interface by default
-            connected_sw = self.DCNetwork_graph.neighbors(vnf_src_name)[0]
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            vnf_src_interface = link_dict[0]['src_port_id']
-
-        for connected_sw in self.DCNetwork_graph.neighbors(vnf_src_name):
-            link_dict = self.DCNetwork_graph[vnf_src_name][connected_sw]
-            for link in link_dict:
-                if (link_dict[link]['src_port_id'] == vnf_src_interface or
-                        link_dict[link]['src_port_name'] == vnf_src_interface):
-                    # Fix: we might also get interface names, e.g, from a son-emu-cli call
-                    # found the right link and connected switch
-                    src_sw_inport_name = link_dict[link]['dst_port_name']
-                    return src_sw_inport_name
+        # we might also get interface names, e.g, from a son-emu-cli call
+        port = self._get_connected_switch_port(
+            vnf_src_name, vnf_src_interface)
+        if port is not None:
+            return port['switch_port_name']
@@ -0,0 +1,91 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Reads the interface counters of the host (or of a container's network
+namespace) from /proc/net/dev, so that the monitoring agent can export
+the traffic of the VNF interfaces without asking the controller for
+port stats and without running commands inside the containers.
+"""
+import os
+
+PROC_ROOT = '/proc'
+
+# counters of /proc/net/dev, named like the files in
+# /sys/class/net/<intf>/statistics and the fields of the Ryu port stats
+# (None: not exported)
+NET_DEV_RX_FIELDS = ('rx_bytes', 'rx_packets', 'rx_errors', 'rx_dropped',
+                     None, None, None, None)
+NET_DEV_TX_FIELDS = ('tx_bytes', 'tx_packets', 'tx_errors', 'tx_dropped',
+                     None, None, None, None)
+
+
+def parse_proc_net_dev(text):
+    """
+    Parse /proc/net/dev (two header lines, then one line per interface:
+    '<intf>: <8 receive counters> <8 transmit counters>').
+    :return: dict {interface name: {counter: value}}
+    """
+    counters = {}
+    for line in text.splitlines()[2:]:
+        name, sep, values = line.partition(':')
+        if not sep:
+            continue
+        values = values.split()
+        if len(values) != 16:
+            continue
+        stats = {}
+        for field, value in zip(NET_DEV_RX_FIELDS + NET_DEV_TX_FIELDS,
+                                values):
+            if field is not None:
+                stats[field] = int(value)
+        counters[name.strip()] = stats
+    return counters
+
+
+class NetDevReader(object):
+    """
+    Reads the counters of all interfaces of a network namespace with a
+    single read of /proc/net/dev. The switch side interfaces of the VNF
+    links are in the namespace of the emulator, their rx counters are the
+    tx counters of the VNF interfaces and vice-versa.
+    """
+
+    def __init__(self, proc=PROC_ROOT):
+        self.proc = proc
+
+    def counters(self, pid=None):
+        """
+        Return the counters of all interfaces.
+        :param pid: read the namespace of this (host) pid, e.g. the main
+                    process of a container (default: own namespace)
+        :return: dict {interface name: {counter: value}}
+        """
+        if pid is None:
+            path = os.path.join(self.proc, 'net', 'dev')
+        else:
+            path = os.path.join(self.proc, str(pid), 'net', 'dev')
+        with open(path, 'r') as f:
+            return parse_proc_net_dev(f.read())
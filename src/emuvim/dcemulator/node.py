@@ -26,6 +26,7 @@
 from mininet.node import Docker
 from mininet.link import Link
 from emuvim.dcemulator.resourcemodel import NotEnoughResourcesAvailable
+from multiprocessing.pool import ThreadPool
 import logging
 
 
@@ -35,6 +36,8 @@ LOG.setLevel(logging.DEBUG)
 
 DCDPID_BASE = 1000  # start of switch dpid's used for data center switches
 EXTSAPDPID_BASE = 2000  # start of switch dpid's used for external SAP switches
+# max. number of containers created in parallel by startComputeBatch
+COMPUTE_BATCH_WORKERS = 8
 
 
 class EmulatorCompute(Docker):
@@ -236,10 +239,104 @@ class Datacenter(object):
         :return:
         """
         assert name is not None
-        default_net = {"id": "emu0"}
         # no duplications
-        if name in [c.name for c in self.net.getAllContainers()]:
+        if self.net.getContainer(name) is not None:
             raise Exception("Container with name %s already exists." % name)
+        image, network, env = self._prepareCompute(
+            name, image, network, properties, params)
+        # create the container
+        d = self.net.addDocker(
+            str(name),
+            dimage=image,
+            dcmd=command,
+            datacenter=self,
+            flavor_name=flavor_name,
+            environment=env,
+            **params
+        )
+        return self._connectCompute(name, d, network)
+
+    def startComputeBatch(self, computes, max_workers=COMPUTE_BATCH_WORKERS):
+        """
+        Create multiple containers and connect them to this data center.
+        The containers are created in parallel by a pool of worker
+        threads, resource allocation and links are done one after the
+        other in the given order.
+        :param computes: list of dicts with the arguments of startCompute, e.g.
+                         [{"name": "vnf1", "image": "ubuntu:trusty", "network": [{"id": "intf1"}]}]
+        :param max_workers: max. number of containers created in parallel
+        :return: list of dicts {"name": name, "compute": EmulatorCompute or None, "error": message or None}
+                 in the order of computes
+        """
+        # names used by this batch
+        existing = set()
+        results = []
+        jobs = []
+        for args in computes:
+            args = dict(args)
+            name = args.pop("name", None)
+            result = {"name": name, "compute": None, "error": None}
+            results.append(result)
+            if name is None:
+                result["error"] = "No name given."
+                continue
+            # no duplications
+            if name in existing or self.net.getContainer(name) is not None:
+                result["error"] = "Container with name %s already exists." % name
+                continue
+            existing.add(name)
+            command = args.pop("command", None)
+            flavor_name = args.pop("flavor_name", "tiny")
+            image, network, env = self._prepareCompute(
+                name, args.pop("image", None), args.pop("network", None),
+                args.pop("properties", dict()), args)
+            jobs.append((result, network, dict(
+                name=str(name), dimage=image, dcmd=command, datacenter=self,
+                flavor_name=flavor_name, environment=env, **args)))
+        if len(jobs) < 1:
+            return results
+
+        def create(job):
+            result, network, docker_params = job
+            try:
+                return self.net.addDocker(
+                    docker_params.pop("name"), **docker_params)
+            except Exception as ex:
+                LOG.exception("Creation of container %r failed." %
+                              result["name"])
+                result["error"] = str(ex)
+                return None
+
+        pool = ThreadPool(min(max_workers, len(jobs)))
+        try:
+            created = pool.map(create, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+        for (result, network, _), d in zip(jobs, created):
+            if d is None:
+                continue
+            try:
+                result["compute"] = self._connectCompute(
+                    result["name"], d, network)
+            except Exception as ex:
+                LOG.exception("Connecting container %r failed." %
+                              result["name"])
+                result["error"] = str(ex)
+                continue
+            if result["compute"] is None:
+                result["error"] = "Allocation of container %s was blocked by resource model." % \
+                    result["name"]
+        return results
+
+    def _prepareCompute(self, name, image, network, properties, params):
+        """
+        Apply the defaults of startCompute.
+        :param params: additional container parameters, updated in place
+        :return: image, list of networks, environment
+        """
+        default_net = {"id": "emu0"}
         # set default parameter
         if image is None:
             image = "ubuntu:trusty"
@@ -262,19 +359,16 @@ class Datacenter(object):
             params['cpu_period'] = self.net.cpu_period
             params['cpu_quota'] = self.net.cpu_period * float(cpu_percentage)
 
-        env = properties
-        properties['VNF_NAME'] = name
-        # create the container
-        d = self.net.addDocker(
-            str(name),
-            dimage=image,
-            dcmd=command,
-            datacenter=self,
-            flavor_name=flavor_name,
-            environment=env,
-            **params
-        )
+        env = dict(properties)
+        env['VNF_NAME'] = name
+        return image, network, env
 
+    def _connectCompute(self, name, d, network):
+        """
+        Allocate the resources of a created container and connect its
+        networks to the data center switch.
+        :return: the container or None if it was blocked by the resource model
+        """
         # apply resource limits to container if a resource model is defined
         if self._resource_model is not None:
             try:
@@ -303,6 +397,8 @@ class Datacenter(object):
                              cls=Link, intfName1=nw.get('id'))
         # do bookkeeping
         self.containers[name] = d
+        with self.net._graph_lock:
+            self.net.dc_containers[name] = d
         return d  # we might use UUIDs for naming later on
 
     def stopCompute(self, name):
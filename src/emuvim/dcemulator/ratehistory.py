@@ -0,0 +1,102 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Short-term history of the traffic rates computed by the monitoring
+agent from successive counter values, so that the current throughput
+and that of the last seconds can be read without querying Prometheus.
+"""
+import threading
+import time
+from collections import deque
+
+# default number of rate samples kept per metric (5 min at 1 s intervals)
+RATE_HISTORY_SIZE = 300
+
+
+class RateHistory(object):
+    """
+    Fixed-size ring buffer of the rates of one monitored counter.
+    The oldest sample is dropped when the buffer is full.
+    """
+
+    def __init__(self, size=RATE_HISTORY_SIZE):
+        # (timestamp, rate) samples, oldest first
+        self.samples = deque(maxlen=size)
+        self.previous_measurement = None
+        self.previous_monitor_time = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def update(self, measurement, monitor_time, timestamp=None):
+        """
+        Add a counter value and compute the rate since the previous one.
+        :param measurement: counter value (packets or bytes)
+        :param monitor_time: time of the measurement in seconds, e.g. the port uptime reported by the switch
+        :param timestamp: wall clock time of the sample (default: now)
+        :return: rate in units per second or None (first measurement or counter reset)
+        """
+        rate = None
+        with self._lock:
+            previous_measurement = self.previous_measurement
+            previous_monitor_time = self.previous_monitor_time
+            self.previous_measurement = measurement
+            self.previous_monitor_time = monitor_time
+            if previous_monitor_time is None or \
+                    monitor_time <= previous_monitor_time or \
+                    measurement < previous_measurement:
+                # rate cannot be calculated yet (need a first measurement)
+                # or the counter was reset
+                return None
+            rate = float(measurement - previous_measurement) / \
+                (monitor_time - previous_monitor_time)
+            if timestamp is None:
+                timestamp = time.time()
+            self.samples.append((timestamp, rate))
+        return rate
+
+    def current(self):
+        """
+        :return: most recent rate or None
+        """
+        with self._lock:
+            if len(self.samples) == 0:
+                return None
+            return self.samples[-1][1]
+
+    def history(self, seconds=None, now=None):
+        """
+        :param seconds: only return the samples of the last seconds (all if None)
+        :return: list of (timestamp, rate), oldest first
+        """
+        with self._lock:
+            samples = list(self.samples)
+        if seconds is None:
+            return samples
+        if now is None:
+            now = time.time()
+        return [s for s in samples if s[0] >= now - float(seconds)]
@@ -0,0 +1,138 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Lightweight local RPC channel between DCNetwork and the son-emu Ryu app
+(son_emu_flow_api.py). Avoids the HTTP/JSON/Flask overhead of the
+ofctl_rest API for frequent operations (flow mods, stats requests).
+
+Protocol: each request and reply is a frame consisting of a 4 byte
+big-endian length followed by a JSON document of that length.
+Requests: {"op": <operation>, ...}
+    flow_mods:  {"flows": [<ofctl_rest flow dict incl. dpid and cmd>]}
+    port_stats: {"dpid": <dpid>}
+    flow_stats: {"dpid": <dpid>, "flow": <ofctl_rest flow filter>}
+Replies: {"result": ...} or {"error": <message>}
+"""
+import json
+import logging
+import socket
+import struct
+import threading
+
+LOG = logging.getLogger("dcemulator.ryurpc")
+LOG.setLevel(logging.DEBUG)
+
+RYU_RPC_SOCKET = '/tmp/son-emu-ryu.sock'
+
+FRAME_HEADER = struct.Struct('!I')
+
+
+class RyuRpcError(Exception):
+    pass
+
+
+class RyuRpcReplyError(RyuRpcError):
+    """
+    The controller received the request and replied with an error
+    (the request may be partly applied).
+    """
+    pass
+
+
+def write_frame(sock, obj):
+    data = json.dumps(obj).encode('utf-8')
+    sock.sendall(FRAME_HEADER.pack(len(data)) + data)
+
+
+def _read_exactly(sock, n):
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise RyuRpcError("connection closed")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(sock):
+    """
+    Read one frame from the socket.
+    :return: decoded JSON object
+    """
+    length, = FRAME_HEADER.unpack(_read_exactly(sock, FRAME_HEADER.size))
+    return json.loads(_read_exactly(sock, length).decode('utf-8'))
+
+
+class RyuRpcClient(object):
+    """
+    Client side of the RPC channel. Keeps a single connection open,
+    calls from different threads are serialized.
+    """
+
+    def __init__(self, path=RYU_RPC_SOCKET, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        return sock
+
+    def call(self, op, **params):
+        """
+        Send a request and wait for its reply.
+        :raises RyuRpcError: if the channel is not available
+        :raises RyuRpcReplyError: if the controller reports an error
+        """
+        params['op'] = op
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._sock = self._connect()
+                write_frame(self._sock, params)
+                reply = read_frame(self._sock)
+            except (socket.error, RyuRpcError, ValueError) as ex:
+                self.close_locked()
+                raise RyuRpcError("RPC {0} failed: {1}".format(op, ex))
+        if 'error' in reply:
+            raise RyuRpcReplyError(reply['error'])
+        return reply.get('result')
+
+    def close_locked(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except socket.error:
+                pass
+            self._sock = None
+
+    def close(self):
+        with self._lock:
+            self.close_locked()
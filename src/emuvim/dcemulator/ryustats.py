@@ -0,0 +1,136 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Grouping of the monitored metrics per datapath and parsing of the Ryu
+flow/port stats replies, so that DCNetworkMonitor needs a single stats
+request per switch and polling cycle.
+"""
+from collections import OrderedDict
+
+# son-emu uses the lower 32 bits of the OpenFlow cookie
+COOKIE_MASK = 0xffffffff
+
+
+def group_by_dpid(metrics):
+    """
+    Group monitored metric dicts by their 'switch_dpid'.
+    :return: OrderedDict {dpid: [metric dicts]}
+    """
+    groups = OrderedDict()
+    for metric_dict in metrics:
+        groups.setdefault(int(metric_dict['switch_dpid']), []).append(
+            metric_dict)
+    return groups
+
+
+def cookie_filter(cookies, mask=COOKIE_MASK):
+    """
+    Compute the cookie/cookie_mask pair of a flow stats request that
+    selects at least all flows with one of the given cookies: only the
+    bits on which all cookies agree are compared.
+    :return: (cookie, cookie_mask)
+    """
+    cookies = [int(cookie) & mask for cookie in cookies]
+    if len(cookies) == 0:
+        return 0, 0
+    differ = 0
+    for cookie in cookies[1:]:
+        differ |= cookie ^ cookies[0]
+    cookie_mask = mask & ~differ
+    return cookies[0] & cookie_mask, cookie_mask
+
+
+def index_port_stats(port_stats):
+    """
+    Index the port stats entries of a switch by port number
+    (the 'LOCAL' port is skipped).
+    :param port_stats: list of ofctl_rest port stats entries of one switch
+    :return: dict {port_no: port stats entry}
+    """
+    index = {}
+    for port_stat in port_stats or []:
+        if port_stat['port_no'] == 'LOCAL':
+            continue
+        index[int(port_stat['port_no'])] = port_stat
+    return index
+
+
+def index_flow_stats(flow_stats, mask=COOKIE_MASK):
+    """
+    Index the flow stats entries of a switch by (masked) cookie.
+    :param flow_stats: list of ofctl_rest flow stats entries of one switch
+    :return: dict {cookie: [flow stats entries]}
+    """
+    index = {}
+    for flow_stat in flow_stats or []:
+        cookie = int(flow_stat.get('cookie', 0)) & mask
+        index.setdefault(cookie, []).append(flow_stat)
+    return index
+
+
+def output_ports(actions):
+    """
+    Return the output ports of the (ofctl_rest formatted) actions or
+    instructions of a flow entry.
+    """
+    ports = set()
+    for action in actions or []:
+        if isinstance(action, dict):
+            # e.g. {'WRITE_ACTIONS': [...]}
+            for nested in action.values():
+                if isinstance(nested, list):
+                    ports |= output_ports(nested)
+            continue
+        name, _, value = str(action).partition(':')
+        if name == 'OUTPUT' and value.isdigit():
+            ports.add(int(value))
+    return ports
+
+
+def flow_counter(flow_index, cookie, metric_key, mon_port, mask=COOKIE_MASK):
+    """
+    Sum the counters of the flows that belong to a monitored flow, i.e.
+    the flows with its cookie which match on the monitored port (tx) or
+    output to it (rx). This is the same selection as done by Ryu for a
+    flow stats request with cookie and in_port match/out_port.
+    :param flow_index: flow stats of the switch as returned by index_flow_stats
+    :param metric_key: e.g. 'tx_packets' or 'rx_bytes'
+    :return: packet or byte count
+    """
+    counter = 0
+    for flow_stat in flow_index.get(int(cookie) & mask, []):
+        if 'tx' in metric_key:
+            in_port = flow_stat.get('match', {}).get('in_port')
+            if in_port is None or int(in_port) != int(mon_port):
+                continue
+        elif 'rx' in metric_key:
+            if int(mon_port) not in output_ports(flow_stat.get('actions')):
+                continue
+        if 'bytes' in metric_key:
+            counter += flow_stat['byte_count']
+        elif 'packet' in metric_key:
+            counter += flow_stat['packet_count']
+    return counter
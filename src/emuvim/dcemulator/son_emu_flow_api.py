@@ -0,0 +1,218 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Ryu application that extends the ofctl_rest API of the Ryu controller
+with son-emu specific calls.
+
+POST /sonemu/flowentry/batch
+    Install or remove a list of flow entries, possibly on different
+    datapaths, with a single REST request. Payload:
+    {"flows": [{"dpid": 1, "cmd": "add", <ofctl_rest flow fields>}, ...]}
+    The flow entries are sent to each datapath in the given order.
+
+In addition, the same operations and the flow/port stats requests are
+served on a local Unix-domain socket (see emuvim.dcemulator.ryurpc),
+which DCNetwork uses instead of HTTP when started with ryu_rpc=True.
+"""
+import json
+import logging
+import os
+
+from ryu.app.wsgi import ControllerBase, Response, WSGIApplication, route
+from ryu.base import app_manager
+from ryu.controller import dpset, ofp_event
+from ryu.controller.handler import MAIN_DISPATCHER, set_ev_cls
+from ryu.lib import hub, ofctl_v1_0, ofctl_v1_2, ofctl_v1_3
+from ryu.ofproto import ofproto_v1_0, ofproto_v1_2, ofproto_v1_3
+
+from emuvim.dcemulator.ryurpc import RYU_RPC_SOCKET, RyuRpcError, \
+    read_frame, write_frame
+
+LOG = logging.getLogger("son_emu_flow_api")
+
+FLOW_API_INSTANCE_NAME = 'son_emu_flow_api'
+FLOW_BATCH_URL = '/sonemu/flowentry/batch'
+
+supported_ofctl = {
+    ofproto_v1_0.OFP_VERSION: ofctl_v1_0,
+    ofproto_v1_2.OFP_VERSION: ofctl_v1_2,
+    ofproto_v1_3.OFP_VERSION: ofctl_v1_3,
+}
+
+
+def mod_flow_entries(dps, flows):
+    """
+    Send a list of flow mods to the connected datapaths.
+    :param dps: DPSet of the controller
+    :param flows: list of ofctl_rest flow dicts with extra 'cmd' field
+    :return: dict with per dpid counters, a list of errors and the list of
+             dpids on which flow mods failed
+    """
+    result = {'datapaths': {}, 'errors': [], 'failed': []}
+    for flow in flows:
+        flow = dict(flow)
+        cmd = flow.pop('cmd', 'add')
+        dpid = int(flow.get('dpid', 0))
+        dp = dps.get(dpid)
+        if dp is None:
+            result['errors'].append('datapath {0} not found'.format(dpid))
+            _failed(result, dpid)
+            continue
+        ofctl = supported_ofctl.get(dp.ofproto.OFP_VERSION)
+        if ofctl is None:
+            result['errors'].append(
+                'unsupported OpenFlow version on {0}'.format(dpid))
+            _failed(result, dpid)
+            continue
+        if cmd == 'add':
+            command = dp.ofproto.OFPFC_ADD
+        elif cmd == 'delete':
+            command = dp.ofproto.OFPFC_DELETE
+        elif cmd == 'delete_strict':
+            command = dp.ofproto.OFPFC_DELETE_STRICT
+        else:
+            result['errors'].append('unknown command: {0}'.format(cmd))
+            _failed(result, dpid)
+            continue
+        try:
+            ofctl.mod_flow_entry(dp, flow, command)
+        except Exception as ex:
+            result['errors'].append(
+                'flow mod failed on {0}: {1}'.format(dpid, ex))
+            _failed(result, dpid)
+            continue
+        counters = result['datapaths'].setdefault(
+            str(dpid), {'add': 0, 'delete': 0, 'delete_strict': 0})
+        counters[cmd] += 1
+    return result
+
+
+def _failed(result, dpid):
+    if dpid not in result['failed']:
+        result['failed'].append(dpid)
+
+
+def get_stats(dps, waiters, op, dpid, flow=None):
+    """
+    Request flow or port stats of a datapath (multipart request) and wait
+    for all replies.
+    :return: dict {dpid: [stats entries]} as returned by ofctl_rest
+    """
+    dp = dps.get(int(dpid))
+    if dp is None:
+        raise RyuRpcError('datapath {0} not found'.format(dpid))
+    ofctl = supported_ofctl.get(dp.ofproto.OFP_VERSION)
+    if ofctl is None:
+        raise RyuRpcError('unsupported OpenFlow version on {0}'.format(dpid))
+    if op == 'flow_stats':
+        return ofctl.get_flow_stats(dp, waiters, flow or {})
+    return ofctl.get_port_stats(dp, waiters)
+
+
+class FlowApiController(ControllerBase):
+
+    def __init__(self, req, link, data, **config):
+        super(FlowApiController, self).__init__(req, link, data, **config)
+        self.flow_api_app = data[FLOW_API_INSTANCE_NAME]
+
+    @route('sonemu', FLOW_BATCH_URL, methods=['POST'])
+    def mod_flow_batch(self, req, **kwargs):
+        try:
+            body = json.loads(req.body) if req.body else {}
+        except ValueError:
+            return Response(status=400, body='invalid json')
+        result = mod_flow_entries(self.flow_api_app.dpset,
+                                  body.get('flows', []))
+        return Response(content_type='application/json',
+                        body=json.dumps(result))
+
+
+class SonEmuFlowApi(app_manager.RyuApp):
+    _CONTEXTS = {'dpset': dpset.DPSet, 'wsgi': WSGIApplication}
+
+    def __init__(self, *args, **kwargs):
+        super(SonEmuFlowApi, self).__init__(*args, **kwargs)
+        self.dpset = kwargs['dpset']
+        wsgi = kwargs['wsgi']
+        wsgi.register(FlowApiController, {FLOW_API_INSTANCE_NAME: self})
+        self.waiters = {}
+        self.rpc_path = os.environ.get('SON_EMU_RYU_RPC', RYU_RPC_SOCKET)
+        if os.path.exists(self.rpc_path):
+            os.unlink(self.rpc_path)
+        self.rpc_server = hub.StreamServer((self.rpc_path,), self._rpc_handle)
+        self.rpc_thread = hub.spawn(self.rpc_server.serve_forever)
+
+    def _rpc_handle(self, sock, addr):
+        """
+        Serve requests of one RPC client until it disconnects.
+        """
+        while True:
+            try:
+                request = read_frame(sock)
+            except (RyuRpcError, IOError, ValueError):
+                break
+            try:
+                reply = {'result': self._rpc_dispatch(request)}
+            except Exception as ex:
+                LOG.exception("RPC request failed")
+                reply = {'error': str(ex)}
+            try:
+                write_frame(sock, reply)
+            except IOError:
+                break
+        sock.close()
+
+    def _rpc_dispatch(self, request):
+        op = request.get('op')
+        if op == 'flow_mods':
+            return mod_flow_entries(self.dpset, request.get('flows', []))
+        if op in ('flow_stats', 'port_stats'):
+            return get_stats(self.dpset, self.waiters, op,
+                             request.get('dpid', 0), request.get('flow'))
+        raise RyuRpcError('unknown operation: {0}'.format(op))
+
+    @set_ev_cls([ofp_event.EventOFPStatsReply,
+                 ofp_event.EventOFPFlowStatsReply,
+                 ofp_event.EventOFPPortStatsReply], MAIN_DISPATCHER)
+    def stats_reply_handler(self, ev):
+        """
+        Collect the (multipart) stats replies of requests sent by
+        get_stats, same as done by ofctl_rest.
+        """
+        msg = ev.msg
+        dp = msg.datapath
+        if msg.xid not in self.waiters.get(dp.id, {}):
+            return
+        lock, msgs = self.waiters[dp.id][msg.xid]
+        msgs.append(msg)
+        if dp.ofproto.OFP_VERSION >= ofproto_v1_3.OFP_VERSION:
+            more = dp.ofproto.OFPMPF_REPLY_MORE
+        else:
+            more = dp.ofproto.OFPSF_REPLY_MORE
+        if msg.flags & more:
+            return
+        del self.waiters[dp.id][msg.xid]
+        lock.set()
@@ -37,6 +37,10 @@ class SimpleSwitch13(app_manager.RyuApp):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
+        # forget what was learned for this dpid before, e.g. by a previous
+        # emulator run attached to the same controller
+        self.mac_to_port.pop(datapath.id, None)
+
         # install table-miss flow entry
         #
         # We specify NO BUFFER to max_len of the output action due to
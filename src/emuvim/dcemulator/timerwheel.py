@@ -0,0 +1,116 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Hashed timer wheel used by the monitoring agent to poll each monitored
+metric at its own interval from a single thread.
+"""
+import math
+import threading
+import time
+
+# resolution of the wheel in seconds (smallest polling interval)
+WHEEL_TICK = 0.05
+# number of slots, one turn of the wheel covers WHEEL_TICK * WHEEL_SLOTS s
+WHEEL_SLOTS = 256
+
+
+class TimerWheel(object):
+    """
+    Timer wheel with a fixed tick. Scheduled items are kept in the slot
+    of their deadline tick, so scheduling is O(1) and collecting the
+    expired items only looks at the slots of the elapsed ticks.
+    Deadlines further away than one turn stay in their slot until the
+    wheel reaches them in a later turn.
+    """
+
+    def __init__(self, tick=WHEEL_TICK, slots=WHEEL_SLOTS, now=None):
+        if now is None:
+            now = time.time()
+        self.tick = float(tick)
+        self.slots = [[] for _ in range(slots)]
+        # next tick to be processed
+        self.current = int(now / self.tick)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, item, delay, now=None):
+        """
+        Schedule an item to expire after delay seconds.
+        """
+        if now is None:
+            now = time.time()
+        deadline = int(math.ceil((now + delay) / self.tick))
+        with self._lock:
+            # never schedule into an already processed tick
+            deadline = max(deadline, self.current)
+            self.slots[deadline % len(self.slots)].append((deadline, item))
+            self._count += 1
+
+    def expired(self, now=None):
+        """
+        Remove and return the items whose deadline has passed.
+        :return: list of items, earliest deadline first
+        """
+        if now is None:
+            now = time.time()
+        target = int(now / self.tick)
+        due = []
+        with self._lock:
+            # after a full turn all slots have been looked at
+            last = min(target, self.current + len(self.slots) - 1)
+            for tick in range(self.current, last + 1):
+                slot = self.slots[tick % len(self.slots)]
+                if len(slot) == 0:
+                    continue
+                keep = []
+                for entry in slot:
+                    if entry[0] <= target:
+                        due.append(entry)
+                    else:
+                        keep.append(entry)
+                slot[:] = keep
+            self.current = max(self.current, target + 1)
+            self._count -= len(due)
+        due.sort(key=lambda entry: entry[0])
+        return [item for deadline, item in due]
+
+
+def backoff_interval(current, interval, changed, max_interval):
+    """
+    Adaptive polling interval: double it while the polled value does not
+    change, go back to the configured interval as soon as it changes.
+    :param current: interval used for the last poll
+    :param interval: configured (minimal) interval
+    :param changed: the value changed since the previous poll
+    :param max_interval: upper bound of the interval
+    :return: interval until the next poll
+    """
+    if changed:
+        return interval
+    return min(current * 2, max(interval, max_interval))
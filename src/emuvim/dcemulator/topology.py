@@ -0,0 +1,150 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+"""
+Build a DCNetwork from a declarative topology description (YAML or JSON).
+
+Example:
+
+network:                # arguments of DCNetwork
+  controller: ryu       # 'ryu' (default) or 'default' (Mininet controller)
+  enable_learning: true
+datacenters:
+  - dc1
+  - label: dc2
+    metadata: {location: Paderborn}
+switches:
+  - s1
+  - name: s2
+    dpid: "20"
+links:
+  - [dc1, s1]
+  - node1: s1
+    node2: dc2
+    delay: 10ms         # TCLink parameters
+    bw: 100
+    vlan: 10            # access vlan of the switch ports of this link
+
+The OVS bridges, ports and vlan tags of the whole topology are set up
+with a few ovs-vsctl calls when the network is started (ovs_batch).
+"""
+import json
+import logging
+import time
+import yaml
+from mininet.node import OVSSwitch, Controller, RemoteController
+from emuvim.dcemulator.net import DCNetwork
+
+LOG = logging.getLogger("dcemulator.topology")
+LOG.setLevel(logging.DEBUG)
+
+CONTROLLERS = {'ryu': RemoteController,
+               'remote': RemoteController,
+               'default': Controller}
+
+
+def read_topology(source):
+    """
+    Read a topology description.
+    :param source: path of a YAML or JSON file, or an already parsed dict
+    :return: dict
+    """
+    if isinstance(source, dict):
+        return source
+    with open(source) as f:
+        if source.endswith('.json'):
+            return json.load(f)
+        return yaml.safe_load(f)
+
+
+def load_topology(source, **net_params):
+    """
+    Create a DCNetwork with all data centers, switches and links of a
+    topology description. The network is not started.
+    :param source: path of a YAML or JSON file, or an already parsed dict
+    :param net_params: DCNetwork arguments, override the 'network' section
+    :return: DCNetwork
+    """
+    spec = read_topology(source)
+    params = dict(spec.get('network') or {})
+    params.update(net_params)
+    controller = params.get('controller', 'ryu')
+    if isinstance(controller, basestring):
+        if controller not in CONTROLLERS:
+            raise Exception("Controller unknown: %s" % controller)
+        params['controller'] = CONTROLLERS[controller]
+    params.setdefault('ovs_batch', True)
+    net = DCNetwork(**params)
+    build_topology(net, spec)
+    return net
+
+
+def build_topology(net, spec):
+    """
+    Add the data centers, switches and links of a topology description
+    to a (not yet started) network.
+    :param net: DCNetwork
+    :param spec: parsed topology description
+    """
+    t_start = time.time()
+    for dc in spec.get('datacenters') or []:
+        if isinstance(dc, basestring):
+            dc = {'label': dc}
+        net.addDatacenter(dc['label'], metadata=dc.get('metadata', {}),
+                          resource_log_path=dc.get('resource_log_path'))
+
+    for sw in spec.get('switches') or []:
+        if isinstance(sw, basestring):
+            sw = {'name': sw}
+        sw = dict(sw)
+        net.addSwitch(sw.pop('name'), **sw)
+
+    for link in spec.get('links') or []:
+        if isinstance(link, (list, tuple)):
+            link = {'node1': link[0], 'node2': link[1]}
+        link = dict(link)
+        vlan = link.pop('vlan', None)
+        l = net.addLink(_node(net, link.pop('node1')),
+                        _node(net, link.pop('node2')), **link)
+        if vlan is not None:
+            for intf in (l.intf1, l.intf2):
+                if isinstance(intf.node, OVSSwitch):
+                    net.setPortVlan(intf.node, intf.name, vlan)
+
+    LOG.info("Built topology with {0} data centers, {1} switches and {2} "
+             "links in {3:.3f}s".format(
+                 len(spec.get('datacenters') or []),
+                 len(spec.get('switches') or []),
+                 len(spec.get('links') or []), time.time() - t_start))
+    return net
+
+
+def _node(net, name):
+    if name in net.dcs:
+        return net.dcs[name]
+    node = net.getNodeByName(name)
+    if node is None:
+        raise Exception("Node unknown: %s" % name)
+    return node
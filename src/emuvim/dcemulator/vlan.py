@@ -0,0 +1,150 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import bisect
+import logging
+
+LOG = logging.getLogger("dcemulator.vlan")
+LOG.setLevel(logging.DEBUG)
+
+# usable 802.1Q VLAN ids
+VLAN_MIN = 1
+VLAN_MAX = 4094
+
+
+class VlanPoolExhausted(Exception):
+    pass
+
+
+class VlanAllocator(object):
+    """
+    Pool of VLAN tags used to isolate chains and E-LANs.
+    Tags are given back to the pool when the chain/E-LAN is removed.
+    Released tags are handed out again first (last released first),
+    otherwise the lowest tag that was never used.
+
+    If reuse_disjoint_paths is set, a tag that is already in use
+    is handed out again for a path that does not share a switch with
+    any of the paths using this tag.
+    """
+
+    def __init__(self, first=VLAN_MIN, last=VLAN_MAX,
+                 reuse_disjoint_paths=False):
+        self.reuse_disjoint_paths = reuse_disjoint_paths
+        # stack of free tags, pop() returns the last released one or the
+        # lowest one that was never used
+        self._free = list(range(last, first - 1, -1))
+        # tag -> number of chains/E-LANs using it
+        self._refs = dict()
+        # tag -> {switch name: number of paths using the tag on it}
+        self._switches = dict()
+        # switch name -> set of tags used on it
+        self._switch_tags = dict()
+        # sorted list of the tags used on at least one switch
+        self._shared = list()
+
+    def __len__(self):
+        """
+        Number of tags that were never handed out or were released.
+        """
+        return len(self._free)
+
+    def allocate(self, path=None):
+        """
+        Get a tag from the pool.
+        :param path: list of switches the tag will be used on
+        :return: VLAN tag (int)
+        """
+        tag = None
+        if self.reuse_disjoint_paths and path:
+            tag = self._find_disjoint_tag(path)
+        if tag is None:
+            if len(self._free) == 0:
+                raise VlanPoolExhausted(
+                    "No free VLAN tags left (%d tags in use)." %
+                    len(self._refs))
+            tag = self._free.pop()
+        self._refs[tag] = self._refs.get(tag, 0) + 1
+        if path:
+            switches = self._switches.setdefault(tag, dict())
+            if len(switches) == 0:
+                bisect.insort(self._shared, tag)
+            for sw in set(path):
+                if sw not in switches:
+                    self._switch_tags.setdefault(sw, set()).add(tag)
+                switches[sw] = switches.get(sw, 0) + 1
+        return tag
+
+    def release(self, tag, path=None):
+        """
+        Give a tag back to the pool.
+        :param tag: VLAN tag returned by allocate
+        :param path: same path as given to allocate
+        :return: True if the tag was allocated from this pool
+        """
+        if tag not in self._refs:
+            LOG.debug("VLAN tag %r not allocated from pool" % tag)
+            return False
+        if path and tag in self._switches:
+            switches = self._switches[tag]
+            for sw in set(path):
+                if sw in switches:
+                    switches[sw] -= 1
+                    if switches[sw] <= 0:
+                        self._unindex(tag, sw)
+        self._refs[tag] -= 1
+        if self._refs[tag] <= 0:
+            del self._refs[tag]
+            for sw in list(self._switches.get(tag, ())):
+                self._unindex(tag, sw)
+            self._switches.pop(tag, None)
+            self._free.append(tag)
+        return True
+
+    def in_use(self, tag):
+        return tag in self._refs
+
+    def _unindex(self, tag, sw):
+        # the tag is no longer used on the switch
+        switches = self._switches[tag]
+        del switches[sw]
+        tags = self._switch_tags[sw]
+        tags.discard(tag)
+        if len(tags) == 0:
+            del self._switch_tags[sw]
+        if len(switches) == 0:
+            del self._shared[bisect.bisect_left(self._shared, tag)]
+
+    def _find_disjoint_tag(self, path):
+        # tags used on the switches of the path
+        blocked = set()
+        for sw in set(path):
+            blocked.update(self._switch_tags.get(sw, ()))
+        # lowest tag in use that is not blocked, only the blocked tags
+        # are skipped
+        for tag in self._shared:
+            if tag not in blocked:
+                return tag
+        return None
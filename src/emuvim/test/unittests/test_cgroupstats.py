@@ -0,0 +1,111 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import os
+import shutil
+import tempfile
+import unittest
+from emuvim.dcemulator.cgroupstats import CgroupReader, parse_proc_cgroup
+
+
+class testCgroupStats(unittest.TestCase):
+    """
+    Test the cgroup v1 and v2 collector of the monitoring agent on fake
+    cgroup and proc trees.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, 'cgroup')
+        self.proc = os.path.join(self.tmp, 'proc')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, path, text):
+        path = os.path.join(self.tmp, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def testParseProcCgroup(self):
+        paths = parse_proc_cgroup(
+            "12:memory:/docker/abc\n"
+            "4:cpu,cpuacct:/docker/abc\n"
+            "0::/system.slice/docker-abc.scope\n")
+        self.assertTrue(paths['memory'] == '/docker/abc')
+        self.assertTrue(paths['cpuacct'] == '/docker/abc')
+        self.assertTrue(paths[''] == '/system.slice/docker-abc.scope')
+
+    def testCgroupV1(self):
+        self._write('proc/42/cgroup',
+                    "9:blkio:/docker/abc\n"
+                    "5:memory:/docker/abc\n"
+                    "4:cpu,cpuacct:/docker/abc\n")
+        # cpuacct is only mounted together with cpu
+        self._write('cgroup/cpu,cpuacct/docker/abc/cpuacct.usage',
+                    "1500000000\n")
+        self._write('cgroup/memory/docker/abc/memory.usage_in_bytes',
+                    "1048576\n")
+        self._write('cgroup/memory/docker/abc/memory.limit_in_bytes',
+                    "9223372036854771712\n")
+        self._write('cgroup/blkio/docker/abc/blkio.throttle.io_service_bytes',
+                    "8:0 Read 100\n8:0 Write 200\n8:16 Read 1\n"
+                    "8:16 Write 2\nTotal 303\n")
+        stats = CgroupReader(self.root, self.proc).stats(42)
+        self.assertTrue(stats['cpu_seconds'] == 1.5)
+        self.assertTrue(stats['memory_bytes'] == 1048576)
+        self.assertTrue(stats['memory_limit_bytes'] is None)
+        self.assertTrue(stats['blkio_read_bytes'] == 101)
+        self.assertTrue(stats['blkio_write_bytes'] == 202)
+
+    def testCgroupV2(self):
+        self._write('cgroup/cgroup.controllers', "cpu io memory\n")
+        self._write('proc/42/cgroup', "0::/system.slice/docker-abc.scope\n")
+        scope = 'cgroup/system.slice/docker-abc.scope/'
+        self._write(scope + 'cpu.stat',
+                    "usage_usec 2500000\nuser_usec 2000000\n")
+        self._write(scope + 'memory.current', "4096\n")
+        self._write(scope + 'memory.max', "536870912\n")
+        self._write(scope + 'io.stat',
+                    "8:0 rbytes=10 wbytes=20 rios=1 wios=2\n"
+                    "8:16 rbytes=5 wbytes=0 rios=1 wios=0\n")
+        stats = CgroupReader(self.root, self.proc).stats(42)
+        self.assertTrue(stats['cpu_seconds'] == 2.5)
+        self.assertTrue(stats['memory_bytes'] == 4096)
+        self.assertTrue(stats['memory_limit_bytes'] == 536870912)
+        self.assertTrue(stats['blkio_read_bytes'] == 15)
+        self.assertTrue(stats['blkio_write_bytes'] == 20)
+        # missing controllers are left out
+        os.remove(os.path.join(self.tmp, scope + 'io.stat'))
+        stats = CgroupReader(self.root, self.proc).stats(42)
+        self.assertTrue('blkio_read_bytes' not in stats)
+        # stopped container
+        self.assertRaises(IOError, CgroupReader(self.root, self.proc).stats, 43)
+
+
+if __name__ == '__main__':
+    unittest.main()
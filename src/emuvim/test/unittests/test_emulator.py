@@ -25,8 +25,10 @@
 # partner consortium (www.sonata-nfv.eu).
 import unittest
 from emuvim.dcemulator.node import EmulatorCompute
+from emuvim.dcemulator.topology import load_topology
 from emuvim.test.base import SimpleTestTopology
 from mininet.node import RemoteController
+from mininet.clean import cleanup
 
 
 # @unittest.skip("disabled topology tests for development")
@@ -104,6 +106,39 @@ class testEmulatorTopology(SimpleTestTopology):
         # stop Mininet network
         self.stopNet()
 
+    def testTopologyFile(self):
+        """
+        Create the network from a topology description.
+        The OVS bridges and ports are set up in a batch on start.
+        """
+        self.net = load_topology({
+            'network': {'controller': 'default'},
+            'datacenters': ['pop1', {'label': 'pop2',
+                                     'metadata': {'unittest_dc': 2}}],
+            'switches': ['s1', {'name': 's2'}],
+            'links': [['pop1', 's1'],
+                      {'node1': 's1', 'node2': 'pop2', 'delay': '1ms'},
+                      {'node1': 's1', 'node2': 's2', 'vlan': 10}]})
+        self.assertTrue(len(self.net.dcs) == 2)
+        self.assertTrue(self.net.dcs['pop2'].metadata['unittest_dc'] == 2)
+        self.assertTrue(len(self.net.switches) == 4)
+        self.h.append(self.net.addHost('h0'))
+        self.h.append(self.net.addHost('h1'))
+        self.net.addLink(self.net.dcs['pop1'], self.h[0])
+        self.net.addLink(self.h[1], self.net.dcs['pop2'])
+        # start Mininet network
+        self.startNet()
+        # check connectivity by using ping
+        self.assertTrue(self.net.ping([self.h[0], self.h[1]]) <= 0.0)
+        # the ports of the s1 -- s2 link are access ports of vlan 10
+        s2 = self.net.getNodeByName('s2')
+        for intf in s2.intfList():
+            if intf.name != 'lo':
+                self.assertTrue(
+                    s2.vsctl('get', 'port', intf.name, 'tag').strip() == '10')
+        # stop Mininet network
+        self.stopNet()
+
 
 class testEmulatorNetworking(SimpleTestTopology):
 
@@ -215,6 +250,58 @@ class testEmulatorNetworking(SimpleTestTopology):
         # stop Mininet network
         self.stopNet()
 
+    def testSDNChainingStopCompute(self):
+        """
+        Stopping a VNF removes its chains and gives their vlan tags and
+        reserved bandwidth back.
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+
+        # add compute resources
+        self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        self.dc[1].startCompute(
+            "vnf3", network=[{'id': 'intf3', 'ip': '10.0.10.3/24'}])
+        free_tags = len(self.net.vlans)
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', bw=10)
+        self.net.setChain('vnf1', 'vnf3', 'intf1', 'intf3',
+                          cmd='add-flow', bw=10)
+        self.assertTrue(len(self.net.listChains()) == 3)
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf3', 'intf3')
+        # stop vnf2: only the chains of vnf2 are removed
+        self.dc[1].stopCompute("vnf2")
+        self.assertTrue(len(self.net.listChains()) == 1)
+        self.assertTrue(self.net.chain_registry.find(
+            'vnf1', 'intf1', 'vnf2', 'intf2') is None)
+        self.assertTrue(len(self.net.vlans) == free_tags - 1)
+        for src, dst, key in chain['edges']:
+            edge = self.net.DCNetwork_graph[src][dst][key]
+            self.assertTrue(edge['n_chains'] == 1)
+            self.assertTrue(edge['bw_reserved_mbps'] == 10.0)
+        # stop vnf1: no chains left
+        self.dc[0].stopCompute("vnf1")
+        self.assertTrue(len(self.net.listChains()) == 0)
+        self.assertTrue(len(self.net.vlans) == free_tags)
+        for src, dst, key in chain['edges']:
+            edge = self.net.DCNetwork_graph[src][dst][key]
+            self.assertTrue(edge['n_chains'] == 0)
+            self.assertTrue(edge['bw_reserved_mbps'] == 0.0)
+        # stop Mininet network
+        self.stopNet()
+
     def testSDNChainingMultiService(self):
         """
         Create a two data centers and interconnect them with additional
@@ -273,6 +360,12 @@ class testEmulatorNetworking(SimpleTestTopology):
                           bidirectional=True, cmd='del-flows', cookie=1)
         # check connectivity of first service is down
         self.assertTrue(self.net.ping([vnf1, vnf2]) > 0.0)
+        # only the second service is registered
+        chains = self.net.listChains()
+        self.assertTrue(len(chains) == 2)
+        self.assertTrue(all(c['cookie'] == 2 for c in chains))
+        self.assertTrue(len(self.net.chain_registry.find(
+            'vnf11', 'intf1', 'vnf22', 'intf2')['switches']) == 5)
         # time.sleep(100)
         # check connectivity of second service is still up
         self.assertTrue(self.net.ping([vnf11, vnf22]) <= 0.0)
@@ -280,6 +373,558 @@ class testEmulatorNetworking(SimpleTestTopology):
         # stop Mininet network
         self.stopNet()
 
+    def testSDNChainingBatch(self):
+        """
+        Setup two services with a single setChains call.
+        All flow entries are sent to Ryu as one batch.
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        vnf11 = self.dc[0].startCompute(
+            "vnf11", network=[{'id': 'intf1', 'ip': '10.0.20.1/24'}])
+        vnf22 = self.dc[1].startCompute(
+            "vnf22", network=[{'id': 'intf2', 'ip': '10.0.20.2/24'}])
+        # setup links
+        ret = self.net.setChains([
+            {'vnf_src_name': 'vnf1', 'vnf_dst_name': 'vnf2',
+             'vnf_src_interface': 'intf1', 'vnf_dst_interface': 'intf2',
+             'cookie': 1},
+            {'vnf_src_name': 'vnf11', 'vnf_dst_name': 'vnf22',
+             'vnf_src_interface': 'intf1', 'vnf_dst_interface': 'intf2',
+             'cookie': 2}],
+            bidirectional=True, cmd='add-flow')
+        self.assertTrue(len(ret) == 2)
+        self.assertTrue(ret[0]['install_time'] >= ret[1]['install_time'])
+        # one timing dict per direction
+        self.assertTrue(len(ret[0]['timing']) == 2)
+        for step in ['port_lookup', 'path', 'staging', 'commit']:
+            self.assertTrue(step in ret[0]['timing'][0])
+        self.assertTrue(len(ret[0]['timing'][0]['commit']) == 5)
+        # check connectivity by using ping
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        self.assertTrue(self.net.ping([vnf11, vnf22]) <= 0.0)
+        # check first service cannot ping second service
+        self.assertTrue(self.net.ping([vnf1, vnf22]) > 0.0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingBatchDpctl(self):
+        """
+        Setup two services with a single setChains call without Ryu.
+        The flow entries are applied with one ovs-ofctl call per switch
+        and command.
+        """
+        # create network (default controller: dpctl mode)
+        self.createNet(
+            nswitches=2, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[1], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        self.dc[0].startCompute(
+            "vnf11", network=[{'id': 'intf1', 'ip': '10.0.20.1/24'}])
+        self.dc[1].startCompute(
+            "vnf22", network=[{'id': 'intf2', 'ip': '10.0.20.2/24'}])
+        chains = [
+            {'vnf_src_name': 'vnf1', 'vnf_dst_name': 'vnf2',
+             'vnf_src_interface': 'intf1', 'vnf_dst_interface': 'intf2',
+             'cookie': 1},
+            {'vnf_src_name': 'vnf11', 'vnf_dst_name': 'vnf22',
+             'vnf_src_interface': 'intf1', 'vnf_dst_interface': 'intf2',
+             'cookie': 2}]
+        ret = self.net.setChains(chains, bidirectional=True, cmd='add-flow')
+        self.assertTrue(len(ret) == 2)
+        self.assertTrue(len(self.net.listChains()) == 4)
+        # the flow entries of both services are on all switches
+        for sw in [self.s[0], self.s[1]]:
+            cookies = set(f['cookie'] for f in self.net._dump_flows(sw))
+            self.assertTrue(1 in cookies and 2 in cookies)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # remove both services with one call
+        self.net.setChains(chains, bidirectional=True, cmd='del-flows')
+        for sw in [self.s[0], self.s[1]]:
+            cookies = set(f['cookie'] for f in self.net._dump_flows(sw))
+            self.assertTrue(1 not in cookies and 2 not in cookies)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingRollback(self):
+        """
+        Setup a chain along a path with a missing link and check that
+        nothing of it is left behind.
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        n_vlans = len(self.net.vlans)
+        # s1 and s3 are not connected
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                cmd='add-flow', cookie=1,
+                                path=[self.dc[0].switch.name, 's1', 's3',
+                                      self.dc[1].switch.name])
+        self.assertTrue(ret.startswith("Chain setup failed"))
+        self.assertTrue(len(self.net.listChains()) == 0)
+        self.assertTrue(len(self.net.getFlows()) == 0)
+        self.assertTrue(len(self.net.vlans) == n_vlans)
+        # the same chain on the shortest path works
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                bidirectional=True, cmd='add-flow', cookie=1)
+        self.assertTrue(ret.startswith("success"))
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        self.assertTrue(len(self.net.listChains()[0]['timing']) == 4)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingPathCache(self):
+        """
+        Setup the same chain twice and check that the second
+        path computation is served from the path cache.
+        Check that a topology change invalidates the cache.
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        # setup, remove and setup the chain again
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          cmd='add-flow', cookie=1)
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          cmd='del-flows', cookie=1)
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          cmd='add-flow', cookie=1)
+        stats = self.net.getPathCacheStats()
+        # the removal uses the path stored in the chain registry
+        self.assertTrue(stats["misses"] == 1)
+        self.assertTrue(stats["hits"] == 1)
+        # topology changes invalidate the cache
+        version = stats["topology_version"]
+        self.net.addLink(self.s[0], self.s[2])
+        stats = self.net.getPathCacheStats()
+        self.assertTrue(stats["topology_version"] > version)
+        self.assertTrue(stats["size"] == 0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingObjective(self):
+        """
+        Setup chains with different routing objectives on a topology
+        where the shortest path is not the fastest one.
+        s1 -- s2 -- s3 (1ms per link) and s1 -- s3 (10ms)
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=False,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[0], self.s[1], delay='1ms')
+        self.net.addLink(self.s[1], self.s[2], delay='1ms')
+        self.net.addLink(self.s[0], self.s[2], delay='10ms')
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        # fewest hops: direct link
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow',
+                          objective='min_hops')
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        self.assertTrue(len(chain['path']) == 4)
+        self.assertTrue(chain['delay_us'] == 10000.0)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='del-flows')
+        # lowest delay: via s2
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                bidirectional=True, cmd='add-flow',
+                                objective='min_delay')
+        self.assertTrue('"path_delay_us": 2000.0' in ret)
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        self.assertTrue(len(chain['path']) == 5)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # unknown objective
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                cmd='add-flow', cookie=2, objective='foo')
+        self.assertTrue("unknown" in ret)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingWidestPathMultiHomed(self):
+        """
+        Setup a chain with the widest path objective next to a VNF that is
+        attached to both switches (its links are not limited).
+        s1 -- s2 (10 Mbit/s) and s1 -- d0 -- s2
+        """
+        # create network
+        self.createNet(
+            nswitches=2, ndatacenter=2, nhosts=0, ndockers=1,
+            autolinkswitches=False,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[0], self.s[1], bw=10)
+        self.net.addLink(self.d[0], self.s[0])
+        self.net.addLink(self.d[0], self.s[1])
+        self.net.addLink(self.s[1], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        # the VNF is not used as transit hop
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                bidirectional=True, cmd='add-flow',
+                                objective='max_bw')
+        self.assertTrue("not a switch" not in ret)
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        self.assertTrue(chain is not None)
+        self.assertTrue('d0' not in chain['path'])
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingECMP(self):
+        """
+        Spread two chains over two parallel links between s1 and s2.
+        """
+        # create network
+        self.createNet(
+            nswitches=2, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=False,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[0], self.s[1])
+        self.net.addLink(self.s[0], self.s[1])
+        self.net.addLink(self.s[1], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        vnf11 = self.dc[0].startCompute(
+            "vnf11", network=[{'id': 'intf1', 'ip': '10.0.20.1/24'}])
+        vnf22 = self.dc[1].startCompute(
+            "vnf22", network=[{'id': 'intf2', 'ip': '10.0.20.2/24'}])
+        # setup links
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', cookie=1,
+                          ecmp='least_loaded')
+        self.net.setChain('vnf11', 'vnf22', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', cookie=2,
+                          ecmp='least_loaded')
+        # each chain uses its own link between s1 and s2
+        chain1 = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        chain2 = self.net.chain_registry.find(
+            'vnf11', 'intf1', 'vnf22', 'intf2')
+        links1 = [e for e in chain1['edges'] if e[0] == 's1']
+        links2 = [e for e in chain2['edges'] if e[0] == 's1']
+        self.assertTrue(len(links1) == 1 and len(links2) == 1)
+        self.assertTrue(links1[0][2] != links2[0][2])
+        # check connectivity by using ping
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        self.assertTrue(self.net.ping([vnf11, vnf22]) <= 0.0)
+        # unknown mode
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                                cmd='add-flow', cookie=3, ecmp='foo')
+        self.assertTrue("unknown" in ret)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingReroute(self):
+        """
+        Remove a link used by a chain and check that the chain is
+        moved to the remaining path.
+        s1 -- s2 -- s3 and s1 -- s3
+        """
+        # create network
+        self.createNet(
+            nswitches=3, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[0], self.s[2])
+        self.net.addLink(self.s[2], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', cookie=1)
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        self.assertTrue(len(chain['path']) == 4)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # changed link parameters do not move the chain
+        ret = self.net.setLinkParams('s1', 's3', delay='1ms')
+        self.assertTrue(len(ret) == 2)
+        self.assertTrue(all(r['result'] == "unchanged" for r in ret))
+        # the direct link fails: both directions are moved to s2
+        ret = self.net.removeLink(node1=self.s[0], node2=self.s[2])
+        self.assertTrue(len(ret) == 2)
+        for r in ret:
+            self.assertTrue(r['result'].startswith("success"))
+            self.assertTrue(len(r['new_path']) == 5)
+            self.assertTrue(r['recovery_time'] >= 0)
+        self.assertTrue(len(self.net.listChains()) == 2)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # removal of the chain removes all flow entries
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='del-flows', cookie=1)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) > 0.0)
+        # no path left: the chains are removed
+        free_tags = len(self.net.vlans)
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', cookie=2)
+        chain = self.net.chain_registry.find('vnf1', 'intf1', 'vnf2', 'intf2')
+        ret = self.net.removeLink(node1=self.s[0], node2=self.s[1])
+        self.assertTrue(len(ret) == 2)
+        for r in ret:
+            self.assertTrue(r['removed'])
+            self.assertTrue(r['new_path'] is None)
+        self.assertTrue(len(self.net.listChains()) == 0)
+        self.assertTrue(len(self.net.vlans) == free_tags)
+        for src, dst, key in chain['edges']:
+            edge = self.net.DCNetwork_graph.get_edge_data(src, dst, key)
+            self.assertTrue(edge is None or edge['n_chains'] == 0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testRemoveParallelLink(self):
+        """
+        Remove one of two parallel links (VNF interfaces on the same DC
+        switch and switch to switch links), the other one stays usable.
+        """
+        # create network
+        self.createNet(
+            nswitches=2, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=False,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        l1 = self.net.addLink(self.s[0], self.s[1])
+        l2 = self.net.addLink(self.s[0], self.s[1])
+        self.net.addLink(self.s[1], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'},
+                             {'id': 'intf2', 'ip': '10.0.20.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf1', 'ip': '10.0.10.2/24'}])
+        # remove the link of the second VNF interface
+        intf2 = self.net._get_connected_switch_port('vnf1', 'intf2')
+        link = [l for l in self.net.links
+                if intf2['port_name'] in (l.intf1.name, l.intf2.name)][0]
+        self.net.removeLink(link=link)
+        self.assertTrue(
+            self.net._get_connected_switch_port('vnf1', 'intf2') is None)
+        self.assertTrue(
+            self.net.find_connected_dc_interface('vnf1', 'intf1') is not None)
+        # remove one of the switch to switch links
+        self.net.removeLink(link=l1)
+        self.assertTrue(
+            self.net._get_connected_switch_port('s1', l1.intf1.name) is None)
+        self.assertTrue(self.net._get_connected_switch_port(
+            's1', l2.intf1.name)['switch'] == 's2')
+        # the chain uses the remaining interface and link
+        ret = self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf1',
+                                bidirectional=True, cmd='add-flow')
+        self.assertTrue("not found" not in ret)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingReconcile(self):
+        """
+        Remove flow entries of a chain behind son-emu's back and add an
+        unknown one, then reconcile the switches with the shadow flow
+        table.
+        """
+        # create network
+        self.createNet(
+            nswitches=2, ndatacenter=2, nhosts=0, ndockers=0,
+            autolinkswitches=True,
+            controller=RemoteController,
+            enable_learning=False)
+        # setup links
+        self.net.addLink(self.dc[0], self.s[0])
+        self.net.addLink(self.s[1], self.dc[1])
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[1].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                          bidirectional=True, cmd='add-flow', cookie=3)
+        # one entry per direction on each of the 4 switches
+        self.assertTrue(len(self.net.getFlows(cookie=3)) == 8)
+        self.assertTrue(len(self.net.getFlows(switch='s1')) == 2)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        # drift: entries lost on s1, stale entry on s2
+        self.s[0].dpctl('del-flows', '-O OpenFlow13 cookie=3/-1')
+        self.s[1].dpctl('add-flow', '-O OpenFlow13 cookie=99,in_port=99,'
+                                    'actions=drop')
+        self.assertTrue(self.net.ping([vnf1, vnf2]) > 0.0)
+        ret = self.net.reconcileFlows()
+        self.assertTrue(ret['s1'] == {'missing': 2, 'stale': 0})
+        self.assertTrue(ret['s2'] == {'missing': 0, 'stale': 1})
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        ret = self.net.reconcileFlows()
+        self.assertTrue(all(r == {'missing': 0, 'stale': 0}
+                            for r in ret.values()))
+        # teardown only touches the switches with entries of the cookie
+        self.assertTrue(len(self.net.deleteFlowsByCookie(3)) == 4)
+        self.assertTrue(len(self.net.getFlows(cookie=3)) == 0)
+        self.assertTrue(self.net.ping([vnf1, vnf2]) > 0.0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testELAN(self):
+        """
+        Put two of three VNFs into an E-LAN and remove it again.
+        """
+        # create network
+        self.createNet(nswitches=0, ndatacenter=1, nhosts=0, ndockers=0)
+        # start Mininet network
+        self.startNet()
+        # add compute resources
+        vnf1 = self.dc[0].startCompute(
+            "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+        vnf2 = self.dc[0].startCompute(
+            "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+        vnf3 = self.dc[0].startCompute(
+            "vnf3", network=[{'id': 'intf3', 'ip': '10.0.10.3/24'}])
+        self.assertTrue(self.net.ping([vnf1, vnf3]) <= 0.0)
+        n_vlans = len(self.net.vlans)
+        lan_id = self.net.setLAN([{'name': 'vnf1', 'interface': 'intf1'},
+                                  {'name': 'vnf2', 'interface': 'intf2'}])
+        lans = self.net.listLANs()
+        self.assertTrue(len(lans) == 1)
+        self.assertTrue(lans[0]['id'] == lan_id)
+        self.assertTrue(len(lans[0]['members']) == 2)
+        self.assertTrue(len(self.net.vlans) == n_vlans - 1)
+        sw = self.dc[0].switch
+        port = lans[0]['members'][0]['port']
+        self.assertTrue(sw.vsctl('get', 'port', port, 'tag').strip() ==
+                        str(lans[0]['vlan']))
+        # only the members of the E-LAN can reach each other
+        self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+        self.assertTrue(self.net.ping([vnf1, vnf3]) > 0.0)
+        # remove the E-LAN
+        self.assertTrue(self.net.removeLAN(lan_id))
+        self.assertFalse(self.net.removeLAN(lan_id))
+        self.assertTrue(len(self.net.listLANs()) == 0)
+        self.assertTrue(len(self.net.vlans) == n_vlans)
+        self.assertTrue(sw.vsctl('get', 'port', port, 'tag').strip() == '[]')
+        self.assertTrue(self.net.ping([vnf1, vnf3]) <= 0.0)
+        # stop Mininet network
+        self.stopNet()
+
+    def testSDNChainingReuseRyu(self):
+        """
+        Attach a second network to the Ryu controller started by
+        the first one and setup a chain with it.
+        """
+        for run in range(0, 2):
+            self.s = []
+            self.dc = []
+            # create network
+            self.createNet(
+                nswitches=1, ndatacenter=2, nhosts=0, ndockers=0,
+                autolinkswitches=True,
+                controller=RemoteController,
+                enable_learning=False,
+                reuse_ryu=True)
+            # setup links
+            self.net.addLink(self.dc[0], self.s[0])
+            self.net.addLink(self.s[0], self.dc[1])
+            # start Mininet network
+            self.startNet()
+            if run == 0:
+                # controller started by this network
+                self.assertTrue(self.net.ryu_process is not None)
+            else:
+                # attached to the running controller
+                self.assertTrue(self.net.ryu_process is None)
+            vnf1 = self.dc[0].startCompute(
+                "vnf1", network=[{'id': 'intf1', 'ip': '10.0.10.1/24'}])
+            vnf2 = self.dc[1].startCompute(
+                "vnf2", network=[{'id': 'intf2', 'ip': '10.0.10.2/24'}])
+            self.net.setChain('vnf1', 'vnf2', 'intf1', 'intf2',
+                              bidirectional=True, cmd='add-flow')
+            self.assertTrue(self.net.ping([vnf1, vnf2]) <= 0.0)
+            # stop Mininet network, the controller keeps running
+            self.stopNet()
+            cleanup()
+        self.net.killRyu()
+
 # @unittest.skip("disabled compute tests for development")
 
 
@@ -317,6 +962,38 @@ class testEmulatorCompute(SimpleTestTopology):
         # stop Mininet network
         self.stopNet()
 
+    def testAddComputeBatchSingleDC(self):
+        """
+        Adds multiple compute instances to a single DC with
+        one startComputeBatch call and checks their connectivity
+        and the reported errors.
+        """
+        # create network
+        self.createNet(nswitches=0, ndatacenter=1, nhosts=1, ndockers=0)
+        # setup links
+        self.net.addLink(self.dc[0], self.h[0])
+        # start Mininet network
+        self.startNet()
+        # add compute resources, one of them twice
+        ret = self.dc[0].startComputeBatch(
+            [{"name": "vnf%d" % i} for i in range(0, 4)] + [{"name": "vnf0"}],
+            max_workers=2)
+        self.assertTrue(len(ret) == 5)
+        self.assertTrue(all(r["error"] is None for r in ret[:4]))
+        self.assertTrue(ret[4]["compute"] is None)
+        self.assertTrue("already exists" in ret[4]["error"])
+        # check number of running nodes
+        self.assertTrue(len(self.getContainernetContainers()) == 4)
+        self.assertTrue(len(self.dc[0].listCompute()) == 4)
+        # the containers created in parallel got different addresses
+        self.assertTrue(
+            len(set(r["compute"].IP() for r in ret[:4])) == 4)
+        # check connectivity by using ping
+        self.assertTrue(self.net.ping(
+            [self.h[0]] + [r["compute"] for r in ret[:4]]) <= 0.0)
+        # stop Mininet network
+        self.stopNet()
+
     def testRemoveSingleComputeSingleDC(self):
         """
         Test stop method for compute instances.
@@ -336,6 +1013,7 @@ class testEmulatorCompute(SimpleTestTopology):
         self.assertTrue(len(self.net.switches) == 1)
         # check compute list result
         self.assertTrue(len(self.dc[0].listCompute()) == 1)
+        self.assertTrue(self.net.getContainer("vnf1") is vnf1)
         # check connectivity by using ping
         self.assertTrue(self.net.ping([self.h[0], vnf1]) <= 0.0)
         # remove compute resources
@@ -346,6 +1024,8 @@ class testEmulatorCompute(SimpleTestTopology):
         self.assertTrue(len(self.net.switches) == 1)
         # check compute list result
         self.assertTrue(len(self.dc[0].listCompute()) == 0)
+        self.assertTrue(self.net.getContainer("vnf1") is None)
+        self.assertTrue(len(self.net.getAllContainers()) == 0)
         # stop Mininet network
         self.stopNet()
 
@@ -0,0 +1,190 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator import flowbatch
+from emuvim.dcemulator.flowbatch import DpctlFlowBatch, VsctlBatch, \
+    RyuFlowBatch
+from emuvim.dcemulator.ryurpc import RyuRpcError, RyuRpcReplyError
+
+
+class FakePopen(object):
+    """
+    Records the ovs-ofctl/ovs-vsctl calls instead of running them.
+    """
+    calls = []
+    # switch names on which the calls fail
+    failing = set()
+
+    def __init__(self, args, **kwargs):
+        self.args = args
+        self.returncode = 0
+        if any(arg in FakePopen.failing for arg in args):
+            self.returncode = 1
+
+    def communicate(self, input=None):
+        FakePopen.calls.append((self.args, input))
+        if self.returncode != 0:
+            return '', 'error'
+        return '', ''
+
+
+class FakeRyuNet(object):
+    """
+    Network with a Ryu RPC channel that fails with the given error and
+    a REST session that records the requests.
+    """
+
+    class Switch(object):
+        def __init__(self, name, dpid):
+            self.name = name
+            self.dpid = dpid
+
+    class Reply(object):
+        status_code = 200
+
+        def json(self):
+            return {'errors': [], 'failed': []}
+
+    def __init__(self, error):
+        self.error = error
+        self.switches = [self.Switch('s1', '0000000000000001')]
+        self.ryu_rpc = self
+        self.ryu_REST_api = 'http://127.0.0.1:8080'
+        self.RyuSession = self
+        self.posts = []
+
+    def call(self, op, **params):
+        raise self.error
+
+    def post(self, url, json=None):
+        self.posts.append((url, json))
+        return self.Reply()
+
+
+class testFlowBatch(unittest.TestCase):
+    """
+    Test the batched ovs-ofctl and ovs-vsctl calls (dpctl mode).
+    """
+
+    def setUp(self):
+        self.popen = flowbatch.Popen
+        flowbatch.Popen = FakePopen
+        FakePopen.calls = []
+        FakePopen.failing = set()
+
+    def tearDown(self):
+        flowbatch.Popen = self.popen
+
+    def testDpctlGrouping(self):
+        b = DpctlFlowBatch()
+        b.add('s1', 'add-flow', 'cookie=1,in_port=1,actions=output:2')
+        b.add('s1', 'add-flow', 'cookie=1,in_port=2,actions=output:1')
+        b.add('s2', 'add-flow', 'cookie=1,in_port=3,actions=output:4')
+        b.add('s1', 'del-flows', 'cookie=2/-1')
+        b.add('s1', 'add-flow', 'cookie=2,in_port=1,actions=output:3')
+        self.assertRaises(Exception, b.add, 's1', 'mod-flows', 'in_port=1')
+        self.assertTrue(len(b) == 5)
+        self.assertTrue(b.switches() == ['s1', 's2'])
+        # one call per run of the same command, in order per switch
+        self.assertTrue(b.commit() == 4)
+        self.assertTrue(len(b) == 0)
+        cmds = [(args[-3], args[-2], flows) for args, flows in FakePopen.calls]
+        self.assertTrue(cmds == [
+            ('add-flows', 's1', 'cookie=1,in_port=1,actions=output:2\n'
+                                'cookie=1,in_port=2,actions=output:1\n'),
+            ('del-flows', 's1', 'cookie=2/-1\n'),
+            ('add-flows', 's1', 'cookie=2,in_port=1,actions=output:3\n'),
+            ('add-flows', 's2', 'cookie=1,in_port=3,actions=output:4\n')])
+        self.assertTrue(all(args[1:3] == ['-O', 'OpenFlow13']
+                            for args, _ in FakePopen.calls))
+        self.assertTrue(len(b.timings) == 4)
+        self.assertTrue(b.timings[0]['flows'] == 2)
+        self.assertTrue(len(b.failed) == 0)
+
+    def testDpctlBundleAndFailure(self):
+        b = DpctlFlowBatch(bundle=True)
+        b.add('s1', 'add-flow', 'in_port=1,actions=output:2')
+        b.add('s2', 'add-flow', 'in_port=1,actions=output:2')
+        FakePopen.failing = set(['s2'])
+        self.assertTrue(b.commit() == 2)
+        self.assertTrue(FakePopen.calls[0][0][:4] ==
+                        ['ovs-ofctl', '-O', 'OpenFlow14', '--bundle'])
+        self.assertTrue(b.failed == set(['s2']))
+
+    def testDpctlRollbackAndDefer(self):
+        b = DpctlFlowBatch()
+        b.add('s1', 'add-flow', 'in_port=1,actions=output:2')
+        savepoint = b.savepoint()
+        b.add('s1', 'add-flow', 'in_port=2,actions=output:1')
+        b.add('s2', 'add-flow', 'in_port=1,actions=output:2')
+        b.rollback(savepoint)
+        self.assertTrue(len(b) == 1)
+        self.assertTrue(b.switches() == ['s1'])
+        b.add('s2', 'add-flow', 'in_port=1,actions=output:2')
+
+        class Node(object):
+            name = 's1'
+        b.defer(Node())
+        self.assertTrue(b.switches() == ['s2', 's1'])
+
+    def testRyuRpcErrorReply(self):
+        net = FakeRyuNet(RyuRpcReplyError('datapath 1 not found'))
+        b = RyuFlowBatch(net)
+        b.add('stats/flowentry/add', {'dpid': 1, 'cookie': 1})
+        b.commit()
+        # failed batch, not sent again over REST
+        self.assertTrue(len(net.posts) == 0)
+        self.assertTrue(b.failed == set(['s1']))
+        self.assertTrue(len(b) == 0)
+
+    def testRyuRpcUnavailable(self):
+        net = FakeRyuNet(RyuRpcError('connection refused'))
+        b = RyuFlowBatch(net)
+        b.add('stats/flowentry/add', {'dpid': 1, 'cookie': 1})
+        b.commit()
+        # sent over REST instead
+        self.assertTrue(len(net.posts) == 1)
+        self.assertTrue(net.posts[0][1]['flows'][0]['cmd'] == 'add')
+        self.assertTrue(len(b.failed) == 0)
+
+    def testVsctl(self):
+        b = VsctlBatch()
+        b.add('set', 'port', 's1-eth1', 'tag=5')
+        b.add('del-port', 's1', 's1-eth2')
+        self.assertTrue(b.commit() == 1)
+        self.assertTrue(FakePopen.calls[0][0] ==
+                        ['ovs-vsctl', '--', 'set', 'port', 's1-eth1', 'tag=5',
+                         '--', 'del-port', 's1', 's1-eth2'])
+        self.assertTrue(len(b) == 0)
+        # a failed transaction is reported
+        FakePopen.failing = set(['s3'])
+        b.add('del-br', 's3')
+        b.commit()
+        self.assertTrue(b.errors == ['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator.flowtable import ShadowFlowTable, normalize_match, \
+    parse_ofctl_flow, parse_ofctl_dump, parse_ryu_stats
+
+DUMP = """OFPST_FLOW reply (OF1.3) (xid=0x2):
+ cookie=0x1, duration=2.1s, table=0, n_packets=3, n_bytes=294, priority=1000,in_port=1 actions=push_vlan:0x8100,set_field:4097->vlan_vid,output:2
+ cookie=0x1, duration=2.1s, table=0, n_packets=0, n_bytes=0, in_port=2,dl_vlan=1 actions=pop_vlan,output:1
+ cookie=0x7, duration=9.5s, table=0, n_packets=0, n_bytes=0, priority=1,ip,in_port=3 actions=output:4
+ cookie=0x0, duration=9.5s, table=0, n_packets=9, n_bytes=0, priority=0 actions=CONTROLLER:65535
+"""
+
+
+class testShadowFlowTable(unittest.TestCase):
+    """
+    Test the shadow flow table and the parsing of live flow tables.
+    """
+
+    def testParse(self):
+        self.assertTrue(normalize_match('in_port=1,dl_vlan=0x1,ip') ==
+                        {'in_port': 1, 'dl_vlan': 1, 'dl_type': 0x0800})
+        self.assertTrue(normalize_match({'eth_type': 2048, 'in_port': 1}) ==
+                        normalize_match('ip,in_port=1'))
+        f = parse_ofctl_flow('"cookie=5,in_port=2,table=5,ip,actions=,output:1"')
+        self.assertTrue(f['cookie'] == 5)
+        self.assertTrue(f['table_id'] == 5)
+        self.assertTrue(f['priority'] == 0x8000)
+        self.assertTrue(f['raw_match'] == 'in_port=2,ip')
+        flows = parse_ofctl_dump(DUMP)
+        self.assertTrue(len(flows) == 4)
+        self.assertTrue(flows[1]['match'] == {'in_port': 2, 'dl_vlan': 1})
+        self.assertTrue(flows[1]['priority'] == 0x8000)
+        self.assertTrue(flows[3]['cookie'] == 0)
+        flows = parse_ryu_stats([{'cookie': 1, 'priority': 1000,
+                                  'table_id': 0, 'actions': ['OUTPUT:2'],
+                                  'match': {'in_port': 1, 'dl_vlan': '3'}}])
+        self.assertTrue(flows[0]['match'] == {'in_port': 1, 'dl_vlan': 3})
+
+    def testAddDelete(self):
+        t = ShadowFlowTable()
+        t.add('s1', {'in_port': 1}, cookie=1, priority=1000, flow={})
+        t.add('s1', {'in_port': 2, 'dl_vlan': 1}, cookie=1, priority=1000)
+        t.add_ofctl('s2', 'cookie=1,in_port=1,action=output:2')
+        t.add_ofctl('s2', 'cookie=2,in_port=1,dl_vlan=4,action=output:3')
+        self.assertTrue(len(t) == 4)
+        # same entry again replaces the old one
+        t.add('s1', {'in_port': 1}, cookie=1, priority=1000, flow={'x': 1})
+        self.assertTrue(len(t) == 4)
+        self.assertTrue(t.flows('s1')[-1]['flow'] == {'x': 1})
+        self.assertTrue(sorted(t.switches(cookie=2)) == ['s2'])
+        self.assertTrue(len(t.flows(cookie=1)) == 3)
+        # non-strict delete: all entries containing the match
+        self.assertTrue(len(t.delete('s2', 'in_port=1', cookie=3)) == 0)
+        self.assertTrue(len(t.delete('s2', 'in_port=1')) == 2)
+        self.assertTrue(t.switches() == ['s1'])
+        self.assertTrue(len(t.delete('s1', cookie=1)) == 2)
+        self.assertTrue(len(t) == 0)
+
+    def testDiff(self):
+        t = ShadowFlowTable()
+        t.add_ofctl('s1', 'cookie=1,priority=1000,in_port=1,'
+                          'action=mod_vlan_vid:1,output=2')
+        t.add_ofctl('s1', 'cookie=1,in_port=2,dl_vlan=1,'
+                          'action=strip_vlan,output=1')
+        t.add_ofctl('s1', 'cookie=1,in_port=5,action=output:6')
+        missing, stale = t.diff('s1', parse_ofctl_dump(DUMP))
+        # in_port=5 entry is gone, cookie 7 is unknown, cookie 0 is kept
+        self.assertTrue(len(missing) == 1)
+        self.assertTrue(missing[0]['match'] == {'in_port': 5})
+        self.assertTrue(missing[0]['flow'].endswith('output:6'))
+        self.assertTrue(len(stale) == 1)
+        self.assertTrue(stale[0]['cookie'] == 7)
+        missing, stale = t.diff('s1', parse_ofctl_dump(DUMP), prune=False)
+        self.assertTrue(len(stale) == 0)
+
+    def testRollback(self):
+        t = ShadowFlowTable()
+        t.add('s1', {'in_port': 1}, cookie=1, priority=1000, flow={'a': 1})
+        t.add('s1', {'in_port': 3}, cookie=2, priority=1000)
+        sp = t.savepoint()
+        t.add('s1', {'in_port': 1}, cookie=1, priority=1000, flow={'a': 2})
+        t.add('s2', {'in_port': 2}, cookie=1, priority=1000)
+        t.delete('s1', cookie=2)
+        self.assertTrue(len(t) == 2)
+        t.rollback(sp)
+        self.assertTrue(len(t) == 2)
+        self.assertTrue(t.switches() == ['s1'])
+        self.assertTrue(t.flows('s1', cookie=1)[0]['flow'] == {'a': 1})
+        self.assertTrue(len(t.flows('s1', cookie=2)) == 1)
+        t.release()
+        t.add('s2', {'in_port': 2}, cookie=1, priority=1000)
+        t.rollback(sp)
+        self.assertTrue(len(t) == 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
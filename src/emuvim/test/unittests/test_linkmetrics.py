@@ -0,0 +1,116 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+import networkx as nx
+from emuvim.dcemulator.linkmetrics import parse_time_us, link_metrics, \
+    widest_path, path_delay_us, edge_load, max_residual_bw, link_utilization
+
+
+class testLinkMetrics(unittest.TestCase):
+    """
+    Test the typed link metrics and path functions used for chain routing.
+    """
+
+    def _graph(self, links):
+        g = nx.MultiDiGraph()
+        for n1, n2, params in links:
+            g.add_edge(n1, n2, **link_metrics(params))
+            g.add_edge(n2, n1, **link_metrics(params))
+        return g
+
+    def testParse(self):
+        self.assertTrue(parse_time_us('10ms') == 10000.0)
+        self.assertTrue(parse_time_us('2.5us') == 2.5)
+        self.assertTrue(parse_time_us('1s') == 1000000.0)
+        # tc default unit
+        self.assertTrue(parse_time_us(100) == 100.0)
+        self.assertTrue(parse_time_us(None) is None)
+        self.assertRaises(ValueError, parse_time_us, '10 parsecs')
+        m = link_metrics({'delay': '5ms', 'bw': 100, 'loss': 1})
+        self.assertTrue(m['delay_us'] == 5000.0)
+        self.assertTrue(m['bw_mbps'] == 100.0)
+        self.assertTrue(m['loss_ratio'] == 0.01)
+        m = link_metrics({})
+        self.assertTrue(m['delay_us'] == 0.0)
+        self.assertTrue(m['bw_mbps'] is None)
+
+    def testPaths(self):
+        # s1 - s2 - s3 (fast, 10 Mbit/s) and s1 - s3 (slow, 100 Mbit/s)
+        g = self._graph([('s1', 's2', {'delay': '1ms', 'bw': 10}),
+                         ('s2', 's3', {'delay': '1ms', 'bw': 10}),
+                         ('s1', 's3', {'delay': '10ms', 'bw': 100})])
+        self.assertTrue(nx.shortest_path(g, 's1', 's3', weight='delay_us') ==
+                        ['s1', 's2', 's3'])
+        self.assertTrue(path_delay_us(g, ['s1', 's2', 's3']) == 2000.0)
+        self.assertTrue(widest_path(g, 's1', 's3') == ['s1', 's3'])
+        # reserved bandwidth reduces the residual bandwidth
+        g['s1']['s3'][0]['bw_reserved_mbps'] = 95.0
+        self.assertTrue(widest_path(g, 's1', 's3') == ['s1', 's2', 's3'])
+        # unlimited links are preferred, with the fewest hops
+        g = self._graph([('s1', 's2', {}), ('s2', 's3', {}),
+                         ('s1', 's3', {'bw': 100})])
+        self.assertTrue(widest_path(g, 's1', 's3') == ['s1', 's2', 's3'])
+        g.add_edge('s1', 's4', **link_metrics({}))
+        g.add_edge('s4', 's3', **link_metrics({}))
+        self.assertTrue(len(widest_path(g, 's1', 's3')) == 3)
+        # s5 can only send to s1
+        g.add_edge('s5', 's1', **link_metrics({}))
+        self.assertRaises(Exception, widest_path, g, 's3', 's5')
+
+    def testWidestPathTransit(self):
+        # s1 - s2 (10 Mbit/s) and s1 - vnf1 - s2 (not limited)
+        g = self._graph([('s1', 's2', {'bw': 10}),
+                         ('s1', 'vnf1', {}), ('vnf1', 's2', {})])
+        self.assertTrue(widest_path(g, 's1', 's2') == ['s1', 'vnf1', 's2'])
+        # only switches forward traffic
+        self.assertTrue(widest_path(g, 's1', 's2', transit=['s1', 's2']) ==
+                        ['s1', 's2'])
+        g = self._graph([('s1', 'vnf1', {}), ('vnf1', 's2', {})])
+        self.assertRaises(Exception, widest_path, g, 's1', 's2',
+                          transit=['s1', 's2'])
+
+    def testParallelLinks(self):
+        # two parallel links s1 -> s2, the second one faster and wider
+        g = self._graph([('s1', 's2', {'delay': '5ms', 'bw': 10}),
+                         ('s1', 's2', {'delay': '1ms', 'bw': 100})])
+        self.assertTrue(path_delay_us(g, ['s1', 's2']) == 1000.0)
+        self.assertTrue(max_residual_bw(g, 's1', 's2') == 100.0)
+        g['s1']['s2'][1]['bw_reserved_mbps'] = 95.0
+        g['s1']['s2'][1]['n_chains'] = 1
+        self.assertTrue(max_residual_bw(g, 's1', 's2') == 10.0)
+        self.assertTrue(edge_load(g['s1']['s2'][1]) == (95.0, 1))
+        self.assertTrue(edge_load(g['s1']['s2'][0]) == (0.0, 0))
+
+    def testUtilization(self):
+        # 1.25 MB/s on a 100 Mbit/s link
+        self.assertTrue(link_utilization(1250000.0, 100.0) == 0.1)
+        self.assertTrue(link_utilization(0.0, 10.0) == 0.0)
+        # not limited or not measured yet
+        self.assertTrue(link_utilization(1250000.0, None) is None)
+        self.assertTrue(link_utilization(None, 100.0) is None)
+
+if __name__ == '__main__':
+    unittest.main()
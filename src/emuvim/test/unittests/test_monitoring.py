@@ -0,0 +1,225 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import threading
+import time
+import unittest
+import requests
+from prometheus_client import CollectorRegistry, Gauge
+from emuvim.dcemulator import monitoring
+from emuvim.dcemulator.monitoring import DCNetworkMonitor, PrometheusExporter
+
+
+class FakeNet(object):
+    """
+    Network without containers and without Ryu (dpctl mode).
+    """
+    controller = None
+
+    def __init__(self):
+        self.ryu_requests = 0
+
+    def getAllContainers(self):
+        return []
+
+    def ryu_REST(self, prefix, dpid=None, data=None):
+        self.ryu_requests += 1
+        raise Exception('Ryu not running')
+
+
+class FailingNet(FakeNet):
+    """
+    Network whose container list fails once, e.g. because a container
+    was removed meanwhile.
+    """
+
+    def __init__(self):
+        FakeNet.__init__(self)
+        self.polls = 0
+
+    def getAllContainers(self):
+        self.polls += 1
+        if self.polls == 1:
+            raise RuntimeError('dictionary changed size during iteration')
+        return []
+
+
+class FakeNetDevReader(object):
+    """
+    Interface counters of the switch side interfaces, rx grows by 1000
+    bytes per read.
+    """
+
+    def __init__(self):
+        self.reads = 0
+
+    def counters(self, pid=None):
+        self.reads += 1
+        stats = {'rx_bytes': 1000 * self.reads, 'tx_bytes': 5,
+                 'rx_packets': self.reads, 'tx_packets': 1}
+        return {'dc1.s1-eth2': dict(stats), 'dc1.s1-eth3': dict(stats)}
+
+
+class testMonitoring(unittest.TestCase):
+    """
+    Test the Prometheus endpoint of the monitoring agent, the removal of
+    the series of stopped metrics and the interface counters collector
+    (no Ryu needed).
+    """
+
+    def setUp(self):
+        # the Docker client is only used by skewmon and cAdvisor
+        self.from_env = monitoring.docker.from_env
+        monitoring.docker.from_env = lambda: None
+        self.monitor = DCNetworkMonitor(
+            FakeNet(), exporter_port=0, port_counters='netdev')
+        self.monitor.netdev = FakeNetDevReader()
+        self.url = 'http://127.0.0.1:%d/metrics' % \
+            self.monitor.exporter.server_address[1]
+
+    def tearDown(self):
+        self.monitor.stop()
+        monitoring.docker.from_env = self.from_env
+
+    def _metric(self, vnf_name, vnf_interface, metric='tx_bytes'):
+        metric_dict = {'vnf_name': vnf_name, 'vnf_interface': vnf_interface,
+                       'metric_key': metric, 'switch_dpid': 1,
+                       'mon_port': int(vnf_interface[-1]) + 1,
+                       'mon_intf': 'dc1.s1-eth%d' % (int(vnf_interface[-1]) + 1)}
+        self.monitor._set_interval(metric_dict, None, False)
+        self.monitor._add_metric(
+            self.monitor.monitor_lock, 'network_metrics', metric_dict)
+        return metric_dict
+
+    def _value(self, vnf_name, vnf_interface, metric='tx_bytes'):
+        return self.monitor.registry.get_sample_value(
+            'sonemu_%s_count_%s' % tuple(metric.split('_')),
+            {'vnf_name': vnf_name, 'vnf_interface': vnf_interface,
+             'flow_id': 'None'})
+
+    def testExporter(self):
+        registry = CollectorRegistry()
+        g = Gauge('sonemu_test', 'test gauge', ['vnf_name'],
+                  registry=registry)
+        g.labels(vnf_name='vnf1').set(42)
+        exporter = PrometheusExporter(registry, 0, '127.0.0.1')
+        try:
+            port = exporter.server_address[1]
+            r = requests.get('http://127.0.0.1:%d/metrics' % port)
+            self.assertTrue(r.status_code == 200)
+            self.assertTrue('sonemu_test{vnf_name="vnf1"} 42.0' in r.text)
+            r = requests.get('http://127.0.0.1:%d/' % port)
+            self.assertTrue(r.status_code == 200)
+            r = requests.get('http://127.0.0.1:%d/foo' % port)
+            self.assertTrue(r.status_code == 404)
+        finally:
+            exporter.stop()
+
+    def testExporterPortInUse(self):
+        port = self.monitor.exporter.server_address[1]
+        threads = threading.active_count()
+        self.assertRaises(Exception, DCNetworkMonitor, FakeNet(),
+                          exporter_port=port, port_counters='netdev')
+        # no polling thread is left behind
+        self.assertTrue(threading.active_count() == threads)
+        self.assertTrue(self.monitor.monitor_thread.daemon)
+
+    def testCollectorError(self):
+        net = FailingNet()
+        monitor = DCNetworkMonitor(net, exporter_port=None,
+                                   port_counters='netdev',
+                                   compute_interval=0.1)
+        try:
+            for i in range(0, 50):
+                if net.polls > 1:
+                    break
+                time.sleep(0.1)
+            # the polling thread survived the error and polls again
+            self.assertTrue(net.polls > 1)
+            self.assertTrue(monitor.monitor_thread.is_alive())
+        finally:
+            monitor.stop()
+
+    def testFlowMetricsWithoutRyu(self):
+        flow_dict = {'vnf_name': 'vnf1', 'vnf_interface': 'intf1',
+                     'metric_key': 'tx_packets', 'cookie': 1,
+                     'switch_dpid': 1, 'mon_port': 2}
+        self.monitor._set_interval(flow_dict, None, False)
+        self.monitor.get_flow_metrics((flow_dict,))
+        self.monitor.get_flow_metrics((flow_dict,))
+        # no stats requests without a controller, warned once
+        self.assertTrue(self.monitor.net.ryu_requests == 0)
+        self.assertTrue(self.monitor.flow_stats_warned)
+
+    def testNetdevCounters(self):
+        self._metric('vnf1', 'intf1')
+        self.monitor.get_network_metrics(self.monitor.network_metrics)
+        # vnf tx is the rx of the switch side interface
+        self.assertTrue(self._value('vnf1', 'intf1') == 1000)
+        time.sleep(0.1)
+        self.monitor.get_network_metrics(self.monitor.network_metrics)
+        self.assertTrue(self._value('vnf1', 'intf1') == 2000)
+        rates = self.monitor.get_rates(vnf_name='vnf1')
+        self.assertTrue(len(rates) == 1)
+        self.assertTrue(rates[0]['rate'] > 0)
+        # one read of the interface counters per poll
+        self.assertTrue(self.monitor.netdev.reads == 2)
+        # the series is exported on the /metrics endpoint
+        r = requests.get(self.url)
+        self.assertTrue('sonemu_tx_count_bytes{' in r.text)
+        self.assertTrue('vnf_name="vnf1"' in r.text)
+
+    def testRemoveSeries(self):
+        self._metric('vnf1', 'intf1')
+        self._metric('vnf1', 'intf2')
+        self.monitor.get_network_metrics(self.monitor.network_metrics)
+        self.assertTrue(self._value('vnf1', 'intf1') is not None)
+        self.assertTrue(self._value('vnf1', 'intf2') is not None)
+        # only the series of the stopped interface is removed
+        self.monitor.stop_metric('vnf1', 'intf1', 'tx_bytes')
+        self.assertTrue(self._value('vnf1', 'intf1') is None)
+        self.assertTrue(self._value('vnf1', 'intf2') is not None)
+        self.assertTrue(len(self.monitor.network_metrics) == 1)
+        self.assertTrue(len(self.monitor.get_rates(vnf_interface='intf1')) == 0)
+        r = requests.get(self.url)
+        self.assertTrue('vnf_interface="intf1"' not in r.text)
+        self.assertTrue('vnf_interface="intf2"' in r.text)
+
+    def testStoppedSnapshot(self):
+        m1 = self._metric('vnf1', 'intf1')
+        self._metric('vnf1', 'intf2')
+        # snapshot of a poll that is in flight while the metric is stopped
+        snapshot = self.monitor.network_metrics
+        self.monitor.stop_metric('vnf1', 'intf1', 'tx_bytes')
+        self.assertTrue(m1['stopped'])
+        self.assertTrue(len(snapshot) == 2)
+        # the stopped metric is not exported again
+        self.monitor.get_network_metrics(snapshot)
+        self.assertTrue(self._value('vnf1', 'intf1') is None)
+        self.assertTrue(self._value('vnf1', 'intf2') == 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import os
+import shutil
+import tempfile
+import unittest
+from emuvim.dcemulator.netstats import NetDevReader, parse_proc_net_dev
+
+NET_DEV = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|"
+    "bytes    packets errs drop fifo colls carrier compressed\n"
+    "    lo:    1000      10    0    0    0     0          0         0"
+    "     1000      10    0    0    0     0       0          0\n"
+    "dc1.s1-eth2: 4200  42    1    2    0     0          0         0"
+    "     2100      21    3    4    0     0       0          0\n")
+
+
+class testNetStats(unittest.TestCase):
+    """
+    Test the interface counter collector of the monitoring agent on a
+    fake proc tree.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, path, text):
+        path = os.path.join(self.tmp, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def testParseProcNetDev(self):
+        counters = parse_proc_net_dev(NET_DEV)
+        self.assertTrue(sorted(counters.keys()) == ['dc1.s1-eth2', 'lo'])
+        stats = counters['dc1.s1-eth2']
+        self.assertTrue(stats['rx_bytes'] == 4200)
+        self.assertTrue(stats['rx_packets'] == 42)
+        self.assertTrue(stats['rx_errors'] == 1)
+        self.assertTrue(stats['rx_dropped'] == 2)
+        self.assertTrue(stats['tx_bytes'] == 2100)
+        self.assertTrue(stats['tx_packets'] == 21)
+        self.assertTrue(stats['tx_errors'] == 3)
+        self.assertTrue(stats['tx_dropped'] == 4)
+        # headers and malformed lines are skipped
+        self.assertTrue(parse_proc_net_dev(NET_DEV.splitlines()[0]) == {})
+        self.assertTrue(parse_proc_net_dev("\n\neth0: 1 2 3\n") == {})
+
+    def testNetDevReader(self):
+        self._write('net/dev', NET_DEV)
+        self._write('42/net/dev', "\n\n  eth0: 1 2 0 0 0 0 0 0 3 4 0 0 0 0 0 0\n")
+        reader = NetDevReader(self.tmp)
+        self.assertTrue(reader.counters()['lo']['tx_packets'] == 10)
+        # namespace of a container
+        counters = reader.counters(42)
+        self.assertTrue(list(counters.keys()) == ['eth0'])
+        self.assertTrue(counters['eth0']['tx_bytes'] == 3)
+        # stopped container
+        self.assertRaises(IOError, reader.counters, 43)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator.ratehistory import RateHistory
+
+
+class testRateHistory(unittest.TestCase):
+    """
+    Test the rate computation and ring buffer of the monitoring agent.
+    """
+
+    def testRate(self):
+        h = RateHistory(size=10)
+        # first measurement: no rate yet
+        self.assertTrue(h.update(100, 1.0, timestamp=1) is None)
+        self.assertTrue(h.current() is None)
+        self.assertTrue(h.update(300, 3.0, timestamp=3) == 100.0)
+        self.assertTrue(h.update(400, 4.0, timestamp=4) == 100.0)
+        self.assertTrue(h.update(1400, 6.0, timestamp=6) == 500.0)
+        self.assertTrue(h.current() == 500.0)
+        self.assertTrue(len(h) == 3)
+        # counter reset (e.g. port recreated): restart the computation
+        self.assertTrue(h.update(10, 0.5, timestamp=7) is None)
+        self.assertTrue(h.update(20, 1.5, timestamp=8) == 10.0)
+
+    def testHistory(self):
+        h = RateHistory(size=3)
+        for t in range(6):
+            h.update(t * 10, float(t), timestamp=t)
+        # fixed size, oldest samples dropped
+        self.assertTrue(len(h) == 3)
+        self.assertTrue(h.history() == [(3, 10.0), (4, 10.0), (5, 10.0)])
+        self.assertTrue(h.history(seconds=1, now=5) == [(4, 10.0), (5, 10.0)])
+        self.assertTrue(h.history(seconds=0, now=10) == [])
+
+
+if __name__ == '__main__':
+    unittest.main()
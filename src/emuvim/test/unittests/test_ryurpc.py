@@ -0,0 +1,93 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from emuvim.dcemulator.ryurpc import RyuRpcClient, RyuRpcError, \
+    RyuRpcReplyError, read_frame, write_frame
+
+
+class testRyuRpc(unittest.TestCase):
+    """
+    Test the framing and client of the local Ryu RPC channel.
+    """
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'ryu.sock')
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.rmdir(os.path.dirname(self.path))
+
+    def _serve(self, n_requests):
+        # minimal server: echoes the request, reports unknown ops
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen(1)
+
+        def run():
+            conn, _ = server.accept()
+            for i in range(n_requests):
+                request = read_frame(conn)
+                if request['op'] == 'echo':
+                    write_frame(conn, {'result': request})
+                else:
+                    write_frame(conn, {'error': 'unknown operation'})
+            conn.close()
+            server.close()
+        t = threading.Thread(target=run)
+        t.daemon = True
+        t.start()
+        return t
+
+    def testFrames(self):
+        a, b = socket.socketpair()
+        write_frame(a, {'op': 'flow_mods', 'flows': [{'dpid': 1}] * 100})
+        write_frame(a, {'op': 'port_stats', 'dpid': 2})
+        self.assertTrue(len(read_frame(b)['flows']) == 100)
+        self.assertTrue(read_frame(b)['dpid'] == 2)
+        a.close()
+        # closed connection
+        self.assertRaises(RyuRpcError, read_frame, b)
+        b.close()
+
+    def testClient(self):
+        t = self._serve(2)
+        client = RyuRpcClient(path=self.path)
+        ret = client.call('echo', dpid=1)
+        self.assertTrue(ret['dpid'] == 1)
+        self.assertRaises(RyuRpcReplyError, client.call, 'unknown')
+        t.join()
+        # server is gone
+        self.assertRaises(RyuRpcError, client.call, 'echo')
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator.ryustats import group_by_dpid, cookie_filter, \
+    index_port_stats, index_flow_stats, output_ports, flow_counter
+
+
+class testRyuStats(unittest.TestCase):
+    """
+    Test the per switch grouping and parsing of the stats replies used
+    by the monitoring agent.
+    """
+
+    def testGroupByDpid(self):
+        metrics = [{'switch_dpid': 1, 'mon_port': 1},
+                   {'switch_dpid': 2, 'mon_port': 1},
+                   {'switch_dpid': 1, 'mon_port': 2}]
+        groups = group_by_dpid(metrics)
+        self.assertTrue(list(groups.keys()) == [1, 2])
+        self.assertTrue([m['mon_port'] for m in groups[1]] == [1, 2])
+
+    def testCookieFilter(self):
+        self.assertTrue(cookie_filter([10]) == (10, 0xffffffff))
+        cookie, mask = cookie_filter([10, 11])
+        self.assertTrue(mask == 0xfffffffe)
+        self.assertTrue(cookie == 10)
+        # the filter selects all given cookies
+        cookies = [3, 12, 100]
+        cookie, mask = cookie_filter(cookies)
+        for c in cookies:
+            self.assertTrue(c & mask == cookie)
+        self.assertTrue(cookie_filter([]) == (0, 0))
+        # cookies from the REST API arrive as strings
+        self.assertTrue(cookie_filter(['7']) == (7, 0xffffffff))
+
+    def testPortStats(self):
+        index = index_port_stats([{'port_no': 'LOCAL', 'rx_packets': 0},
+                                  {'port_no': 1, 'rx_packets': 5},
+                                  {'port_no': '2', 'rx_packets': 6}])
+        self.assertTrue(sorted(index.keys()) == [1, 2])
+        self.assertTrue(index[2]['rx_packets'] == 6)
+        self.assertTrue(index_port_stats(None) == {})
+
+    def testFlowCounter(self):
+        stats = [
+            {'cookie': 10, 'match': {'in_port': 1},
+             'actions': ['OUTPUT:2'], 'packet_count': 5, 'byte_count': 500},
+            {'cookie': 10, 'match': {'in_port': 2},
+             'actions': ['POP_VLAN', 'OUTPUT:1'],
+             'packet_count': 7, 'byte_count': 700},
+            {'cookie': 11, 'match': {'in_port': 1},
+             'actions': [{'WRITE_ACTIONS': ['OUTPUT:3']}],
+             'packet_count': 1, 'byte_count': 100}]
+        self.assertTrue(output_ports(stats[2]['actions']) == set([3]))
+        index = index_flow_stats(stats)
+        self.assertTrue(sorted(index.keys()) == [10, 11])
+        self.assertTrue(flow_counter(index, 10, 'tx_packets', 1) == 5)
+        self.assertTrue(flow_counter(index, 10, 'rx_bytes', 1) == 700)
+        self.assertTrue(flow_counter(index, '11', 'rx_packets', 3) == 1)
+        self.assertTrue(flow_counter(index, 11, 'tx_packets', 2) == 0)
+        self.assertTrue(flow_counter(index, 12, 'tx_packets', 1) == 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
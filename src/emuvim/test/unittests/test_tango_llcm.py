@@ -34,7 +34,7 @@ import requests
 import json
 from emuvim.test.base import SimpleTestTopology
 from emuvim.api.tango import TangoLLCMEndpoint
-from emuvim.api.tango.llcm import initialize_GK, parse_interface
+from emuvim.api.tango.llcm import initialize_GK, parse_interface, Service
 from ipaddress import ip_network
 
 PACKAGE_PATH = "misc/eu.5gtango.emulator-example-service.0.1.tgo"
@@ -225,3 +225,24 @@ class testTangoLLCM(SimpleTestTopology):
         # stop Mininet network
         self.stopNet()
         initialize_GK()
+
+    def test_tango_llcm_start_vnfds_failure(self):
+        # create network
+        self.createNet(ndatacenter=1, nhosts=0)
+        self.startNet()
+        service = Service("uuid", None, None)
+        # the second container uses the name of the first one and fails
+
+        def computes(vnfd, vnf_id, ssiid, **kwargs):
+            return [(self.dc[0], {"name": vnfd["name"], "image": "ubuntu:trusty"},
+                     vnfd, vnf_id)]
+        service._vnfd_computes = computes
+        self.assertRaises(Exception, service._start_vnfds,
+                          [({"name": "vnf1"}, "vnf1"),
+                           ({"name": "vnf1"}, "vnf2")], 0)
+        # the started container is stopped again
+        self.assertEqual(len(self.dc[0].listCompute()), 0)
+        self.assertEqual(len(self.getContainernetContainers()), 0)
+        self.assertTrue(self.net.getContainer("vnf1") is None)
+        # stop Mininet network
+        self.stopNet()
@@ -0,0 +1,75 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator.timerwheel import TimerWheel, backoff_interval
+
+
+class testTimerWheel(unittest.TestCase):
+    """
+    Test the timer wheel and the adaptive intervals used to schedule the
+    polling of the monitored metrics.
+    """
+
+    def testExpire(self):
+        w = TimerWheel(tick=0.1, slots=8, now=100.0)
+        w.schedule('a', 0.25, now=100.0)
+        w.schedule('b', 0.1, now=100.0)
+        w.schedule('c', 0, now=100.0)
+        self.assertTrue(len(w) == 3)
+        self.assertTrue(w.expired(now=100.0) == ['c'])
+        self.assertTrue(w.expired(now=100.15) == ['b'])
+        self.assertTrue(w.expired(now=100.25) == [])
+        self.assertTrue(w.expired(now=100.35) == ['a'])
+        self.assertTrue(len(w) == 0)
+        # scheduled in the past: expires with the next tick
+        w.schedule('d', -5, now=100.35)
+        self.assertTrue(w.expired(now=100.45) == ['d'])
+
+    def testRounds(self):
+        # deadlines beyond one turn of the wheel share slots with nearer
+        # ones and only expire in their own turn
+        w = TimerWheel(tick=0.1, slots=8, now=0.0)
+        w.schedule('near', 0.2, now=0.0)
+        w.schedule('far', 1.0, now=0.0)
+        w.schedule('farther', 2.6, now=0.0)
+        self.assertTrue(w.expired(now=0.5) == ['near'])
+        self.assertTrue(w.expired(now=1.05) == ['far'])
+        self.assertTrue(w.expired(now=2.0) == [])
+        # a long pause looks at every slot once
+        self.assertTrue(w.expired(now=50.0) == ['farther'])
+        self.assertTrue(len(w) == 0)
+
+    def testBackoff(self):
+        self.assertTrue(backoff_interval(1.0, 1.0, False, 10.0) == 2.0)
+        self.assertTrue(backoff_interval(8.0, 1.0, False, 10.0) == 10.0)
+        self.assertTrue(backoff_interval(10.0, 1.0, False, 10.0) == 10.0)
+        self.assertTrue(backoff_interval(8.0, 1.0, True, 10.0) == 1.0)
+        # configured interval above the adaptive maximum
+        self.assertTrue(backoff_interval(20.0, 20.0, False, 10.0) == 20.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright (c) 2015 SONATA-NFV and Paderborn University
+# ALL RIGHTS RESERVED.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Neither the name of the SONATA-NFV, Paderborn University
+# nor the names of its contributors may be used to endorse or promote
+# products derived from this software without specific prior written
+# permission.
+#
+# This work has been performed in the framework of the SONATA project,
+# funded by the European Commission under Grant number 671517 through
+# the Horizon 2020 and 5G-PPP programmes. The authors would like to
+# acknowledge the contributions of their colleagues of the SONATA
+# partner consortium (www.sonata-nfv.eu).
+import unittest
+from emuvim.dcemulator.vlan import VlanAllocator, VlanPoolExhausted
+
+
+class testVlanAllocator(unittest.TestCase):
+    """
+    Test the VLAN tag pool used for chains and E-LANs.
+    """
+
+    def testAllocateRelease(self):
+        v = VlanAllocator(first=1, last=3)
+        self.assertTrue(v.allocate() == 1)
+        self.assertTrue(v.allocate() == 2)
+        self.assertTrue(v.allocate() == 3)
+        self.assertTrue(len(v) == 0)
+        # pool is empty
+        self.assertRaises(VlanPoolExhausted, v.allocate)
+        # released tags can be used again
+        self.assertTrue(v.release(2))
+        self.assertFalse(v.in_use(2))
+        self.assertTrue(v.allocate() == 2)
+        # tags not allocated from the pool are ignored
+        self.assertFalse(v.release(42))
+
+    def testChurn(self):
+        v = VlanAllocator()
+        for i in range(0, 20000):
+            tag = v.allocate(path=['s1', 's2'])
+            v.release(tag, path=['s1', 's2'])
+        self.assertTrue(len(v) == 4094)
+
+    def testReuseDisjointPaths(self):
+        v = VlanAllocator(reuse_disjoint_paths=True)
+        t1 = v.allocate(path=['s1', 's2'])
+        # shares a switch: new tag
+        t2 = v.allocate(path=['s2', 's3'])
+        self.assertTrue(t1 != t2)
+        # disjoint: tag is shared
+        t3 = v.allocate(path=['s4', 's5'])
+        self.assertTrue(t3 == t1)
+        # shared tag stays in use until all users released it
+        v.release(t1, path=['s1', 's2'])
+        self.assertTrue(v.in_use(t1))
+        v.release(t3, path=['s4', 's5'])
+        self.assertFalse(v.in_use(t1))
+        # without reuse each path gets its own tag
+        v = VlanAllocator()
+        self.assertTrue(
+            v.allocate(path=['s1']) != v.allocate(path=['s2']))
+
+    def testReuseIndex(self):
+        v = VlanAllocator(reuse_disjoint_paths=True)
+        # one chain per switch pair s<i> - s<i+1>
+        paths = [['s%d' % i, 's%d' % (i + 1)] for i in range(0, 1000)]
+        tags = [v.allocate(path=p) for p in paths]
+        # every second chain shares a switch with its neighbors only
+        self.assertTrue(len(set(tags)) == 2)
+        # lowest tag that is not used on the path
+        self.assertTrue(v.allocate(path=['s0', 'x']) == tags[1])
+        self.assertTrue(v.allocate(path=['s0', 's1']) == 3)
+        # released without path: the tag is no longer used on any switch
+        v.release(3)
+        self.assertTrue(v.allocate(path=['s0', 's1']) == 3)
+        v.release(3, path=['s0', 's1'])
+        v.release(tags[1], path=['s0', 'x'])
+        for tag, p in zip(tags, paths):
+            v.release(tag, path=p)
+        self.assertTrue(len(v) == 4094)
+        self.assertTrue(v._switch_tags == {} and v._shared == [])
+
+
+if __name__ == '__main__':
+    unittest.main()